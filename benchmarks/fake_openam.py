@@ -0,0 +1,365 @@
+"""In-process fake OpenAM server, for benchmarks and tests without a docker container.
+
+Only the parts of the OpenAM Rest API that python-openam uses are implemented, with responses shaped like the ones of
+OpenAM 13. Everything is kept in memory.
+"""
+import hashlib
+import json
+import threading
+import uuid
+import xml.etree.ElementTree as ElementTree
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs, unquote
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+    from urllib import unquote
+
+USERNAME = 'amadmin'
+PASSWORD = 'password_openam'
+COOKIENAME = 'iplanetDirectoryPro'
+XACML_NAMESPACE = 'urn:oasis:names:tc:xacml:3.0:core:schema:wd-17'
+RESOURCES = ['authenticate', 'sessions', 'users', 'groups', 'agents', 'realms', 'resourcetypes', 'serverinfo', 'policies']
+
+
+def _error(code, reason, message):
+    return code, {'code': code, 'reason': reason, 'message': message}
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def _handle(self, method):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        url = urlparse(self.path)
+        query = dict((key, values[0]) for key, values in parse_qs(url.query).items())
+        status, data = self.server.openam.dispatch(method, url.path, query, self.headers, body)
+
+        if isinstance(data, (dict, list)):
+            content = json.dumps(data).encode('utf-8')
+            content_type = 'application/json'
+        else:
+            content = data.encode('utf-8')
+            content_type = 'application/xml'
+
+        etag = None
+        if method == 'GET' and status == 200:
+            etag = '"%s"' % hashlib.md5(content).hexdigest()
+            if self.headers.get('If-None-Match') == etag:
+                status, content = 304, b''
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        if etag is not None:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class FakeOpenam(object):
+    """A fake OpenAM server that runs in a thread of the current process."""
+
+    def __init__(self, host='127.0.0.1', port=0, users=0):
+        """Will initialize the server. It is started with `start()` or by using it as a context manager.
+
+        :param host: The address to listen on.
+        :type host: str
+        :param port: The port to listen on, 0 picks a free port.
+        :type port: int
+        :param users: The number of extra users (user0, user1, ...) to create in the root realm.
+        :type users: int
+        """
+        self._lock = threading.Lock()
+        self.tokens = {}
+        self.identities = {}
+        self.realms = {'/': {'serviceNames': ['iPlanetAMAuthService', 'sunAMDelegationService']}}
+        self.resourcetypes = {}
+        self.policies = {}
+        self.requests = 0
+        for type in ['users', 'groups', 'agents']:
+            self.identities[('/', type)] = {}
+        self._add_identity('/', 'users', {'username': USERNAME, 'userpassword': PASSWORD})
+        self._add_identity('/', 'users', {'username': 'demo', 'userpassword': 'changeit'})
+        for number in range(users):
+            self._add_identity('/', 'users', {'username': 'user%d' % number, 'userpassword': 'secret12'})
+
+        self.server = _Server((host, port), _Handler)
+        self.server.openam = self
+        self._thread = None
+
+    @property
+    def url(self):
+        """The url of the fake server, to be used as openam_url."""
+        host, port = self.server.server_address[:2]
+        return 'http://%s:%d/openam/' % (host, port)
+
+    def start(self):
+        """Will start serving requests in a background thread."""
+        self._thread = threading.Thread(target=self.server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Will stop the server and closes the socket."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _add_identity(self, realm, type, data):
+        identity = dict((key, value if isinstance(value, list) else [value]) for key, value in data.items()
+                        if key not in ['username', 'userpassword'])
+        identity['username'] = data['username']
+        identity['realm'] = realm
+        identity['dn'] = ['uid=%s,ou=people,dc=openam,dc=forgerock,dc=org' % data['username']]
+        identity['_password'] = data.get('userpassword')
+        self.identities[(realm, type)][data['username']] = identity
+        return identity
+
+    def _public(self, identity, fields=None):
+        data = dict((key, value) for key, value in identity.items() if not key.startswith('_'))
+        if fields:
+            data = dict((key, value) for key, value in data.items() if key in fields.split(','))
+        return data
+
+    def dispatch(self, method, path, query, headers, body):
+        """Will handle one request and returns the http status and the body (a dict/list for json, str for xml)."""
+        with self._lock:
+            self.requests += 1
+
+        parts = [unquote(part) for part in path.split('/') if part]
+        if parts and parts[0] == 'openam':
+            parts = parts[1:]
+        if not parts or parts[0] not in ['json', 'xacml']:
+            return _error(404, 'Not Found', 'Resource not found')
+
+        endpoint = parts[0]
+        parts = parts[1:]
+        index = next((number for number, part in enumerate(parts) if part in RESOURCES), None)
+        if index is None:
+            return _error(404, 'Not Found', 'Resource not found')
+
+        realm = '/' + '/'.join(parts[:index])
+        resource = parts[index]
+        resource_id = '/'.join(parts[index + 1:]) or None
+        if realm not in self.realms:
+            return _error(404, 'Not Found', 'Realm not found')
+
+        try:
+            data = json.loads(body.decode('utf-8')) if body and endpoint == 'json' else {}
+        except ValueError:
+            return _error(400, 'Bad Request', 'The request could not be processed because the provided content is not valid JSON')
+
+        if resource == 'authenticate':
+            return self._authenticate(realm, headers)
+        if resource == 'serverinfo':
+            return self._serverinfo(resource_id)
+
+        token = headers.get(COOKIENAME)
+        if token not in self.tokens:
+            return _error(401, 'Unauthorized', 'Access denied')
+
+        with self._lock:
+            if resource == 'sessions':
+                return self._sessions(token, resource_id, query)
+            if resource in ['users', 'groups', 'agents']:
+                return self._identities(method, realm, resource, resource_id, query, data)
+            if resource == 'realms':
+                return self._realms(method, realm, resource_id, data)
+            if resource == 'resourcetypes':
+                return self._resourcetypes(method, resource_id, query, data)
+            return self._policies(method, query, body)
+
+    def _authenticate(self, realm, headers):
+        username = headers.get('X-OpenAM-Username')
+        identity = self.identities.get((realm, 'users'), {}).get(username)
+        if identity is None or identity['_password'] != headers.get('X-OpenAM-Password'):
+            return _error(401, 'Unauthorized', 'Authentication Failed')
+
+        token = 'AQIC5wM2LY4S%s.*AAJTSQACMDE.*' % uuid.uuid4().hex
+        with self._lock:
+            self.tokens[token] = {'uid': username, 'realm': realm}
+        return 200, {'tokenId': token, 'successUrl': '/openam/console'}
+
+    def _serverinfo(self, property):
+        info = {'domains': ['.example.com'], 'cookieName': COOKIENAME, 'secureCookie': False,
+                'forgotPassword': 'false', 'selfRegistration': 'false', 'lang': 'en', 'successfulUserRegistrationDestination': 'default',
+                'socialImplementations': [], 'referralsEnabled': 'false', 'zeroPageLogin': {'enabled': False}}
+        if property in [None, '*']:
+            return 200, info
+        if property == 'cookieDomains':
+            return 200, {'domains': info['domains']}
+        return _error(404, 'Not Found', 'Not Found')
+
+    def _sessions(self, token, session_id, query):
+        action = query.get('_action')
+        if action == 'logout':
+            del self.tokens[token]
+            return 200, {'result': 'Successfully logged out'}
+        if action == 'validate':
+            session = self.tokens.get(session_id)
+            if session is None:
+                return 200, {'valid': False}
+            return 200, {'valid': True, 'uid': session['uid'], 'realm': session['realm']}
+        if query.get('tokenId') not in self.tokens:
+            return _error(400, 'Bad Request', 'Invalid token')
+        if action == 'getTimeLeft':
+            return 200, {'timeleft': 7000}
+        if action == 'getMaxTime':
+            return 200, {'maxtime': 7199}
+        if action == 'getIdle':
+            return 200, {'idletime': 0}
+        return _error(501, 'Not Implemented', 'Action %s not implemented' % action)
+
+    def _identities(self, method, realm, type, username, query, data):
+        identities = self.identities.setdefault((realm, type), {})
+        if username is None:
+            if method == 'POST' and query.get('_action') == 'create':
+                if data.get('username') in identities:
+                    return _error(409, 'Conflict', 'Resource already exists')
+                return 201, self._public(self._add_identity(realm, type, data))
+            if method == 'GET' and '_queryID' in query:
+                return 200, self._query(identities, query)
+            return _error(400, 'Bad Request', 'Bad Request')
+
+        identity = identities.get(username)
+        if identity is None:
+            return _error(404, 'Not Found', 'Resource cannot be found.')
+        if method == 'GET':
+            return 200, self._public(identity, query.get('_fields'))
+        if method == 'PUT':
+            for key, value in data.items():
+                identity[key] = value if isinstance(value, list) else [value]
+            return 200, self._public(identity)
+        if method == 'DELETE':
+            del identities[username]
+            return 200, {'success': 'true'}
+        if query.get('_action') == 'changePassword':
+            if data.get('currentpassword') != identity['_password']:
+                return _error(400, 'Bad Request', 'Invalid Password')
+            identity['_password'] = data.get('userpassword')
+            return 200, {}
+        return _error(400, 'Bad Request', 'Bad Request')
+
+    def _query(self, identities, query):
+        pattern = query['_queryID']
+        names = sorted(name for name in identities if pattern == '*' or pattern.strip('*') in name)
+        page_size = int(query.get('_pageSize') or 0)
+        cookie = query.get('_pagedResultsCookie')
+        offset = int(cookie) if cookie else int(query.get('_pagedResultsOffset') or 0)
+        next_cookie = None
+        if page_size:
+            if offset + page_size < len(names):
+                next_cookie = str(offset + page_size)
+            names = names[offset:offset + page_size]
+        result = [self._public(identities[name]) for name in names]
+        return {'result': result, 'resultCount': len(result), 'pagedResultsCookie': next_cookie,
+                'totalPagedResultsPolicy': 'NONE', 'totalPagedResults': -1, 'remainingPagedResults': -1}
+
+    def _realms(self, method, realm, name, data):
+        if name is None:
+            if method == 'POST':
+                path = (realm.rstrip('/') + '/' + data.get('realm', '').strip('/'))
+                if path in self.realms:
+                    return _error(409, 'Conflict', 'Realm already exists')
+                self.realms[path] = dict((key, value) for key, value in data.items() if key != 'realm')
+                self.realms[path].setdefault('serviceNames', ['iPlanetAMAuthService'])
+                for type in ['users', 'groups', 'agents']:
+                    self.identities[(path, type)] = {}
+                return 201, {'realmCreated': path}
+            prefix = realm.rstrip('/') + '/'
+            result = sorted(path for path in self.realms if path == realm or path.startswith(prefix))
+            return 200, {'result': result, 'resultCount': len(result), 'pagedResultsCookie': None,
+                         'totalPagedResultsPolicy': 'NONE', 'totalPagedResults': -1, 'remainingPagedResults': -1}
+
+        path = '/' + name.strip('/')
+        if path not in self.realms:
+            return _error(404, 'Not Found', 'Realm not found')
+        if method == 'GET':
+            return 200, self.realms[path]
+        if method == 'PUT':
+            self.realms[path].update(data)
+            return 200, {'realmUpdated': path}
+        if method == 'DELETE':
+            for key in [key for key in self.realms if key == path or key.startswith(path + '/')]:
+                del self.realms[key]
+            return 200, {'success': 'true'}
+        return _error(400, 'Bad Request', 'Bad Request')
+
+    def _resourcetypes(self, method, resource_id, query, data):
+        if resource_id is None:
+            if method == 'POST' and query.get('_action') == 'create':
+                data['uuid'] = str(uuid.uuid4())
+                data.setdefault('description', None)
+                self.resourcetypes[data['uuid']] = data
+                return 201, data
+            if method == 'GET':
+                result = list(self.resourcetypes.values())
+                return 200, {'result': result, 'resultCount': len(result), 'pagedResultsCookie': None,
+                             'totalPagedResultsPolicy': 'NONE', 'totalPagedResults': -1, 'remainingPagedResults': 0}
+            return _error(400, 'Bad Request', 'Bad Request')
+
+        resourcetype = self.resourcetypes.get(resource_id)
+        if resourcetype is None:
+            return _error(404, 'Not Found', 'Resource type %s not found' % resource_id)
+        if method == 'GET':
+            return 200, resourcetype
+        if method == 'PUT':
+            resourcetype.update(data)
+            return 200, resourcetype
+        if method == 'DELETE':
+            del self.resourcetypes[resource_id]
+            return 200, {}
+        return _error(400, 'Bad Request', 'Bad Request')
+
+    def _policies(self, method, query, body):
+        if method == 'GET':
+            policies = ''.join(self.policies.values())
+            return 200, ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                         '<PolicySet xmlns="%s" PolicySetId="FakeOpenam">%s</PolicySet>' % (XACML_NAMESPACE, policies))
+        try:
+            root = ElementTree.fromstring(body)
+        except ElementTree.ParseError:
+            return _error(400, 'Bad Request', 'Invalid XACML')
+
+        ElementTree.register_namespace('', XACML_NAMESPACE)
+        result = []
+        for policy in root.iter('{%s}Policy' % XACML_NAMESPACE):
+            name = policy.get('PolicyId')
+            status = 'UPDATE' if name in self.policies else 'CREATE'
+            if query.get('dryrun') != 'true':
+                self.policies[name] = ElementTree.tostring(policy).decode('utf-8')
+            result.append({'status': status, 'name': name})
+        return 200, result
@@ -0,0 +1,284 @@
+"""Benchmark of the public methods of python-openam against the in-process fake OpenAM server.
+
+Every method is measured in three modes:
+
+* sequential: a new Openam instance per call, so every call opens a new connection.
+* pooled: one Openam instance, calls are done one after the other over the pooled connections.
+* concurrent: one Openam instance shared by a number of threads.
+
+With tracemalloc (python 3) the memory per call is measured in every mode as well, against a fake server in a child
+process so its allocations are not counted.
+
+Example::
+
+    python benchmarks/run.py --calls 500 --concurrency 8 --methods get_identity,token_validation
+
+With --cassette the requests of the first run are recorded, later runs replay them without network, which measures
+only the overhead of python-openam itself::
+
+    python benchmarks/run.py --cassette /tmp/benchmark.ndjson.gz
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+sys.path.insert(0, my_path)
+
+import openam
+from openam.cassette import Cassette, RECORD, REPLAY
+from fake_openam import FakeOpenam, USERNAME, PASSWORD
+
+XACML_POLICY = ('<PolicySet xmlns="urn:oasis:names:tc:xacml:3.0:core:schema:wd-17" PolicySetId="benchmark">'
+                '<Policy PolicyId="benchmark" RuleCombiningAlgId="deny-overrides"><Target/></Policy></PolicySet>')
+
+
+def _counter():
+    lock = threading.Lock()
+    state = {'value': 0}
+
+    def next_value():
+        with lock:
+            state['value'] += 1
+            return state['value']
+    return next_value
+
+
+def _once(create):
+    """Will return a function(am) that creates an object with create(am) on the first call and returns it every time."""
+    lock = threading.Lock()
+    created = []
+
+    def get(am):
+        with lock:
+            if not created:
+                created.append(create(am))
+        return created[0]
+    return get
+
+
+def scenarios():
+    """The calls that are measured, as a dict with the name of the method and a tuple (prepare, call).
+
+    `prepare(am)` is called before every call, outside of the measurement, and returns the argument of
+    `call(am, token, argument)`. It is None when the call needs no preparation.
+    """
+    number = _counter()
+
+    def new_identity(am):
+        username = 'bench%d' % number()
+        am.create_identity(user_data={'username': username, 'userpassword': 'secret12'})
+        return username
+
+    def new_realm(am):
+        realm = 'bench%d' % number()
+        am.create_realm(realm_data={'realm': realm})
+        return realm
+
+    def new_resourcetype(am):
+        return am.create_resourcetype(resource_data=resourcetype_data())['uuid']
+
+    def new_session(am):
+        session = openam.Openam(openam_url=am.openam_url, json_backend=am.json_backend.name, cassette=am.cassette)
+        session.authenticate(username=USERNAME, password=PASSWORD)
+        return session
+
+    def resourcetype_data():
+        return {'name': 'bench%d' % number(), 'patterns': ['http://bench/*'], 'actions': {'GET': True}}
+
+    def logout(session):
+        session.logout()
+        session.close()
+
+    realm = _once(new_realm)
+    resourcetype = _once(new_resourcetype)
+    return {
+        'authenticate': (None, lambda am, token, _: am.authenticate(username=USERNAME, password=PASSWORD)),
+        'logout': (new_session, lambda am, token, session: logout(session)),
+        'get_serverinfo': (None, lambda am, token, _: am.get_serverinfo()),
+        'token_validation': (None, lambda am, token, _: am.token_validation(token=token)),
+        'session_information': (None, lambda am, token, _: am.session_information(action='getTimeLeft', token=token)),
+        'create_identity': (None, lambda am, token, _: am.create_identity(user_data={'username': 'bench%d' % number(), 'userpassword': 'secret12'})),
+        'list_identities': (None, lambda am, token, _: am.list_identities(query='user1*')),
+        'iter_identities': (None, lambda am, token, _: list(am.iter_identities(query='user1*', page_size=50))),
+        'get_identity': (None, lambda am, token, _: am.get_identity(username='demo')),
+        'update_identity': (None, lambda am, token, _: am.update_identity(username='demo', user_data={'mail': 'demo@example.com'})),
+        'delete_identity': (new_identity, lambda am, token, username: am.delete_identity(username=username)),
+        'change_password': (new_identity, lambda am, token, username: am.change_password(
+            username=username, user_data={'currentpassword': 'secret12', 'userpassword': 'secret13'})),
+        'list_realms': (None, lambda am, token, _: am.list_realms()),
+        'get_realm': (None, lambda am, token, _: am.get_realm(realm='/')),
+        'create_realm': (None, lambda am, token, _: am.create_realm(realm_data={'realm': 'bench%d' % number()})),
+        'update_realm': (realm, lambda am, token, name: am.update_realm(realm=name, realm_data={'active': True})),
+        'delete_realm': (new_realm, lambda am, token, name: am.delete_realm(realm=name)),
+        'list_resourcetypes': (None, lambda am, token, _: am.list_resourcetypes()),
+        'get_resourcetype': (resourcetype, lambda am, token, uuid: am.get_resourcetype(uuid=uuid)),
+        'create_resourcetype': (None, lambda am, token, _: am.create_resourcetype(resource_data=resourcetype_data())),
+        'update_resourcetype': (resourcetype, lambda am, token, uuid: am.update_resourcetype(
+            uuid=uuid, resource_data={'name': 'bench', 'patterns': ['http://bench/*'], 'actions': {'POST': True}})),
+        'delete_resourcetype': (new_resourcetype, lambda am, token, uuid: am.delete_resourcetype(uuid=uuid)),
+        'xacml_import_policy': (None, lambda am, token, _: am.xacml_import_policy(policy_data=XACML_POLICY)),
+        'xacml_export_policies': (None, lambda am, token, _: am.xacml_export_policies()),
+    }
+
+
+def percentile(values, percent):
+    """Will return the percentile of the sorted values."""
+    index = min(len(values) - 1, int(round(percent / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def run_calls(call, calls, concurrency, client, close=False, prepare=None):
+    """Will do the calls with the number of threads and returns the total time and the latency per call."""
+    latencies = []
+    lock = threading.Lock()
+    remaining = [calls]
+
+    def worker():
+        while True:
+            with lock:
+                if not remaining[0]:
+                    return
+                remaining[0] -= 1
+            am, token = client()
+            argument = prepare(am) if prepare is not None else None
+            start = time.time()
+            call(am, token, argument)
+            elapsed = time.time() - start
+            if close:
+                am.close()
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.time() - start, sorted(latencies)
+
+
+def allocations(call, prepare, shared, calls, concurrency, client, close=False):
+    """Will return the bytes allocated per call in a mode as a tuple (peak, kept), or None without tracemalloc.
+
+    The arguments of the calls are prepared before the measurement. `peak` is the highest memory use during the calls
+    per call in flight, `kept` the memory per call that is still allocated after the calls by code of python-openam
+    (or code that it called), like caches. The fake server has to run in another process, as tracemalloc measures
+    everything that is allocated in this process.
+    """
+    if tracemalloc is None:
+        return None
+
+    arguments = [prepare(shared) if prepare is not None else None for _ in range(calls + 1)]
+    run_calls(call, 1, 1, client, close=close, prepare=lambda am: arguments.pop())
+    tracemalloc.start(25)
+    try:
+        run_calls(call, calls, concurrency, client, close=close, prepare=lambda am: arguments.pop())
+        peak = tracemalloc.get_traced_memory()[1]
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    package = os.path.join(os.path.dirname(os.path.abspath(openam.__file__)), '*')
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(True, package, all_frames=True)])
+    kept = sum(trace.size for trace in snapshot.traces)
+    return peak / float(min(calls, concurrency)), kept / float(calls)
+
+
+def _serve(users, urls, stop):
+    """Will run a fake server in a child process, until stop is set."""
+    with FakeOpenam(users=users) as server:
+        urls.put(server.url)
+        stop.wait()
+
+
+def _modes(url, args, cassette):
+    """Will return the logged in shared instance, its token and the modes as tuples (mode, concurrency, client, close)."""
+    shared = openam.Openam(openam_url=url, pool_maxsize=args.concurrency, json_backend=args.json_backend,
+                           cassette=cassette)
+    token = shared.authenticate(username=USERNAME, password=PASSWORD)['tokenId']
+
+    def new_client():
+        am = openam.Openam(openam_url=url, json_backend=args.json_backend, cassette=cassette)
+        am._context = shared._context
+        return am, token
+
+    return shared, token, [
+        ('sequential', 1, new_client, True),
+        ('pooled', 1, lambda: (shared, token), False),
+        ('concurrent', args.concurrency, lambda: (shared, token), False),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--calls', type=int, default=200, help='number of calls per method and mode')
+    parser.add_argument('--concurrency', type=int, default=8, help='number of threads in the concurrent mode')
+    parser.add_argument('--methods', default=None, help='comma separated list of methods, default all')
+    parser.add_argument('--users', type=int, default=1000, help='number of users in the fake server')
+    parser.add_argument('--json-backend', default=None, help="json, orjson, ujson or auto, default json")
+    parser.add_argument('--cassette', default=None, help='record the requests to this file, or replay it when it exists')
+    parser.add_argument('--latency', type=float, default=None, help='simulated latency in seconds of replayed requests')
+    parser.add_argument('--allocation-calls', type=int, default=20, help='number of calls per method and mode that '
+                                                                         'are traced with tracemalloc')
+    args = parser.parse_args()
+
+    all_scenarios = scenarios()
+    names = args.methods.split(',') if args.methods else sorted(all_scenarios)
+
+    cassette = None
+    if args.cassette:
+        mode = REPLAY if os.path.exists(args.cassette) else RECORD
+        cassette = Cassette(args.cassette, mode=mode, latency=args.latency)
+
+    process = None
+    if tracemalloc is not None:
+        urls = multiprocessing.Queue()
+        stop = multiprocessing.Event()
+        process = multiprocessing.Process(target=_serve, args=(args.users, urls, stop))
+        process.daemon = True
+        process.start()
+        traced_scenarios = scenarios()
+        traced_shared, _, traced_modes = _modes(urls.get(), args, cassette)
+
+    with FakeOpenam(users=args.users) as server:
+        shared, token, modes = _modes(server.url, args, cassette)
+
+        print('%-22s %-11s %10s %10s %10s %12s %12s' % ('method', 'mode', 'req/s', 'p50 ms', 'p99 ms', 'peak B/call',
+                                                        'kept B/call'))
+        for name in names:
+            prepare, call = all_scenarios[name]
+            for index, (mode, concurrency, client, close) in enumerate(modes):
+                total, latencies = run_calls(call, args.calls, concurrency, client, close=close, prepare=prepare)
+                allocated = None
+                if process is not None:
+                    traced_prepare, traced_call = traced_scenarios[name]
+                    _, concurrency, client, close = traced_modes[index]
+                    allocated = allocations(traced_call, traced_prepare, traced_shared, args.allocation_calls,
+                                            concurrency, client, close=close)
+                print('%-22s %-11s %10.0f %10.2f %10.2f %12s %12s' % (
+                    name, mode, len(latencies) / total, percentile(latencies, 50) * 1000,
+                    percentile(latencies, 99) * 1000, '-' if allocated is None else '%.0f' % allocated[0],
+                    '-' if allocated is None else '%.0f' % allocated[1]))
+
+        shared.logout()
+        shared.close()
+
+    if process is not None:
+        traced_shared.logout()
+        traced_shared.close()
+        stop.set()
+        process.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,32 +1,87 @@
 """python-openam is an python wrapper for the OpenAM Rest API."""
 import requests
-import json
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from collections import namedtuple
+from requests.adapters import HTTPAdapter
+from openam._helpers import bulk, imap_unordered
+from openam.cache import LRUCache, shared_serverinfo_cache
+from openam.jsonbackend import get_backend
+from openam.metrics import RequestEvent, endpoint_template
+from openam.models import Identity, Realm, ResourceType
+from openam.singleflight import SingleFlight
+
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote
 
 __author__ = 'Werner Dijkerman'
 __version__ = '0.0.3'
 __license__ = "Apache License 2.0"
 __email__ = "ikben@werner-dijkerman.nl"
 
+_XACML_NAMESPACE = 'urn:oasis:names:tc:xacml:3.0:core:schema:wd-17'
 
-class Openam(object):
-    """OpenAM Rest Interface."""
+_AuthContext = namedtuple('_AuthContext', ['token', 'realm', 'expires'])
+_AuthContext.__new__.__defaults__ = (None,)
 
-    def __init__(self, openam_url='', resource=1.0, protocol=1.0, timeout=10, cookiename="iplanetDirectoryPro", verify=True):
-        """Will initialize the openam module.
 
-        :param openam_url: The complete URL to the OpenAM server.
-        :type openam_url: str
-        :param resource: The username to login.
-        :type resource: str
-        :param protocol: The password for the user configured in username.
-        :type protocol: str
-        :param timeout: HTTP requests timeout in seconds.
-        :type timeout: int
-        :param cookiename: The name of the cookie.
-        :type cookiename: str
-        :param verify: Allow OpenAM server using a self-signed certificate.
-        :type verify: bool
-        """
+def _is_policy(element):
+    """Will return True when the element is a XACML <Policy>."""
+    return element.tag == 'Policy' or element.tag.endswith('}Policy')
+
+
+def _iter_policies(source):
+    """Will parse a XACML PolicySet incrementally and yields its <Policy> elements.
+
+    Every policy is removed from the tree after it is yielded, so memory use does not depend on the number of policies.
+
+    :param source: A file-like object with the PolicySet.
+    :type source: file
+    :rtype: generator
+    :return: The policies as `xml.etree.ElementTree.Element`.
+    """
+    parents = []
+    for event, element in ElementTree.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            parents.append(element)
+            continue
+
+        parents.pop()
+        if _is_policy(element):
+            yield element
+            if parents:
+                parents[-1].remove(element)
+
+
+def _batches(iterable, size):
+    """Will group the items of the iterable in lists of at most size items, reading the iterable lazily.
+
+    :param iterable: The items.
+    :type iterable: iterable
+    :param size: The maximum number of items per batch.
+    :type size: int
+    :rtype: generator
+    :return: The batches.
+    """
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class _OpenamBase(object):
+    """Shared configuration and helpers for the OpenAM Rest Interfaces."""
+
+    def __init__(self, openam_url='', resource=1.0, protocol=1.0, timeout=10, cookiename="iplanetDirectoryPro", verify=True,
+                 json_backend=None, response_models=False):
+        """Will store the configuration that is needed to talk to OpenAM."""
         if not openam_url:
             raise ValueError('This interface needs an OpenAM URL to work!')
 
@@ -34,94 +89,73 @@ class Openam(object):
         self.resource = resource
         self.protocol = protocol
         self.cookiename = cookiename
-        self.headers = {}
-        self.headers['Content-Type'] = 'application/json'
-        self.headers[cookiename] = None
         self.timeout = int(timeout)
         self.verify = verify
+        self.json_backend = get_backend(json_backend)
+        self.response_models = response_models
+        self._context = _AuthContext(token=None, realm=None)
 
-    def _get(self, uri, headers=None):
-        """Will do an 'GET' request to get information via the API.
+    @property
+    def headers(self):
+        """A new dict with the http headers for a request, including the token of the current session.
 
-        :param uri: The uri you want to get.
-        :type uri: str
-        :param headers: The http headers that are needed for the request.
-        :type headers: dict
-        :return: A dict with information that is retrieved from OpenAM
+        The authentication state is kept in one immutable context which is replaced as a whole on login and logout, so
+        one instance can be shared by multiple threads.
         """
-        if self.openam_url[-1:] == '/':
-            openam_path = self.openam_url + uri
-        else:
-            openam_path = self.openam_url + "/" + uri
-
-        return requests.get(openam_path, headers=headers, timeout=self.timeout, verify=self.verify)
+        return self._context_headers(self._context)
 
-    def _post(self, uri, data=None, headers=None):
-        """Post information via the API.
+    def _context_headers(self, context):
+        """Will create the http headers for a request with the token of the given context.
 
-        :param uri: The uri that is used for posting the data.
-        :type uri: str
-        :param data: The data that is posted to the API.
-        :type data: str
-        :param headers: The http headers that are needed for the request.
-        :type headers: dict
+        :param context: The authentication context.
+        :type context: _AuthContext
         :rtype: dict
-        :return: A dict with information that is retrieved from OpenAM
+        :return: The http headers.
         """
-        if self.openam_url[-1:] == '/':
-            openam_path = self.openam_url + uri
-        else:
-            openam_path = self.openam_url + "/" + uri
+        return {'Content-Type': 'application/json', self.cookiename: context.token}
 
-        try:
-            data = requests.post(openam_path, headers=headers, data=data, timeout=self.timeout, verify=self.verify)
-        except requests.exceptions.RequestException as e:
-            data = {'error': e}
-        return data
+    @property
+    def realm(self):
+        """The realm of the current session."""
+        return self._context.realm
 
-    def _put(self, uri, data=None, headers=None):
-        """Put information via the API.
+    @property
+    def token(self):
+        """The token of the current session."""
+        return self._context.token
 
-        :param uri: The uri that is used for putting the data.
-        :type uri: str
-        :param data: The data that is put to the API.
-        :type data: str
-        :param headers: The http headers that are needed for the request.
-        :type headers: dict
+    def _login_headers(self, username=None, password=None):
+        """Will create the http headers for authenticating, without changing the headers of the current session.
+
+        :param username: The username which is used to authenticate against OpenAM.
+        :type username: str
+        :param password: The password for the user configured on 'username'
+        :type password: str
         :rtype: dict
-        :return: A dict with information that is retrieved from OpenAM
+        :return: The http headers.
         """
-        if self.openam_url[-1:] == '/':
-            openam_path = self.openam_url + uri
-        else:
-            openam_path = self.openam_url + "/" + uri
+        login_headers = {'Content-Type': 'application/json'}
+        login_headers['X-OpenAM-Username'] = username
+        login_headers['X-OpenAM-Password'] = password
+        return login_headers
 
-        try:
-            data = requests.put(openam_path, headers=headers, data=data, timeout=self.timeout, verify=self.verify)
-        except requests.exceptions.RequestException as e:
-            data = {'error': e}
-        return data
+    def _openam_path(self, uri, openam_url=None):
+        """Will create the complete url for the given uri.
 
-    def _delete(self, uri, headers=None):
-        """Delete information via the API.
-
-        :param uri: The uri that is used for deleting the data.
+        :param uri: The uri after the OpenAM url.
         :type uri: str
-        :param headers: The http headers that are needed for the request.
-        :type headers: dict
-        :rtype: dict
-        :return: A dict with information that is retrieved from OpenAM
+        :param openam_url: The OpenAM url to use, when None the configured openam_url is used.
+        :type openam_url: str
+        :rtype: str
+        :return: The complete url.
         """
-        if self.openam_url[-1:] == '/':
-            openam_path = self.openam_url + uri
-        else:
-            openam_path = self.openam_url + "/" + uri
+        if openam_url is None:
+            openam_url = self.openam_url
 
-        try:
-            data = requests.delete(openam_path, headers=headers, timeout=self.timeout, verify=self.verify)
-        except requests.exceptions.RequestException as e:
-            data = {'error': e}
-        return data
+        if openam_url[-1:] == '/':
+            return openam_url + uri
+        else:
+            return openam_url + "/" + uri
 
     def _uri_realm_creator(self, endpoint="json", realm=None, uri=None, arguments=None):
         """Creating the uri if there is a realm provided.
@@ -159,6 +193,56 @@ class Openam(object):
             type = 'users'
         return type
 
+    def _json(self, response):
+        """Will decode the json body of a response, straight from the bytes of the response.
+
+        :param response: The response of OpenAM.
+        :type response: requests.Response
+        :rtype: dict
+        :return: The decoded body.
+        """
+        return self.json_backend.loads(response.content)
+
+    def _model(self, model, response):
+        """Will return the response as model when response models are enabled, otherwise as decoded json.
+
+        :param model: The class of the model.
+        :type model: type
+        :param response: The response of OpenAM.
+        :type response: requests.Response
+        :rtype: openam.models.Model or dict
+        :return: The model, which keeps the bytes of the response without decoding them, or the decoded body.
+        """
+        return self._content_model(model, response.content)
+
+    def _content_model(self, model, content):
+        """Will return the json content as model when response models are enabled, otherwise decoded.
+
+        :param model: The class of the model.
+        :type model: type
+        :param content: The json content.
+        :type content: bytes
+        :rtype: openam.models.Model or dict
+        :return: The model or the decoded content.
+        """
+        if not self.response_models:
+            return self.json_backend.loads(content)
+        return model(content, json_backend=self.json_backend)
+
+    def _result_models(self, model, json_data):
+        """Will replace the items of the 'result' of a query by models when response models are enabled.
+
+        :param model: The class of the model.
+        :type model: type
+        :param json_data: The decoded body of a query.
+        :type json_data: dict
+        :rtype: dict
+        :return: The decoded body.
+        """
+        if self.response_models and json_data.get('result'):
+            json_data['result'] = [model.from_dict(item, json_backend=self.json_backend) for item in json_data['result']]
+        return json_data
+
     def _to_string(self, data=None):
         """Converts a dict or a list to a string. List will be space seperated.
 
@@ -171,12 +255,523 @@ class Openam(object):
             raise ValueError("Please provide a correct data structure.")
 
         if isinstance(data, dict):
-            return str(json.dumps(data))
+            return str(self.json_backend.dumps(data))
         elif isinstance(data, list):
             return ' '.join(data)
         else:
             return data
 
+
+class Openam(_OpenamBase):
+    """OpenAM Rest Interface."""
+
+    def __init__(self, openam_url='', resource=1.0, protocol=1.0, timeout=10, cookiename="iplanetDirectoryPro", verify=True,
+                 pool_connections=10, pool_maxsize=10, max_retries=0, token_cache_size=0, token_cache_ttl=60,
+                 observers=None, retry=None, reauthenticate=False, refresh_margin=60, circuit_breaker=None,
+                 rate_limiter=None, json_backend=None, response_models=False, coalesce=False,
+                 serverinfo_ttl=0, serverinfo_cache=None, identity_cache_size=0, identity_cache_ttl=60,
+                 identity_cache=None, cassette=None):
+        """Will initialize the openam module.
+
+        All requests are done via one `requests.Session`, so connections to OpenAM are kept alive and reused. Call
+        `close()` (or use the instance as a context manager) to release the connection pool.
+
+        :param openam_url: The complete URL to the OpenAM server.
+        :type openam_url: str
+        :param resource: The username to login.
+        :type resource: str
+        :param protocol: The password for the user configured in username.
+        :type protocol: str
+        :param timeout: HTTP requests timeout in seconds.
+        :type timeout: int
+        :param cookiename: The name of the cookie.
+        :type cookiename: str
+        :param verify: Allow OpenAM server using a self-signed certificate.
+        :type verify: bool
+        :param pool_connections: The number of connection pools to cache.
+        :type pool_connections: int
+        :param pool_maxsize: The maximum number of connections to keep in a pool per host.
+        :type pool_maxsize: int
+        :param max_retries: The number of retries per connection, or a `urllib3.util.retry.Retry` object for more control.
+        :type max_retries: int or Retry
+        :param token_cache_size: The maximum number of valid tokens cached by `token_validation`. 0 disables the cache.
+        :type token_cache_size: int
+        :param token_cache_ttl: The maximum number of seconds a token validation is cached.
+        :type token_cache_ttl: int
+        :param observers: Functions that are called with a `openam.metrics.RequestEvent` after every request.
+        :type observers: list
+        :param retry: The retry policy for idempotent requests, like `get_identity` and `token_validation`. None disables retries.
+        :type retry: openam.retry.RetryPolicy
+        :param reauthenticate: Keep the credentials of `authenticate` and login again when the session is expired.
+        :type reauthenticate: bool
+        :param refresh_margin: With reauthenticate, the number of seconds before the end of the session (getMaxTime)
+                               the session is renewed.
+        :type refresh_margin: int
+        :param circuit_breaker: Fail fast on endpoints that keep failing. None disables the circuit breaker.
+        :type circuit_breaker: openam.circuit.CircuitBreaker
+        :param rate_limiter: Limit the number of requests per second and in flight. None disables the limits.
+        :type rate_limiter: openam.throttle.RateLimiter
+        :param json_backend: The JSON library for request bodies and responses: 'json' (the default), 'orjson',
+                             'ujson' or 'auto' for the fastest installed one.
+        :type json_backend: str
+        :param response_models: Return identities, realms and resourcetypes as :mod:`openam.models`, which use a
+                                fraction of the memory of dicts.
+        :type response_models: bool
+        :param coalesce: Identical reads that are in flight at the same time, like `get_identity` of the same user or
+                         `token_validation` of the same token, are sent once and all threads receive that response.
+        :type coalesce: bool
+        :param serverinfo_ttl: The number of seconds `get_serverinfo` results are cached, after which they are
+                               revalidated with their ETag. The cache is shared by all instances with the same ttl.
+                               0 disables the cache.
+        :type serverinfo_ttl: int
+        :param serverinfo_cache: The cache for `get_serverinfo` results, instead of the shared cache.
+        :type serverinfo_cache: openam.cache.ServerInfoCache
+        :param identity_cache_size: The maximum number of identities cached by `get_identity`. 0 disables the cache.
+        :type identity_cache_size: int
+        :param identity_cache_ttl: The number of seconds an identity is cached.
+        :type identity_cache_ttl: int
+        :param identity_cache: The cache for identities, instead of an in-memory cache of identity_cache_size. This can
+                               be a cache that is shared by multiple processes.
+        :type identity_cache: openam.cache.CacheBackend
+        :param cassette: Record the requests with their responses in a file, or replay them from that file without
+                         sending anything to OpenAM.
+        :type cassette: openam.cassette.Cassette
+        """
+        super(Openam, self).__init__(openam_url=openam_url, resource=resource, protocol=protocol, timeout=timeout,
+                                     cookiename=cookiename, verify=verify, json_backend=json_backend,
+                                     response_models=response_models)
+
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=max_retries)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.token_cache_ttl = token_cache_ttl
+        if token_cache_size:
+            self.token_cache = LRUCache(max_entries=token_cache_size, ttl=token_cache_ttl)
+            self._token_realms = LRUCache(max_entries=token_cache_size, ttl=token_cache_ttl)
+        else:
+            self.token_cache = None
+            self._token_realms = None
+        self._token_lock = threading.Lock()
+
+        self.observers = list(observers or [])
+        self.retry = retry
+        self.reauthenticate = reauthenticate
+        self.refresh_margin = refresh_margin
+        self._credentials = None
+        self._auth_lock = threading.Lock()
+        self.circuit_breaker = circuit_breaker
+        self.rate_limiter = rate_limiter
+        self.single_flight = SingleFlight() if coalesce else None
+        if serverinfo_cache is None and serverinfo_ttl:
+            serverinfo_cache = shared_serverinfo_cache(ttl=serverinfo_ttl)
+        self.serverinfo_cache = serverinfo_cache
+
+        self.identity_cache_ttl = identity_cache_ttl
+        if identity_cache is None and identity_cache_size:
+            identity_cache = LRUCache(max_entries=identity_cache_size, ttl=identity_cache_ttl)
+        self.identity_cache = identity_cache
+        # The generation and the number of fetches in flight per identity cache key, see `_identity_fetch`.
+        self._identity_fetches = {}
+        self._identity_lock = threading.Lock()
+        self.cassette = cassette
+
+    def __enter__(self):
+        """Will return the instance itself when used as a context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Will close the session when leaving the context manager."""
+        self.close()
+
+    def close(self):
+        """Will close the http session and release all pooled connections.
+
+        :Example:
+            >>> import openam
+            >>> with openam.Openam(openam_url="http://openam.example.com:8080/openam/") as am:
+            >>>     am.get_serverinfo()
+        """
+        self.session.close()
+        if self.cassette is not None:
+            self.cassette.close()
+
+    def add_observer(self, observer):
+        """Will add an observer, which is called with a `openam.metrics.RequestEvent` after every request.
+
+        :param observer: The function that is called with the event.
+        :type observer: callable
+        :Example:
+            >>> import openam
+            >>> am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+            >>> am.add_observer(lambda event: print(event.method, event.endpoint, event.status_code, event.duration))
+            >>> am.get_serverinfo()
+            GET json/serverinfo/{id} 200 0.0123
+        """
+        self.observers = self.observers + [observer]
+
+    def _notify(self, method, uri, data, response, error, start, attempt=0, stream=False):
+        """Will call all observers with the event of the request.
+
+        :param method: The http method.
+        :type method: str
+        :param uri: The uri of the request.
+        :type uri: str
+        :param data: The data that was send.
+        :type data: str
+        :param response: The response, or None when there is none.
+        :type response: requests.Response
+        :param error: The exception, or None when there is a response.
+        :type error: Exception
+        :param start: The start time of the request.
+        :type start: float
+        :param attempt: The number of earlier attempts of this request.
+        :type attempt: int
+        :param stream: The body of the response is not read yet, the Content-Length header is used as its size.
+        :type stream: bool
+        """
+        duration = time.time() - start
+        if response is not None:
+            retries = getattr(getattr(response.raw, 'retries', None), 'history', None) or ()
+            if stream:
+                bytes_received = int(response.headers.get('Content-Length') or 0)
+            else:
+                bytes_received = len(response.content)
+            event = RequestEvent(method=method, endpoint=endpoint_template(uri), status_code=response.status_code,
+                                 bytes_sent=len(data or ''), bytes_received=bytes_received, duration=duration,
+                                 server_time=response.elapsed.total_seconds(), retries=attempt + len(retries), error=None)
+        else:
+            event = RequestEvent(method=method, endpoint=endpoint_template(uri), status_code=None,
+                                 bytes_sent=len(data or ''), bytes_received=0, duration=duration, server_time=None,
+                                 retries=attempt, error=error)
+
+        for observer in self.observers:
+            observer(event)
+
+    def _request(self, method, uri, data=None, headers=None, idempotent=False, stream=False):
+        """Will do a request on OpenAM. All http verbs go through this function.
+
+        With coalesce, an idempotent request is sent only once when the same request (the same uri, data and headers)
+        is already in flight, and all threads receive the same response. Streamed responses are never shared.
+
+        :param method: The http method.
+        :type method: str
+        :param uri: The uri for the request.
+        :type uri: str
+        :param data: The data that is send to the API.
+        :type data: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :param idempotent: The request can safely be done more than once.
+        :type idempotent: bool
+        :param stream: Don't read the body of the response yet, so it can be read in chunks.
+        :type stream: bool
+        :rtype: requests.Response
+        :return: The response of OpenAM.
+        """
+        if not idempotent or stream or self.single_flight is None:
+            return self._authenticated_request(method, uri, data=data, headers=headers, idempotent=idempotent, stream=stream)
+
+        key = (method, uri, data, tuple(sorted((headers or {}).items())))
+        return self.single_flight.do(key, self._authenticated_request, method, uri, data=data, headers=headers,
+                                     idempotent=idempotent)
+
+    def _authenticated_request(self, method, uri, data=None, headers=None, idempotent=False, stream=False):
+        """Will do a request on OpenAM and renews the session when needed.
+
+        With reauthenticate, a request with the token of the current session is done again with a new session when
+        OpenAM responds with a 401, or before it is sent when the session is about to expire.
+
+        :param method: The http method.
+        :type method: str
+        :param uri: The uri for the request.
+        :type uri: str
+        :param data: The data that is send to the API.
+        :type data: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :param idempotent: The request can safely be done more than once.
+        :type idempotent: bool
+        :param stream: Don't read the body of the response yet, so it can be read in chunks.
+        :type stream: bool
+        :rtype: requests.Response
+        :return: The response of OpenAM.
+        """
+        if not self.reauthenticate or not headers or not headers.get(self.cookiename):
+            return self._retrying_request(method, uri, data=data, headers=headers, idempotent=idempotent, stream=stream)
+
+        context = self._context
+        token = headers[self.cookiename]
+        if token == context.token and context.expires is not None and context.expires <= time.time():
+            headers = self._renewed_headers(headers, token)
+
+        response = self._retrying_request(method, uri, data=data, headers=headers, idempotent=idempotent, stream=stream)
+        if response.status_code == 401:
+            token = headers[self.cookiename]
+            headers = self._renewed_headers(headers, token)
+            if headers[self.cookiename] != token:
+                response.close()
+                response = self._retrying_request(method, uri, data=data, headers=headers, idempotent=idempotent, stream=stream)
+        return response
+
+    def _renewed_headers(self, headers, token):
+        """Will login again when the token is still the token of the current session, only once for all threads.
+
+        :param headers: The http headers of the request.
+        :type headers: dict
+        :param token: The token that is expired.
+        :type token: str
+        :rtype: dict
+        :return: A copy of the headers with the token of the new session.
+        """
+        with self._auth_lock:
+            if self._context.token == token and self._credentials is not None:
+                self.authenticate(**self._credentials)
+
+        headers = dict(headers)
+        if self._context.token is not None:
+            headers[self.cookiename] = self._context.token
+        return headers
+
+    def _retrying_request(self, method, uri, data=None, headers=None, idempotent=False, stream=False):
+        """Will do a request on OpenAM, idempotent requests are retried according to the retry policy.
+
+        Requests are retried on connection errors, timeouts and the configured http status codes.
+
+        :param method: The http method.
+        :type method: str
+        :param uri: The uri for the request.
+        :type uri: str
+        :param data: The data that is send to the API.
+        :type data: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :param idempotent: The request can safely be done more than once.
+        :type idempotent: bool
+        :param stream: Don't read the body of the response yet, so it can be read in chunks.
+        :type stream: bool
+        :rtype: requests.Response
+        :return: The response of OpenAM.
+        """
+        retry = self.retry if idempotent else None
+        attempt = 0
+        while True:
+            try:
+                response = self._guarded_send(method, uri, data=data, headers=headers, attempt=attempt, stream=stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if retry is None or not retry.should_retry(attempt):
+                    raise
+                time.sleep(retry.wait_time(attempt))
+                attempt += 1
+                continue
+
+            if retry is None or not retry.should_retry(attempt, response):
+                return response
+            response.close()
+            time.sleep(retry.wait_time(attempt, response))
+            attempt += 1
+
+    def _guarded_send(self, method, uri, data=None, headers=None, attempt=0, stream=False):
+        """Will send the request when the circuit of the endpoint is not open.
+
+        Connection errors, timeouts and 5xx responses count as failure of the endpoint.
+
+        :param method: The http method.
+        :type method: str
+        :param uri: The uri for the request.
+        :type uri: str
+        :param data: The data that is send to the API.
+        :type data: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :param attempt: The number of earlier attempts of this request.
+        :type attempt: int
+        :param stream: Don't read the body of the response yet, so it can be read in chunks.
+        :type stream: bool
+        :rtype: requests.Response
+        :return: The response of OpenAM.
+        """
+        if self.circuit_breaker is None:
+            return self._limited_send(method, uri, data=data, headers=headers, attempt=attempt, stream=stream)
+
+        endpoint = method + ' ' + endpoint_template(uri)
+        self.circuit_breaker.before_request(endpoint)
+        try:
+            response = self._limited_send(method, uri, data=data, headers=headers, attempt=attempt, stream=stream)
+        except Exception:
+            self.circuit_breaker.failure(endpoint)
+            raise
+
+        if response.status_code >= 500:
+            self.circuit_breaker.failure(endpoint)
+        else:
+            self.circuit_breaker.success(endpoint)
+        return response
+
+    def _limited_send(self, method, uri, data=None, headers=None, attempt=0, stream=False):
+        """Will send the request when the rate limiter allows it, and waits until then.
+
+        :param method: The http method.
+        :type method: str
+        :param uri: The uri for the request.
+        :type uri: str
+        :param data: The data that is send to the API.
+        :type data: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :param attempt: The number of earlier attempts of this request.
+        :type attempt: int
+        :param stream: Don't read the body of the response yet, so it can be read in chunks.
+        :type stream: bool
+        :rtype: requests.Response
+        :return: The response of OpenAM.
+        """
+        if self.rate_limiter is None:
+            return self._observed_send(method, uri, data=data, headers=headers, attempt=attempt, stream=stream)
+
+        with self.rate_limiter.limit(method, uri):
+            return self._observed_send(method, uri, data=data, headers=headers, attempt=attempt, stream=stream)
+
+    def _observed_send(self, method, uri, data=None, headers=None, attempt=0, stream=False):
+        """Will send the request and notifies the observers.
+
+        :param method: The http method.
+        :type method: str
+        :param uri: The uri for the request.
+        :type uri: str
+        :param data: The data that is send to the API.
+        :type data: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :param attempt: The number of earlier attempts of this request.
+        :type attempt: int
+        :param stream: Don't read the body of the response yet, so it can be read in chunks.
+        :type stream: bool
+        :rtype: requests.Response
+        :return: The response of OpenAM.
+        """
+        if not self.observers:
+            return self._recorded_send(method, uri, data=data, headers=headers, stream=stream)
+
+        start = time.time()
+        try:
+            response = self._recorded_send(method, uri, data=data, headers=headers, stream=stream)
+        except requests.exceptions.RequestException as e:
+            self._notify(method, uri, data, None, e, start, attempt=attempt)
+            raise
+        self._notify(method, uri, data, response, None, start, attempt=attempt, stream=stream)
+        return response
+
+    def _recorded_send(self, method, uri, data=None, headers=None, stream=False):
+        """Will send the request, or replay it, via the cassette when there is one.
+
+        :param method: The http method.
+        :type method: str
+        :param uri: The uri for the request.
+        :type uri: str
+        :param data: The data that is send to the API.
+        :type data: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :param stream: Don't read the body of the response yet, so it can be read in chunks.
+        :type stream: bool
+        :rtype: requests.Response
+        :return: The response of OpenAM.
+        """
+        if self.cassette is None:
+            return self._send(method, uri, data=data, headers=headers, stream=stream)
+
+        return self.cassette.play(method, uri, data=data, stream=stream,
+                                  send=lambda: self._send(method, uri, data=data, headers=headers, stream=stream))
+
+    def _send(self, method, uri, data=None, headers=None, stream=False):
+        """Will send the request to OpenAM via the session.
+
+        :param method: The http method.
+        :type method: str
+        :param uri: The uri for the request.
+        :type uri: str
+        :param data: The data that is send to the API.
+        :type data: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :param stream: Don't read the body of the response yet, so it can be read in chunks.
+        :type stream: bool
+        :rtype: requests.Response
+        :return: The response of OpenAM.
+        """
+        openam_path = self._openam_path(uri)
+        return self.session.request(method, openam_path, data=data, headers=headers, timeout=self.timeout, verify=self.verify,
+                                    stream=stream)
+
+    def _get(self, uri, headers=None, stream=False):
+        """Will do an 'GET' request to get information via the API.
+
+        :param uri: The uri you want to get.
+        :type uri: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :param stream: Don't read the body of the response yet, so it can be read in chunks.
+        :type stream: bool
+        :return: A dict with information that is retrieved from OpenAM
+        """
+        return self._request('GET', uri, headers=headers, idempotent=True, stream=stream)
+
+    def _post(self, uri, data=None, headers=None, idempotent=False):
+        """Post information via the API.
+
+        :param uri: The uri that is used for posting the data.
+        :type uri: str
+        :param data: The data that is posted to the API.
+        :type data: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :param idempotent: The post only reads information, so it can be retried.
+        :type idempotent: bool
+        :rtype: dict
+        :return: A dict with information that is retrieved from OpenAM
+        """
+        try:
+            data = self._request('POST', uri, data=data, headers=headers, idempotent=idempotent)
+        except requests.exceptions.RequestException as e:
+            data = {'error': e}
+        return data
+
+    def _put(self, uri, data=None, headers=None):
+        """Put information via the API.
+
+        :param uri: The uri that is used for putting the data.
+        :type uri: str
+        :param data: The data that is put to the API.
+        :type data: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :rtype: dict
+        :return: A dict with information that is retrieved from OpenAM
+        """
+        try:
+            data = self._request('PUT', uri, data=data, headers=headers)
+        except requests.exceptions.RequestException as e:
+            data = {'error': e}
+        return data
+
+    def _delete(self, uri, headers=None):
+        """Delete information via the API.
+
+        :param uri: The uri that is used for deleting the data.
+        :type uri: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :rtype: dict
+        :return: A dict with information that is retrieved from OpenAM
+        """
+        try:
+            data = self._request('DELETE', uri, headers=headers)
+        except requests.exceptions.RequestException as e:
+            data = {'error': e}
+        return data
+
     def authenticate(self, realm=None, username=None, password=None, login_params=None):
         """Will authenticate the configured user on OpenAM.
 
@@ -207,21 +802,39 @@ class Openam(object):
             raise ValueError("You will need to provide a password to login.")
 
         post_data = '{}'
-        self.realm = realm
-        cookiename = self.cookiename
-        login_headers = self.headers
-        login_headers['X-OpenAM-Username'] = username
-        login_headers['X-OpenAM-Password'] = password
+        login_headers = self._login_headers(username=username, password=password)
         uri = self._uri_realm_creator(realm=realm, uri="authenticate", arguments=login_params)
 
         data = self._post(uri=uri, data=post_data, headers=login_headers)
         if data.status_code == 200:
-            json_data = data.json()
-            self.headers[cookiename] = json_data['tokenId']
+            json_data = self._json(data)
+            self._context = _AuthContext(token=json_data['tokenId'], realm=realm)
+            if self.reauthenticate:
+                self._credentials = {'realm': realm, 'username': username, 'password': password, 'login_params': login_params}
+                self._set_expires(token=json_data['tokenId'], realm=realm)
             return json_data
         else:
             return False
 
+    def _set_expires(self, token=None, realm=None):
+        """Will set the time the session needs to be renewed, based on the maximum time of the session.
+
+        :param token: The token id.
+        :type token: str
+        :param realm: The name of the realm.
+        :type realm: str
+        """
+        uri = 'json/sessions/?_action=getMaxTime&tokenId=' + token
+        headers = self._context_headers(_AuthContext(token=token, realm=realm))
+        try:
+            data = self._retrying_request('POST', uri, data='{}', headers=headers, idempotent=True)
+        except requests.exceptions.RequestException:
+            return
+
+        if data.status_code == 200 and self._json(data).get('maxtime') is not None:
+            expires = time.time() + int(self._json(data)['maxtime']) - self.refresh_margin
+            self._context = _AuthContext(token=token, realm=realm, expires=expires)
+
     def logout(self):
         """Will logout the current user from OpenAM.
 
@@ -235,9 +848,15 @@ class Openam(object):
             True
         """
         post_data = '{}'
-        uri = self._uri_realm_creator(realm=self.realm, uri="sessions/?_action=logout")
-        data = self._post(uri=uri, data=post_data, headers=self.headers)
+        context = self._context
+        headers = self._context_headers(context)
+        self.invalidate_token(token=context.token)
+        uri = self._uri_realm_creator(realm=context.realm, uri="sessions/?_action=logout")
+        data = self._post(uri=uri, data=post_data, headers=headers)
         if data.status_code == 200:
+            if self._context is context:
+                self._context = _AuthContext(token=None, realm=None)
+                self._credentials = None
             return True
         else:
             return False
@@ -245,6 +864,9 @@ class Openam(object):
     def get_serverinfo(self, property=None):
         """Get all - or when provided with the property - server related information.
 
+        When the serverinfo cache is enabled (see `serverinfo_ttl`), the information is requested once and shared by
+        all instances that use the same OpenAM URL.
+
         :param property: The type of information needed. When none is provided, all available configuration is returned (*).
         :type property: str
         :rtype: dict
@@ -261,15 +883,40 @@ class Openam(object):
             property = '*'
 
         uri = 'json/serverinfo/' + property
+        if self.serverinfo_cache is not None:
+            content = self.serverinfo_cache.get((self.openam_url, property), lambda etag: self._fetch(uri, etag))
+            if content is None:
+                return False
+            return self.json_backend.loads(content)
+
         data = self._get(uri=uri, headers=self.headers)
         if data.status_code == 200:
-            return data.json()
+            return self._json(data)
         else:
             return False
 
+    def _fetch(self, uri, etag=None):
+        """Will do a conditional GET request, with the ETag in the `If-None-Match` header.
+
+        :param uri: The uri you want to get.
+        :type uri: str
+        :param etag: The ETag of the cached response, or None.
+        :type etag: str
+        :rtype: tuple
+        :return: The http status code, the content and the ETag of the response.
+        """
+        headers = self.headers
+        if etag is not None:
+            headers['If-None-Match'] = etag
+        data = self._get(uri=uri, headers=headers)
+        return data.status_code, data.content, data.headers.get('ETag')
+
     def token_validation(self, realm=None, token=None):
         """Validate if the session is active.
 
+        When the token cache is enabled (see `token_cache_size`), valid tokens are cached per realm for
+        `token_cache_ttl` seconds, or shorter when the session has less time left.
+
         :param realm: The name of the realm.
         :type realm: str
         :param token: The token id.
@@ -284,14 +931,57 @@ class Openam(object):
             {u'valid': True, u'realm': u'/', u'uid': u'amadmin'}
             >>> am.logout()
         """
+        if self.token_cache is not None:
+            cached = self.token_cache.get((realm, token))
+            if cached is not None:
+                return dict(cached)
+
         token_url = 'sessions/' + token + '?_action=validate'
         uri = self._uri_realm_creator(realm=realm, uri=token_url)
-        data = self._post(uri=uri, data='{}', headers=self.headers)
+        data = self._post(uri=uri, data='{}', headers=self.headers, idempotent=True)
         if data.status_code == 200:
-            return data.json()
+            json_data = self._json(data)
+            if self.token_cache is not None and json_data.get('valid'):
+                self._cache_token(realm=realm, token=token, validation=json_data)
+            return json_data
         else:
             return False
 
+    def _cache_token(self, realm=None, token=None, validation=None):
+        """Will cache the validation of the token in the realm, but not longer than the session has time left.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param token: The token id.
+        :type token: str
+        :param validation: The result of the token validation.
+        :type validation: dict
+        """
+        ttl = self.token_cache_ttl
+        time_left = self.session_information(action="getTimeLeft", token=token)
+        if time_left and time_left.get('timeleft') is not None:
+            ttl = min(ttl, int(time_left['timeleft']))
+
+        if ttl > 0:
+            with self._token_lock:
+                realms = self._token_realms.get(token, ())
+                if realm not in realms:
+                    self._token_realms.set(token, realms + (realm,), ttl=ttl)
+            self.token_cache.set((realm, token), dict(validation), ttl=ttl)
+
+    def invalidate_token(self, token=None):
+        """Will remove the token of all realms from the token cache, so the next validation is done by OpenAM.
+
+        :param token: The token id.
+        :type token: str
+        """
+        if self.token_cache is not None and token:
+            with self._token_lock:
+                realms = self._token_realms.get(token, ())
+                self._token_realms.delete(token)
+            for realm in realms:
+                self.token_cache.delete((realm, token))
+
     def session_information(self, action=None, token=None):
         """Will give information about the provided session.
 
@@ -315,9 +1005,9 @@ class Openam(object):
             raise ValueError("Please provide a token.")
 
         uri = 'json/sessions/?_action=' + action + '&tokenId=' + token
-        data = self._post(uri=uri, data='{}', headers=self.headers)
+        data = self._post(uri=uri, data='{}', headers=self.headers, idempotent=True)
         if data.status_code == 200:
-            return data.json()
+            return self._json(data)
         else:
             return False
 
@@ -357,7 +1047,7 @@ class Openam(object):
         type = self._type_validator(type=type)
         uri = self._uri_realm_creator(realm=realm, uri=type + '/?_action=create')
         data = self._post(uri=uri, data=user_data, headers=self.headers)
-        return data.json()
+        return self._json(data)
 
     def list_identities(self, realm=None, type="users", query=None):
         """List or search an identity. This can be one of the following types.
@@ -388,7 +1078,75 @@ class Openam(object):
         type = self._type_validator(type=type)
         uri = self._uri_realm_creator(realm=realm, uri=type + '/?_queryID=' + query)
         data = self._get(uri=uri, headers=self.headers)
-        return data.json()
+        return self._result_models(Identity, self._json(data))
+
+    def iter_identities(self, realm=None, type="users", query=None, page_size=100):
+        """Iterate over all identities found by the query, one page at a time. This can be one of the following types.
+
+        * users
+        * agents
+        * groups
+
+        Pages are requested with `_pageSize` and followed with the `pagedResultsCookie` (or `_pagedResultsOffset` when
+        OpenAM doesn't return a cookie), so only one page is kept in memory. The iteration stops when OpenAM reports
+        that there are no remaining results, or returns the previous page again because it ignores the paging.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param type: The type of identity you want to search.
+        :type type: str
+        :param query: Search pattern for finding the correct username/agentname/groupname.
+        :type query: str
+        :param page_size: The number of identities that is requested per page.
+        :type page_size: int
+        :rtype: generator
+        :return: The found identities.
+        :Example:
+            >>> import openam
+            >>> am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+            >>> auth_data = am.authenticate(username="amadmin", password="password_openam")
+            >>> for identity in am.iter_identities(page_size=500):
+            >>>     print(identity['username'])
+            amadmin
+            demo
+            >>> am.logout()
+        """
+        if page_size < 1:
+            raise ValueError("Please provide a page_size of at least 1.")
+
+        if query is None:
+            query = '*'
+
+        type = self._type_validator(type=type)
+        offset = 0
+        cookie = None
+        previous = None
+        while True:
+            arguments = '&_pageSize=' + str(page_size)
+            if cookie:
+                arguments += '&_pagedResultsCookie=' + quote(cookie, safe='')
+            else:
+                arguments += '&_pagedResultsOffset=' + str(offset)
+
+            uri = self._uri_realm_creator(realm=realm, uri=type + '/?_queryID=' + query, arguments=arguments)
+            data = self._get(uri=uri, headers=self.headers)
+            data.raise_for_status()
+            json_data = self._json(data)
+            result = json_data.get('result') or []
+            if result == previous:
+                break
+            for identity in result:
+                if self.response_models and isinstance(identity, dict):
+                    identity = Identity.from_dict(identity, json_backend=self.json_backend)
+                yield identity
+
+            cookie = json_data.get('pagedResultsCookie')
+            offset += len(result)
+            remaining = json_data.get('remainingPagedResults')
+            total = json_data.get('totalPagedResults') or -1
+            if not result or (not cookie and len(result) != page_size) or remaining == 0 or 0 <= total <= offset:
+                break
+            previous = result
 
     def get_identity(self, realm=None, type="users", username=None, fields=None):
         """Get an identity. This can be one of the following types.
@@ -397,6 +1155,9 @@ class Openam(object):
         * agents
         * groups
 
+        When the identity cache is enabled (see `identity_cache_size`), complete identities are cached. A request with
+        fields is answered from a cached complete identity, but is itself never cached.
+
         :param realm: The name of the realm.
         :type realm: str
         :param type: The type of identity you want to search.
@@ -419,16 +1180,102 @@ class Openam(object):
             raise ValueError("Please provide a username.")
 
         type = self._type_validator(type=type)
+        if self.identity_cache is not None:
+            content = self.identity_cache.get(self._identity_cache_key(realm=realm, type=type, username=username))
+            if content is not None:
+                if fields is None:
+                    return self._content_model(Identity, content)
+                identity = self.json_backend.loads(content)
+                projection = dict((field, identity[field]) for field in fields.split(',') if field in identity)
+                return Identity.from_dict(projection, json_backend=self.json_backend) if self.response_models else projection
+
         uri = self._uri_realm_creator(realm=realm, uri=type + '/' + username)
         if fields is not None:
             uri = uri + '?_fields=' + fields
 
-        data = self._get(uri=uri, headers=self.headers)
+        if self.identity_cache is None or fields is not None:
+            data = self._get(uri=uri, headers=self.headers)
+        else:
+            data = self._identity_fetch(uri=uri, key=self._identity_cache_key(realm=realm, type=type, username=username))
+
         if data.status_code == 200:
-            return data.json()
+            return self._model(Identity, data)
         else:
             return False
 
+    def _identity_fetch(self, uri=None, key=None):
+        """Will get the identity from OpenAM and cache it, unless it was invalidated while the request was in flight.
+
+        Every invalidation of a key with fetches in flight increases its generation. The response is only cached when
+        the generation is the same as when the fetch started, otherwise it may be older than the change that
+        invalidated the cache.
+
+        :param uri: The uri of the identity.
+        :type uri: str
+        :param key: The key of the identity in the identity cache.
+        :type key: str
+        :rtype: requests.Response
+        :return: The response of OpenAM.
+        """
+        with self._identity_lock:
+            fetch = self._identity_fetches.setdefault(key, [0, 0])
+            fetch[1] += 1
+            generation = fetch[0]
+
+        data = None
+        try:
+            data = self._get(uri=uri, headers=self.headers)
+            if data.status_code == 200 and self._identity_generation(fetch) == generation:
+                self.identity_cache.set(key, data.content, ttl=self.identity_cache_ttl)
+                # An invalidation between the check and the set would leave the old identity in the cache.
+                if self._identity_generation(fetch) != generation:
+                    self.identity_cache.delete(key)
+        finally:
+            with self._identity_lock:
+                fetch[1] -= 1
+                if fetch[1] == 0:
+                    del self._identity_fetches[key]
+        return data
+
+    def _identity_generation(self, fetch):
+        """Will return the generation of an identity cache key with fetches in flight."""
+        with self._identity_lock:
+            return fetch[0]
+
+    def _identity_cache_key(self, realm=None, type="users", username=None):
+        """Will create the key of an identity in the identity cache.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param type: The type of identity.
+        :type type: str
+        :param username: username/agentname/groupname.
+        :type username: str
+        :rtype: str
+        :return: The key.
+        """
+        return 'openam:identity:%s:%s:%s:%s' % (self.openam_url, (realm or '').strip('/'), type, username)
+
+    def invalidate_identity(self, realm=None, type="users", username=None):
+        """Will remove the identity from the identity cache, so the next `get_identity` is done by OpenAM.
+
+        The identity cache is invalidated by `update_identity`, `change_password` and `delete_identity` of this
+        instance, changes made in other ways need to be invalidated with this method.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param type: The type of identity.
+        :type type: str
+        :param username: username/agentname/groupname.
+        :type username: str
+        """
+        if self.identity_cache is not None and username:
+            key = self._identity_cache_key(realm=realm, type=self._type_validator(type=type), username=username)
+            with self._identity_lock:
+                if key in self._identity_fetches:
+                    self._identity_fetches[key][0] += 1
+            self.identity_cache.delete(key)
+
     def update_identity(self, realm=None, type="users", username=None, user_data=None):
         """Update an identity. This can be one of the following types.
 
@@ -465,7 +1312,8 @@ class Openam(object):
         type = self._type_validator(type=type)
         uri = self._uri_realm_creator(realm=realm, uri=type + '/' + username)
         data = self._put(uri=uri, data=user_data, headers=self.headers)
-        return data.json()
+        self.invalidate_identity(realm=realm, type=type, username=username)
+        return self._json(data)
 
     def delete_identity(self, realm=None, type="users", username=None):
         """Delete an identity. This can be one of the following types.
@@ -496,7 +1344,108 @@ class Openam(object):
         type = self._type_validator(type=type)
         uri = self._uri_realm_creator(realm=realm, uri=type + '/' + username)
         data = self._delete(uri=uri, headers=self.headers)
-        return data.json()
+        self.invalidate_identity(realm=realm, type=type, username=username)
+        return self._json(data)
+
+    def bulk_create_identities(self, identities=None, realm=None, type="users", concurrency=10):
+        """Create many identities at once, with at most `concurrency` requests in flight.
+
+        The identities are read from the iterable while creating and the results are yielded when they are available,
+        so neither are kept in memory.
+
+        :param identities: The user_data of every identity to create, like `create_identity` expects it.
+        :type identities: iterable
+        :param realm: The name of the realm.
+        :type realm: str
+        :param type: The type of identities you want to create.
+        :type type: str
+        :param concurrency: The maximum number of requests in flight.
+        :type concurrency: int
+        :rtype: generator
+        :return: A dict per identity with the keys 'item', 'status' ('created', 'conflict' or 'failed') and 'result'.
+        :Example:
+            >>> import openam
+            >>> am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+            >>> auth_data = am.authenticate(username="amadmin", password="password_openam")
+            >>> users = ({"username": "user%d" % i, "userpassword": "secret12"} for i in range(1000))
+            >>> for report in am.bulk_create_identities(identities=users, concurrency=20):
+            >>>     print(report['item']['username'], report['status'])
+            user1 created
+            user0 conflict
+            >>> am.logout()
+        """
+        if identities is None:
+            raise ValueError("Please provide the identities.")
+
+        type = self._type_validator(type=type)
+        uri = self._uri_realm_creator(realm=realm, uri=type + '/?_action=create')
+
+        def create(user_data):
+            data = self._post(uri=uri, data=self._to_string(data=user_data), headers=self.headers)
+            if isinstance(data, dict):
+                raise data['error']
+            return self._json(data)
+
+        return bulk(create, identities, 'created', concurrency)
+
+    def bulk_update_identities(self, identities=None, realm=None, type="users", concurrency=10):
+        """Update many identities at once, with at most `concurrency` requests in flight.
+
+        :param identities: The user_data of every identity to update. Every user_data needs a 'username' key.
+        :type identities: iterable
+        :param realm: The name of the realm.
+        :type realm: str
+        :param type: The type of identities you want to update.
+        :type type: str
+        :param concurrency: The maximum number of requests in flight.
+        :type concurrency: int
+        :rtype: generator
+        :return: A dict per identity with the keys 'item', 'status' ('updated', 'conflict' or 'failed') and 'result'.
+        """
+        if identities is None:
+            raise ValueError("Please provide the identities.")
+
+        type = self._type_validator(type=type)
+
+        def update(user_data):
+            username = user_data['username']
+            uri = self._uri_realm_creator(realm=realm, uri=type + '/' + username)
+            data = self._put(uri=uri, data=self._to_string(data=user_data), headers=self.headers)
+            self.invalidate_identity(realm=realm, type=type, username=username)
+            if isinstance(data, dict):
+                raise data['error']
+            return self._json(data)
+
+        return bulk(update, identities, 'updated', concurrency)
+
+    def bulk_delete_identities(self, usernames=None, realm=None, type="users", concurrency=10):
+        """Delete many identities at once, with at most `concurrency` requests in flight.
+
+        :param usernames: The username/agentname/groupname of every identity to delete.
+        :type usernames: iterable
+        :param realm: The name of the realm.
+        :type realm: str
+        :param type: The type of identities you want to delete.
+        :type type: str
+        :param concurrency: The maximum number of requests in flight.
+        :type concurrency: int
+        :rtype: generator
+        :return: A dict per identity with the keys 'item', 'status' ('deleted', 'conflict' or 'failed') and 'result'.
+        """
+        if usernames is None:
+            raise ValueError("Please provide the usernames.")
+
+        type = self._type_validator(type=type)
+
+        def delete(username):
+            uri = self._uri_realm_creator(realm=realm, uri=type + '/' + username)
+            data = self._delete(uri=uri, headers=self.headers)
+            self.invalidate_identity(realm=realm, type=type, username=username)
+            if isinstance(data, dict):
+                raise data['error']
+            return self._json(data)
+
+        return bulk(delete, usernames, 'deleted', concurrency)
 
     def change_password(self, username=None, user_data=None):
         """Change the password for the given user.
@@ -525,6 +1474,7 @@ class Openam(object):
         user_data = self._to_string(data=user_data)
         uri = 'json/users/' + username + '?_action=changePassword'
         data = self._post(uri=uri, data=user_data, headers=self.headers)
+        self.invalidate_identity(username=username)
         if data.status_code == 200:
             return True
         else:
@@ -552,7 +1502,7 @@ class Openam(object):
         realm_data = self._to_string(data=realm_data)
         uri = 'json/realms/?_action=create'
         data = self._post(uri=uri, data=realm_data, headers=self.headers)
-        return data.json()
+        return self._json(data)
 
     def get_realm(self, realm=None):
         """Get information of the given realm.
@@ -575,7 +1525,7 @@ class Openam(object):
         uri = 'json/realms/' + realm
         data = self._get(uri=uri, headers=self.headers)
         if data.status_code == 200:
-            return data.json()
+            return self._model(Realm, data)
         else:
             return False
 
@@ -597,7 +1547,7 @@ class Openam(object):
         uri = self._uri_realm_creator(realm=realm, uri='realms?_queryFilter=true')
         data = self._get(uri=uri, headers=self.headers)
         if data.status_code == 200:
-            return data.json()
+            return self._json(data)
         else:
             return False
 
@@ -627,7 +1577,7 @@ class Openam(object):
         realm_data = self._to_string(data=realm_data)
         uri = 'json/realms/' + realm
         data = self._put(uri=uri, data=realm_data, headers=self.headers)
-        return data.json()
+        return self._json(data)
 
     def delete_realm(self, realm=None):
         """Deleting a realm.
@@ -649,7 +1599,7 @@ class Openam(object):
 
         uri = 'json/realms/' + realm
         data = self._delete(uri=uri, headers=self.headers)
-        return data.json()
+        return self._json(data)
 
     def list_resourcetypes(self, realm=None, query=None):
         """Listing all resourcetypes that are available.
@@ -674,7 +1624,7 @@ class Openam(object):
         uri = self._uri_realm_creator(realm=realm, uri='resourcetypes?_queryFilter=' + query)
         data = self._get(uri=uri, headers=self.headers)
         if data.status_code == 200:
-            return data.json()
+            return self._result_models(ResourceType, self._json(data))
         else:
             return False
 
@@ -701,7 +1651,7 @@ class Openam(object):
         uri = self._uri_realm_creator(realm=realm, uri='resourcetypes/' + uuid)
         data = self._get(uri=uri, headers=self.headers)
         if data.status_code == 200:
-            return data.json()
+            return self._model(ResourceType, data)
         else:
             return False
 
@@ -740,7 +1690,7 @@ class Openam(object):
         resource_data = self._to_string(data=resource_data)
         uri = self._uri_realm_creator(realm=realm, uri='resourcetypes/?_action=create')
         data = self._post(uri=uri, data=resource_data, headers=self.headers)
-        return data.json()
+        return self._json(data)
 
     def update_resourcetype(self, realm=None, uuid=None, resource_data=None):
         """Updating a resourcetype.
@@ -782,7 +1732,7 @@ class Openam(object):
         resource_data = self._to_string(data=resource_data)
         uri = self._uri_realm_creator(realm=realm, uri='resourcetypes/' + uuid)
         data = self._put(uri=uri, data=resource_data, headers=self.headers)
-        return data.json()
+        return self._json(data)
 
     def delete_resourcetype(self, realm=None, uuid=None):
         """Deleting a resourcetype by providing a uuid.
@@ -806,21 +1756,80 @@ class Openam(object):
 
         uri = self._uri_realm_creator(realm=realm, uri='resourcetypes/' + uuid)
         data = self._delete(uri=uri, headers=self.headers)
-        return data.json()
+        return self._json(data)
 
-    def xacml_export_policies(self, realm=None, query=None):
-        """
+    def xacml_export_policies(self, realm=None, query=None, fileobj=None, chunk_size=65536):
+        """Export the policies of the realm as XACML PolicySet.
 
-        :param realm:
+        With a fileobj, the response is written to it in chunks, so the PolicySet is never completely in memory.
+
+        :param realm: The name of the realm.
+        :type realm: str
         :param query:
-        :return:
+        :param fileobj: A file-like object, opened in binary mode, the PolicySet is written to.
+        :type fileobj: file
+        :param chunk_size: The number of bytes that is read and written at once.
+        :type chunk_size: int
+        :rtype: str or int
+        :return: False when the export failed, otherwise the PolicySet, or the number of bytes written to fileobj.
+        :Example:
+            >>> import openam
+            >>> am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+            >>> auth_data = am.authenticate(username="amadmin", password="password_openam")
+            >>> with open('policies.xml', 'wb') as fileobj:
+            >>>     am.xacml_export_policies(fileobj=fileobj)
+            1048576
+            >>> am.logout()
         """
         uri = self._uri_realm_creator(realm=realm, endpoint="xacml", uri="policies")
-        data = self._get(uri=uri, headers=self.headers)
-        if data.status_code == 200:
-            return data.text
-        else:
-            return False
+        if fileobj is None:
+            data = self._get(uri=uri, headers=self.headers)
+            if data.status_code == 200:
+                return data.text
+            else:
+                return False
+
+        data = self._get(uri=uri, headers=self.headers, stream=True)
+        try:
+            if data.status_code != 200:
+                return False
+
+            written = 0
+            for chunk in data.iter_content(chunk_size=chunk_size):
+                fileobj.write(chunk)
+                written += len(chunk)
+            return written
+        finally:
+            data.close()
+
+    def iter_xacml_policies(self, realm=None):
+        """Iterate over the policies of the realm, one `<Policy>` element at a time.
+
+        The XACML PolicySet is parsed while it is received, every policy is removed from the tree after it is
+        yielded, so memory use does not depend on the number of policies.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :rtype: generator
+        :return: The policies as `xml.etree.ElementTree.Element`.
+        :Example:
+            >>> import openam
+            >>> am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+            >>> auth_data = am.authenticate(username="amadmin", password="password_openam")
+            >>> for policy in am.iter_xacml_policies():
+            >>>     print(policy.get('PolicyId'))
+            myPolicy
+            >>> am.logout()
+        """
+        uri = self._uri_realm_creator(realm=realm, endpoint="xacml", uri="policies")
+        data = self._get(uri=uri, headers=self.headers, stream=True)
+        try:
+            data.raise_for_status()
+            data.raw.decode_content = True
+            for policy in _iter_policies(data.raw):
+                yield policy
+        finally:
+            data.close()
 
     def xacml_import_policy(self, realm=None, policy_data=None, dryrun=None):
         """
@@ -830,15 +1839,90 @@ class Openam(object):
         :param dryrun:
         :return:
         """
-        headers = {}
-        cookiename = self.cookiename
+        headers = self.headers
         headers['Content-Type'] = 'application/xml'
-        headers[cookiename] = self.headers[cookiename]
         uri = self._uri_realm_creator(realm=realm, endpoint="xacml", uri="policies")
 
         if dryrun:
             uri += '?dryrun=true'
 
         data = self._post(uri=uri, data=policy_data, headers=headers)
-        return data.json()
+        return self._json(data)
+
+    def xacml_import_policies(self, realm=None, policies=None, dryrun=None, batch_size=100, concurrency=4):
+        """Import many XACML policies in batches, with at most `concurrency` batches in flight.
+
+        The policies are read while importing: a PolicySet file is parsed incrementally, so a PolicySet of any size can
+        be imported. Every batch is imported with its own request, so one failing batch doesn't fail the others.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param policies: A file-like object with a XACML PolicySet, or an iterable of <Policy> elements (as
+                         `xml.etree.ElementTree.Element` or XML string), like `iter_xacml_policies` yields them.
+        :type policies: file or iterable
+        :param dryrun: Only report what would be imported, per batch.
+        :type dryrun: bool
+        :param batch_size: The maximum number of policies per request.
+        :type batch_size: int
+        :param concurrency: The maximum number of requests in flight.
+        :type concurrency: int
+        :rtype: generator
+        :return: A dict per policy with the keys 'item' (the PolicyId), 'status' ('create' or 'update' as reported
+                 by OpenAM, or 'failed') and 'result'.
+        :Example:
+            >>> import openam
+            >>> am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+            >>> auth_data = am.authenticate(username="amadmin", password="password_openam")
+            >>> with open('policies.xml', 'rb') as fileobj:
+            >>>     for report in am.xacml_import_policies(policies=fileobj, batch_size=200):
+            >>>         print(report['item'], report['status'])
+            myPolicy create
+            >>> am.logout()
+        """
+        if policies is None:
+            raise ValueError("Please provide the policies.")
+
+        if batch_size < 1:
+            raise ValueError("Please provide a batch_size of at least 1.")
+
+        if hasattr(policies, 'read'):
+            policies = _iter_policies(policies)
+
+        def policy_set(batch):
+            root = ElementTree.Element('{%s}PolicySet' % _XACML_NAMESPACE,
+                                       PolicySetId='python-openam',
+                                       PolicyCombiningAlgId='urn:oasis:names:tc:xacml:3.0:policy-combining-algorithm:'
+                                                            'deny-unless-permit',
+                                       Version='1.0')
+            names = []
+            for policy in batch:
+                if not ElementTree.iselement(policy):
+                    policy = ElementTree.fromstring(policy)
+                root.append(policy)
+                names.append(policy.get('PolicyId'))
+            return names, ElementTree.tostring(root, encoding='UTF-8')
+
+        headers = self.headers
+        headers['Content-Type'] = 'application/xml'
+        uri = self._uri_realm_creator(realm=realm, endpoint="xacml", uri="policies")
+        if dryrun:
+            uri += '?dryrun=true'
 
+        def import_batch(batch):
+            data = self._post(uri=uri, data=batch[1], headers=headers)
+            if isinstance(data, dict):
+                raise data['error']
+            return self._json(data)
+
+        batches = (policy_set(batch) for batch in _batches(policies, batch_size))
+        for (names, _), result, error in imap_unordered(import_batch, batches, concurrency=concurrency):
+            if error is not None or not isinstance(result, list):
+                for name in names:
+                    yield {'item': name, 'status': 'failed', 'result': error if error is not None else result}
+                continue
+
+            reports = dict((report.get('name'), report) for report in result if isinstance(report, dict))
+            for name in names:
+                report = reports.get(name)
+                status = str(report.get('status', 'failed')).lower() if report is not None else 'failed'
+                yield {'item': name, 'status': status, 'result': report}
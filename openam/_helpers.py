@@ -0,0 +1,102 @@
+"""Internal helpers that are shared by the modules of python-openam, they are not part of the public API."""
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+STOP = object()
+"""Task that stops a worker thread."""
+
+
+def imap_unordered(function, iterable, concurrency=10):
+    """Will call the function for every item of the iterable in a pool of worker threads.
+
+    Items are read from the iterable only when a worker is available, so never more than `concurrency` items are in
+    flight and the iterable can be a generator of any length.
+
+    :param function: The function that is called with one item.
+    :type function: callable
+    :param iterable: The items.
+    :type iterable: iterable
+    :param concurrency: The number of worker threads.
+    :type concurrency: int
+    :rtype: generator
+    :return: Tuples with the item, the result and the exception (or None), in order of completion.
+    """
+    if concurrency < 1:
+        raise ValueError("Please provide a concurrency of at least 1.")
+
+    tasks = queue.Queue()
+    results = queue.Queue()
+
+    def worker():
+        while True:
+            item = tasks.get()
+            if item is STOP:
+                return
+            try:
+                results.put((item, function(item), None))
+            except Exception as e:
+                results.put((item, None, e))
+
+    workers = []
+    in_flight = 0
+    try:
+        for item in iterable:
+            if len(workers) < concurrency:
+                thread = threading.Thread(target=worker)
+                thread.daemon = True
+                thread.start()
+                workers.append(thread)
+            tasks.put(item)
+            in_flight += 1
+            if in_flight >= concurrency:
+                yield results.get()
+                in_flight -= 1
+        while in_flight:
+            yield results.get()
+            in_flight -= 1
+    finally:
+        for _ in workers:
+            tasks.put(STOP)
+
+
+def bulk(function, items, success, concurrency=10):
+    """Will call the function for every item with bounded concurrency and reports the outcome per item.
+
+    :param function: The function that is called with one item and returns the json of OpenAM. An exception it
+                     raises is reported as the result of a failed item.
+    :type function: callable
+    :param items: The items.
+    :type items: iterable
+    :param success: The status that is reported when OpenAM did not return an error.
+    :type success: str
+    :param concurrency: The maximum number of requests in flight.
+    :type concurrency: int
+    :rtype: generator
+    :return: A dict per item with the keys 'item', 'status' ('<success>', 'conflict' or 'failed') and 'result'.
+    """
+    for item, result, error in imap_unordered(function, items, concurrency=concurrency):
+        if error is not None:
+            yield {'item': item, 'status': 'failed', 'result': error}
+        elif isinstance(result, dict) and 'code' in result:
+            status = 'conflict' if result['code'] == 409 else 'failed'
+            yield {'item': item, 'status': status, 'result': result}
+        else:
+            yield {'item': item, 'status': success, 'result': result}
+
+
+# Attributes of resourcetypes that are set by OpenAM when it is created or changed.
+RESOURCETYPE_METADATA = frozenset(['createdBy', 'creationDate', 'lastModifiedBy', 'lastModifiedDate'])
+
+
+def realm_argument(path):
+    """Will convert a realm path like '/myRealm' to the realm argument of the Openam methods, None for the root."""
+    return path.strip('/') or None
+
+
+def plain(item):
+    """Will return a response model as dict, and a dict as it is."""
+    return item.to_dict() if hasattr(item, 'to_dict') else item
@@ -0,0 +1,687 @@
+"""Asyncio interface for the OpenAM Rest API.
+
+Needs Python 3.5 or newer and the aiohttp package (``pip install python-openam[async]``).
+"""
+import asyncio
+
+import aiohttp
+
+from openam import _AuthContext, _OpenamBase
+from openam.models import Identity, Realm, ResourceType
+
+# Seconds between the checks for a free request slot of a rate limiter.
+_SLOT_POLL_INTERVAL = 0.005
+
+
+class _Response(object):
+    """A read response of OpenAM, so it can be used after the connection is given back to the pool."""
+
+    def __init__(self, status_code, content, headers):
+        """Will store the status code, the body and the headers of the response."""
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+    @property
+    def text(self):
+        """The body of the response as text."""
+        return self.content.decode('utf-8')
+
+
+class AsyncOpenam(_OpenamBase):
+    """OpenAM Rest Interface for asyncio.
+
+    Has the same methods as :class:`openam.Openam`, but every public method is a coroutine.
+    """
+
+    def __init__(self, openam_url='', resource=1.0, protocol=1.0, timeout=10, cookiename="iplanetDirectoryPro", verify=True,
+                 pool_maxsize=100, pool_maxsize_per_host=0, rate_limiter=None,
+                 json_backend=None, response_models=False):
+        """Will initialize the openam module.
+
+        The aiohttp session is created on the first request, so the instance can be created outside of the event loop.
+
+        :param openam_url: The complete URL to the OpenAM server.
+        :type openam_url: str
+        :param resource: The username to login.
+        :type resource: str
+        :param protocol: The password for the user configured in username.
+        :type protocol: str
+        :param timeout: HTTP requests timeout in seconds.
+        :type timeout: int
+        :param cookiename: The name of the cookie.
+        :type cookiename: str
+        :param verify: Allow OpenAM server using a self-signed certificate.
+        :type verify: bool
+        :param pool_maxsize: The maximum number of simultaneous connections. 0 means no limit.
+        :type pool_maxsize: int
+        :param pool_maxsize_per_host: The maximum number of simultaneous connections to one host. 0 means no limit.
+        :type pool_maxsize_per_host: int
+        :param rate_limiter: Limit the number of requests per second and in flight. None disables the limits. The rate
+                             limiter can be shared with :class:`openam.Openam` instances in other threads.
+        :type rate_limiter: openam.throttle.RateLimiter
+        :param json_backend: The JSON library for request bodies and responses: 'json' (the default), 'orjson',
+                             'ujson' or 'auto' for the fastest installed one.
+        :type json_backend: str
+        :param response_models: Return identities, realms and resourcetypes as :mod:`openam.models`, which use a
+                                fraction of the memory of dicts.
+        :type response_models: bool
+        """
+        super(AsyncOpenam, self).__init__(openam_url=openam_url, resource=resource, protocol=protocol, timeout=timeout,
+                                          cookiename=cookiename, verify=verify, json_backend=json_backend,
+                                          response_models=response_models)
+        self.pool_maxsize = pool_maxsize
+        self.pool_maxsize_per_host = pool_maxsize_per_host
+        self.session = None
+        self.rate_limiter = rate_limiter
+
+    async def __aenter__(self):
+        """Will return the instance itself when used as a context manager."""
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """Will close the session when leaving the context manager."""
+        await self.close()
+
+    async def close(self):
+        """Will close the http session and release all pooled connections."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _get_session(self):
+        """Will return the aiohttp session, creates it when there is none.
+
+        :rtype: aiohttp.ClientSession
+        :return: The session that is used for all requests.
+        """
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize, limit_per_host=self.pool_maxsize_per_host)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self.session
+
+    async def _request(self, method, uri, data=None, headers=None):
+        """Will do a request when the rate limiter allows it, and reads the complete response.
+
+        :param method: The http method.
+        :type method: str
+        :param uri: The uri for the request.
+        :type uri: str
+        :param data: The data that is send to the API.
+        :type data: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :rtype: _Response
+        :return: The response of OpenAM.
+        """
+        if self.rate_limiter is None:
+            return await self._send(method, uri, data=data, headers=headers)
+
+        acquired = []
+        try:
+            for throttle in self.rate_limiter.throttles(method, uri):
+                while not throttle.try_enter():
+                    await asyncio.sleep(_SLOT_POLL_INTERVAL)
+                acquired.append(throttle)
+                wait = throttle.reserve()
+                if wait:
+                    await asyncio.sleep(wait)
+            return await self._send(method, uri, data=data, headers=headers)
+        finally:
+            for throttle in reversed(acquired):
+                throttle.release()
+
+    async def _send(self, method, uri, data=None, headers=None):
+        """Will send the request to OpenAM via the session and reads the complete response.
+
+        :param method: The http method.
+        :type method: str
+        :param uri: The uri for the request.
+        :type uri: str
+        :param data: The data that is send to the API.
+        :type data: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :rtype: _Response
+        :return: The response of OpenAM.
+        """
+        session = self._get_session()
+        if headers is not None:
+            headers = dict((key, value) for key, value in headers.items() if value is not None)
+        ssl = None if self.verify else False
+        async with session.request(method, self._openam_path(uri), data=data, headers=headers, ssl=ssl) as response:
+            content = await response.read()
+            return _Response(response.status, content, response.headers)
+
+    async def _get(self, uri, headers=None):
+        """Will do an 'GET' request to get information via the API.
+
+        :param uri: The uri you want to get.
+        :type uri: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :return: A response with information that is retrieved from OpenAM
+        """
+        return await self._request('GET', uri, headers=headers)
+
+    async def _post(self, uri, data=None, headers=None):
+        """Post information via the API.
+
+        :param uri: The uri that is used for posting the data.
+        :type uri: str
+        :param data: The data that is posted to the API.
+        :type data: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :return: A response with information that is retrieved from OpenAM
+        """
+        try:
+            data = await self._request('POST', uri, data=data, headers=headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            data = {'error': e}
+        return data
+
+    async def _put(self, uri, data=None, headers=None):
+        """Put information via the API.
+
+        :param uri: The uri that is used for putting the data.
+        :type uri: str
+        :param data: The data that is put to the API.
+        :type data: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :return: A response with information that is retrieved from OpenAM
+        """
+        try:
+            data = await self._request('PUT', uri, data=data, headers=headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            data = {'error': e}
+        return data
+
+    async def _delete(self, uri, headers=None):
+        """Delete information via the API.
+
+        :param uri: The uri that is used for deleting the data.
+        :type uri: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :return: A response with information that is retrieved from OpenAM
+        """
+        try:
+            data = await self._request('DELETE', uri, headers=headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            data = {'error': e}
+        return data
+
+    async def authenticate(self, realm=None, username=None, password=None, login_params=None):
+        """Will authenticate the configured user on OpenAM.
+
+        :param realm: The name of the realm on which the user needs to auhtenticate on. (Optional, when realms are used.)
+        :type realm: str
+        :param username: The username which is used to authenticate against OpenAM.
+        :type username: str
+        :param password: The password for the user configured on 'username'
+        :type password: str
+        :param login_params: Extra arguments that are appended to the authenticate uri.
+        :type login_params: str
+        :rtype: dict
+        :return: A dict with the keys 'succesUrl' and 'tokenId'.
+        :Example:
+            >>> import openam.aio
+            >>> async with openam.aio.AsyncOpenam(openam_url="http://openam.example.com:8080/openam/") as am:
+            >>>     await am.authenticate(username="amadmin", password="password_openam")
+            {u'successUrl': u'/openam/console', u'tokenId': u'AQIC5wM2LY4SfcxpamATDDJ7bGltWGY0fjfPO12mGFymFk8.*AAJTSQA.. '}
+            >>>     await am.logout()
+        """
+        if not username:
+            raise ValueError("You will need to provide a username to login.")
+
+        if not password:
+            raise ValueError("You will need to provide a password to login.")
+
+        post_data = '{}'
+        login_headers = self._login_headers(username=username, password=password)
+        uri = self._uri_realm_creator(realm=realm, uri="authenticate", arguments=login_params)
+
+        data = await self._post(uri=uri, data=post_data, headers=login_headers)
+        if data.status_code == 200:
+            json_data = self._json(data)
+            self._context = _AuthContext(token=json_data['tokenId'], realm=realm)
+            return json_data
+        else:
+            return False
+
+    async def logout(self):
+        """Will logout the current user from OpenAM.
+
+        :rtype: bool
+        :return: True if logout was successful, False when won't.
+        """
+        post_data = '{}'
+        context = self._context
+        headers = self._context_headers(context)
+        uri = self._uri_realm_creator(realm=context.realm, uri="sessions/?_action=logout")
+        data = await self._post(uri=uri, data=post_data, headers=headers)
+        if data.status_code == 200:
+            if self._context is context:
+                self._context = _AuthContext(token=None, realm=None)
+            return True
+        else:
+            return False
+
+    async def get_serverinfo(self, property=None):
+        """Get all - or when provided with the property - server related information.
+
+        :param property: The type of information needed. When none is provided, all available configuration is returned (*).
+        :type property: str
+        :rtype: dict
+        :return: Server specific information from OpenAM.
+        """
+        if property is None:
+            property = '*'
+
+        uri = 'json/serverinfo/' + property
+        data = await self._get(uri=uri, headers=self.headers)
+        if data.status_code == 200:
+            return self._json(data)
+        else:
+            return False
+
+    async def token_validation(self, realm=None, token=None):
+        """Validate if the session is active.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param token: The token id.
+        :type token: str
+        :rtype: dict
+        :return: Information if token is active or not.
+        """
+        token_url = 'sessions/' + token + '?_action=validate'
+        uri = self._uri_realm_creator(realm=realm, uri=token_url)
+        data = await self._post(uri=uri, data='{}', headers=self.headers)
+        if data.status_code == 200:
+            return self._json(data)
+        else:
+            return False
+
+    async def session_information(self, action=None, token=None):
+        """Will give information about the provided session.
+
+        :param action:
+        :type action: str
+        :param token: The token id.
+        :type token: str
+        :rtype: dict
+        :return: Information about the session.
+        """
+        if not action:
+            raise ValueError("Please provide a correct action you want to take.")
+        if not token:
+            raise ValueError("Please provide a token.")
+
+        uri = 'json/sessions/?_action=' + action + '&tokenId=' + token
+        data = await self._post(uri=uri, data='{}', headers=self.headers)
+        if data.status_code == 200:
+            return self._json(data)
+        else:
+            return False
+
+    async def create_identity(self, realm=None, type="users", user_data=None):
+        """Create an identity. This can be one of the following types: users, agents or groups.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param type: The type of identity you want to create.
+        :type type: str
+        :param user_data: All necessary information needed to create an identity.
+        :type user_data: dict
+        :rtype: json
+        :return: All information regarding the created identity.
+        """
+        if not user_data:
+            raise ValueError("Please provide correct user information.")
+
+        user_data = self._to_string(data=user_data)
+        type = self._type_validator(type=type)
+        uri = self._uri_realm_creator(realm=realm, uri=type + '/?_action=create')
+        data = await self._post(uri=uri, data=user_data, headers=self.headers)
+        return self._json(data)
+
+    async def list_identities(self, realm=None, type="users", query=None):
+        """List or search an identity. This can be one of the following types: users, agents or groups.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param type: The type of identity you want to search.
+        :type type: str
+        :param query: Search pattern for finding the correct username/agentname/groupname.
+        :type query: str
+        :rtype: json
+        :return: Information of the found identities.
+        """
+        if query is None:
+            query = '*'
+
+        type = self._type_validator(type=type)
+        uri = self._uri_realm_creator(realm=realm, uri=type + '/?_queryID=' + query)
+        data = await self._get(uri=uri, headers=self.headers)
+        return self._result_models(Identity, self._json(data))
+
+    async def get_identity(self, realm=None, type="users", username=None, fields=None):
+        """Get an identity. This can be one of the following types: users, agents or groups.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param type: The type of identity you want to search.
+        :type type: str
+        :param username: username/agentname/groupname to lookup.
+        :type username: str
+        :param fields: The fields you want to retrieve. When None is given, all information is returned.
+        :type fields: str
+        :rtype: json
+        :return: False when no user is found, otherwise information about the identity.
+        """
+        if not username:
+            raise ValueError("Please provide a username.")
+
+        type = self._type_validator(type=type)
+        uri = self._uri_realm_creator(realm=realm, uri=type + '/' + username)
+        if fields is not None:
+            uri = uri + '?_fields=' + fields
+
+        data = await self._get(uri=uri, headers=self.headers)
+        if data.status_code == 200:
+            return self._model(Identity, data)
+        else:
+            return False
+
+    async def update_identity(self, realm=None, type="users", username=None, user_data=None):
+        """Update an identity. This can be one of the following types: users, agents or groups.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param type: The type of identity you want to update.
+        :type type: str
+        :param username: The username/agentname/groupname that needs to be updated.
+        :type username: str
+        :param user_data: The information you want to update.
+        :type user_data: dict
+        :rtype: json
+        :return: All information regarding the updated identity.
+        """
+        if not username:
+            raise ValueError("Please provide a username.")
+
+        if not user_data:
+            raise ValueError("Please provide correct user information.")
+
+        user_data = self._to_string(data=user_data)
+        type = self._type_validator(type=type)
+        uri = self._uri_realm_creator(realm=realm, uri=type + '/' + username)
+        data = await self._put(uri=uri, data=user_data, headers=self.headers)
+        return self._json(data)
+
+    async def delete_identity(self, realm=None, type="users", username=None):
+        """Delete an identity. This can be one of the following types: users, agents or groups.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param type: The type of identity you want to delete.
+        :type type: str
+        :param username: The username/agentname/groupname that needs to be deleted.
+        :type username: str
+        :rtype: json
+        :return: Information if the deleting went successful.
+        """
+        if not username:
+            raise ValueError("Please provide a username.")
+
+        type = self._type_validator(type=type)
+        uri = self._uri_realm_creator(realm=realm, uri=type + '/' + username)
+        data = await self._delete(uri=uri, headers=self.headers)
+        return self._json(data)
+
+    async def change_password(self, username=None, user_data=None):
+        """Change the password for the given user.
+
+        :param username: The username of the identity.
+        :type username: str
+        :param user_data: The old and new password.
+        :type user_data: dict
+        :rtype: bool
+        :return: True when successful password change, otherwise a False.
+        """
+        if not username:
+            raise ValueError("Please provide a username.")
+
+        if not user_data:
+            raise ValueError("Please provide correct user information.")
+
+        user_data = self._to_string(data=user_data)
+        uri = 'json/users/' + username + '?_action=changePassword'
+        data = await self._post(uri=uri, data=user_data, headers=self.headers)
+        if data.status_code == 200:
+            return True
+        else:
+            return False
+
+    async def create_realm(self, realm_data=None):
+        """Creating a realm.
+
+        :param realm_data: Realm data that is needed for creating the realm.
+        :type realm_data: dict
+        :rtype: dict
+        :return: All information regarding the created realm.
+        """
+        if not realm_data:
+            raise ValueError("Please provide correct realm_data information.")
+
+        realm_data = self._to_string(data=realm_data)
+        uri = 'json/realms/?_action=create'
+        data = await self._post(uri=uri, data=realm_data, headers=self.headers)
+        return self._json(data)
+
+    async def get_realm(self, realm=None):
+        """Get information of the given realm.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :rtype: dict
+        :return: All information about the realm.
+        """
+        if not realm:
+            raise ValueError("Please provide correct realm name.")
+
+        uri = 'json/realms/' + realm
+        data = await self._get(uri=uri, headers=self.headers)
+        if data.status_code == 200:
+            return self._model(Realm, data)
+        else:
+            return False
+
+    async def list_realms(self, realm=None):
+        """Get information on all (sub) realms that are configured.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :rtype: dict
+        :return: Information with all realms.
+        """
+        uri = self._uri_realm_creator(realm=realm, uri='realms?_queryFilter=true')
+        data = await self._get(uri=uri, headers=self.headers)
+        if data.status_code == 200:
+            return self._json(data)
+        else:
+            return False
+
+    async def update_realm(self, realm=None, realm_data=None):
+        """Updating a realm.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param realm_data: Realm data that is needed for updating the realm.
+        :rtype: dict
+        :return: Information if the update is successful.
+        """
+        if not realm:
+            raise ValueError("Please provide a realm.")
+
+        if not realm_data:
+            raise ValueError("Please provide correct realm_data information.")
+
+        realm_data = self._to_string(data=realm_data)
+        uri = 'json/realms/' + realm
+        data = await self._put(uri=uri, data=realm_data, headers=self.headers)
+        return self._json(data)
+
+    async def delete_realm(self, realm=None):
+        """Deleting a realm.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :rtype: dict
+        :return: Information if delete is successful.
+        """
+        if not realm:
+            raise ValueError("Please provide a realm.")
+
+        uri = 'json/realms/' + realm
+        data = await self._delete(uri=uri, headers=self.headers)
+        return self._json(data)
+
+    async def list_resourcetypes(self, realm=None, query=None):
+        """Listing all resourcetypes that are available.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param query:
+        :type query: str
+        :rtype: dict
+        :return: Information about all resourcetypes.
+        """
+        if query is None:
+            query = str(True)
+
+        uri = self._uri_realm_creator(realm=realm, uri='resourcetypes?_queryFilter=' + query)
+        data = await self._get(uri=uri, headers=self.headers)
+        if data.status_code == 200:
+            return self._result_models(ResourceType, self._json(data))
+        else:
+            return False
+
+    async def get_resourcetype(self, realm=None, uuid=None):
+        """Get all information about a specific resourcetype.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param uuid: The unique uuid.
+        :type uuid: str
+        :rtype: dict
+        :return: All information about one resourcetype.
+        """
+        if not uuid:
+            raise ValueError("Please provide a uuid for a resourcetype.")
+
+        uri = self._uri_realm_creator(realm=realm, uri='resourcetypes/' + uuid)
+        data = await self._get(uri=uri, headers=self.headers)
+        if data.status_code == 200:
+            return self._model(ResourceType, data)
+        else:
+            return False
+
+    async def create_resourcetype(self, realm=None, resource_data=None):
+        """Creating a resouretype.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param resource_data: All information needed for creating the resourcetype.
+        :type resource_data: dict
+        :rtype: dict
+        :return: Information about the just created resourcetype.
+        """
+        if not resource_data:
+            raise ValueError("Please provide correct resource_data information.")
+
+        resource_data = self._to_string(data=resource_data)
+        uri = self._uri_realm_creator(realm=realm, uri='resourcetypes/?_action=create')
+        data = await self._post(uri=uri, data=resource_data, headers=self.headers)
+        return self._json(data)
+
+    async def update_resourcetype(self, realm=None, uuid=None, resource_data=None):
+        """Updating a resourcetype.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param uuid: The unique uuid.
+        :type uuid: str
+        :param resource_data: All information needed for updating the resourcetype.
+        :type resource_data: dict
+        :rtype: dict
+        :return: Information about the updated resourcetype.
+        """
+        if not uuid:
+            raise ValueError("Please provide a uuid for a resourcetype.")
+
+        if not resource_data:
+            raise ValueError("Please provide correct resource_data information.")
+
+        resource_data = self._to_string(data=resource_data)
+        uri = self._uri_realm_creator(realm=realm, uri='resourcetypes/' + uuid)
+        data = await self._put(uri=uri, data=resource_data, headers=self.headers)
+        return self._json(data)
+
+    async def delete_resourcetype(self, realm=None, uuid=None):
+        """Deleting a resourcetype by providing a uuid.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param uuid: The unique uuid.
+        :type uuid: str
+        :rtype: dict
+        :return: Not much.
+        """
+        if not uuid:
+            raise ValueError("Please provide a uuid for a resourcetype.")
+
+        uri = self._uri_realm_creator(realm=realm, uri='resourcetypes/' + uuid)
+        data = await self._delete(uri=uri, headers=self.headers)
+        return self._json(data)
+
+    async def xacml_export_policies(self, realm=None, query=None):
+        """Will export all policies in xacml format.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param query:
+        :rtype: str
+        :return: The xacml PolicySet.
+        """
+        uri = self._uri_realm_creator(realm=realm, endpoint="xacml", uri="policies")
+        data = await self._get(uri=uri, headers=self.headers)
+        if data.status_code == 200:
+            return data.text
+        else:
+            return False
+
+    async def xacml_import_policy(self, realm=None, policy_data=None, dryrun=None):
+        """Will import xacml policies.
+
+        :param realm: The name of the realm.
+        :type realm: str
+        :param policy_data: The xacml PolicySet.
+        :type policy_data: str
+        :param dryrun: Only show what would be imported.
+        :type dryrun: bool
+        :rtype: dict
+        :return: Information about the imported policies.
+        """
+        headers = self.headers
+        headers['Content-Type'] = 'application/xml'
+        uri = self._uri_realm_creator(realm=realm, endpoint="xacml", uri="policies")
+
+        if dryrun:
+            uri += '?dryrun=true'
+
+        data = await self._post(uri=uri, data=policy_data, headers=headers)
+        return self._json(data)
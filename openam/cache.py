@@ -0,0 +1,210 @@
+"""Caches that are used by python-openam."""
+import threading
+import time
+
+from collections import OrderedDict
+
+from openam.singleflight import SingleFlight
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class CacheBackend(object):
+    """The interface of a cache backend, like the in-memory :class:`LRUCache`.
+
+    A backend that is shared by multiple processes, like memcached or redis, can be used by implementing these methods.
+    Keys are strings and values are bytes, so they can be stored as they are.
+    """
+
+    def get(self, key, default=None):
+        """Will return the value of the key, when it is in the cache and not expired.
+
+        :param key: The key.
+        :param default: The value that is returned when the key is not in the cache.
+        :return: The cached value or the default.
+        """
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        """Will add the value to the cache.
+
+        :param key: The key.
+        :param value: The value.
+        :param ttl: The time to live in seconds, when None the default ttl of the cache is used.
+        :type ttl: float
+        """
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Will remove the key from the cache.
+
+        :param key: The key.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        """Will remove all entries from the cache."""
+        raise NotImplementedError
+
+
+class LRUCache(CacheBackend):
+    """Thread-safe in-memory cache with a maximum number of entries and a time to live per entry.
+
+    When the cache is full, the least recently used entry is removed.
+    """
+
+    def __init__(self, max_entries=1024, ttl=60):
+        """Will initialize the cache.
+
+        :param max_entries: The maximum number of entries in the cache.
+        :type max_entries: int
+        :param ttl: The default time to live of an entry in seconds.
+        :type ttl: float
+        """
+        if max_entries < 1:
+            raise ValueError("Please provide a max_entries of at least 1.")
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """The number of entries in the cache, including the expired entries that are not removed yet."""
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Will return the value of the key, when it is in the cache and not expired.
+
+        :param key: The key.
+        :param default: The value that is returned when the key is not in the cache.
+        :return: The cached value or the default.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+
+            expires, value = entry
+            if expires <= _clock():
+                del self._entries[key]
+                return default
+
+            self._entries[key] = self._entries.pop(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Will add the value to the cache.
+
+        :param key: The key.
+        :param value: The value.
+        :param ttl: The time to live in seconds, when None the default ttl of the cache is used.
+        :type ttl: float
+        """
+        if ttl is None:
+            ttl = self.ttl
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (_clock() + ttl, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Will remove the key from the cache.
+
+        :param key: The key.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Will remove all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+
+class ServerInfoCache(object):
+    """Thread-safe cache for the serverinfo of OpenAM servers, which can be shared by multiple instances.
+
+    Entries are fresh for `ttl` seconds. After that the serverinfo is requested again with the ETag of the cached
+    entry in the `If-None-Match` header, so OpenAM can respond with a `304 Not Modified` instead of the complete
+    serverinfo. Only one request per entry is done at the same time, the other threads wait for it.
+    """
+
+    def __init__(self, ttl=300):
+        """Will initialize the cache.
+
+        :param ttl: The number of seconds an entry is used without asking OpenAM.
+        :type ttl: float
+        """
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._single_flight = SingleFlight()
+
+    def get(self, key, fetch):
+        """Will return the cached content of the key, or fetches it when there is no fresh entry.
+
+        :param key: The key, like the OpenAM url and the property.
+        :type key: tuple
+        :param fetch: The function that requests the content. It is called with the ETag of the cached entry (or
+                      None) and returns a tuple with the http status code, the content and the ETag of the response.
+        :type fetch: callable
+        :rtype: bytes
+        :return: The content, or None when it could not be fetched.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > _clock():
+            return entry[2]
+        return self._single_flight.do(key, self._fetch, key, fetch)
+
+    def _fetch(self, key, fetch):
+        """Will fetch the content and updates the entry of the key."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > _clock():
+            return entry[2]
+
+        status_code, content, etag = fetch(entry[1] if entry is not None else None)
+        if status_code == 304 and entry is not None:
+            content, etag = entry[2], entry[1]
+        elif status_code != 200:
+            return None
+
+        with self._lock:
+            self._entries[key] = (_clock() + self.ttl, etag, content)
+        return content
+
+    def delete(self, key):
+        """Will remove the key from the cache.
+
+        :param key: The key.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Will remove all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+
+_shared_serverinfo_caches = {}
+_shared_lock = threading.Lock()
+
+
+def shared_serverinfo_cache(ttl=300):
+    """Will return the serverinfo cache that is shared by all instances with the same ttl.
+
+    :param ttl: The number of seconds an entry is used without asking OpenAM.
+    :type ttl: float
+    :rtype: ServerInfoCache
+    :return: The shared cache.
+    """
+    with _shared_lock:
+        cache = _shared_serverinfo_caches.get(ttl)
+        if cache is None:
+            cache = _shared_serverinfo_caches[ttl] = ServerInfoCache(ttl=ttl)
+        return cache
@@ -0,0 +1,222 @@
+"""Record and replay of the http traffic with OpenAM, for tests and benchmarks without a network."""
+import base64
+import datetime
+import gzip
+import io
+import os
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from urllib3.response import HTTPResponse
+
+from openam.jsonbackend import get_backend
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+RECORDED = 'recorded'
+"""Latency of a replayed request: the duration of the request when it was recorded."""
+
+# Response headers that are not recorded: they are specific for the connection or the session, or they describe the
+# encoding of the body, which is recorded decoded.
+_SKIPPED_HEADERS = frozenset(['connection', 'content-encoding', 'content-length', 'date', 'keep-alive', 'set-cookie',
+                              'transfer-encoding'])
+
+
+class CassetteError(requests.exceptions.RequestException):
+    """There is no recorded response for the request."""
+
+
+def _text(data):
+    """Will return the body of a request as str, so it can be compared and stored."""
+    if data is None:
+        return None
+    if isinstance(data, bytes):
+        return data.decode('utf-8')
+    return data
+
+
+class Cassette(object):
+    """Records the requests to OpenAM with their responses in a file, and replays them without OpenAM.
+
+    The file has one JSON object per line for every request, it is gzip compressed when the path ends with '.gz'.
+    Requests are matched on the http method, the uri (without the url of the server) and the body. Request headers
+    are never recorded, so passwords of `authenticate` are not stored, but the responses are stored as they are,
+    including the tokens of the recorded sessions.
+
+    Identical requests get their recorded responses in the recorded order. When they are all used, the last one is
+    returned again, so a recorded scenario can be replayed any number of times, like in a benchmark.
+
+    :Example:
+        >>> import openam
+        >>> from openam.cassette import Cassette, RECORD, REPLAY
+        >>> with openam.Openam(openam_url="http://openam.example.com:8080/openam/",
+        >>>                    cassette=Cassette('tests/cassettes/identity.ndjson.gz', mode=RECORD)) as am:
+        >>>     am.authenticate(username="amadmin", password="password_openam")
+        >>>     am.get_identity(username="demo")
+        >>> am = openam.Openam(openam_url="http://openam.example.com:8080/openam/",
+        >>>                    cassette=Cassette('tests/cassettes/identity.ndjson.gz', mode=REPLAY, latency=0.002))
+    """
+
+    def __init__(self, path, mode=REPLAY, latency=None, json_backend=None):
+        """Will initialize the cassette, in replay mode the recorded requests are read.
+
+        :param path: The file with the recorded requests.
+        :type path: str
+        :param mode: 'record' sends the requests to OpenAM and writes them to the file (which is overwritten),
+                     'replay' returns the recorded responses without sending anything.
+        :type mode: str
+        :param latency: The simulated duration of a replayed request: None for no delay, a number of seconds, or
+                        'recorded' for the duration when it was recorded.
+        :type latency: float or str
+        :param json_backend: The JSON library for the file, the standard library when None.
+        :type json_backend: str
+        """
+        if mode not in [RECORD, REPLAY]:
+            raise ValueError("Please provide a correct mode: 'record' or 'replay'.")
+        if latency is not None and latency != RECORDED and latency < 0:
+            raise ValueError("Please provide a latency of at least 0 seconds, or 'recorded'.")
+
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.json_backend = get_backend(json_backend)
+        self.interactions = {}
+        self._positions = {}
+        self._file = None
+        self._written = False
+        self._lock = threading.Lock()
+
+        if mode == REPLAY:
+            self._load()
+
+    def _open(self, mode):
+        """Will open the file, compressed when the path ends with '.gz'."""
+        if self.path.endswith('.gz'):
+            return gzip.open(self.path, mode)
+        return open(self.path, mode)
+
+    def _load(self):
+        """Will read the recorded requests, grouped per request."""
+        if not os.path.exists(self.path):
+            raise ValueError("Please provide an existing cassette: %s" % self.path)
+
+        with self._open('rb') as fileobj:
+            for line in fileobj:
+                if line.strip():
+                    interaction = self.json_backend.loads(line)
+                    key = (interaction['method'], interaction['uri'], interaction.get('body'))
+                    self.interactions.setdefault(key, []).append(interaction)
+
+    def __len__(self):
+        """Will return the number of recorded requests."""
+        return sum(len(interactions) for interactions in self.interactions.values())
+
+    def play(self, method, uri, data=None, stream=False, send=None):
+        """Will return the response of the request: recorded from `send` or replayed from the file.
+
+        :param method: The http method.
+        :type method: str
+        :param uri: The uri for the request.
+        :type uri: str
+        :param data: The data that is send to the API.
+        :type data: str
+        :param stream: The body of the response is read in chunks.
+        :type stream: bool
+        :param send: The function that sends the request to OpenAM, only used when recording.
+        :type send: callable
+        :rtype: requests.Response
+        :return: The response of OpenAM.
+        """
+        if self.mode == RECORD:
+            return self._record(method, uri, data, stream, send)
+        return self._replay(method, uri, data, stream)
+
+    def _record(self, method, uri, data, stream, send):
+        """Will send the request and write it with its response to the file."""
+        start = time.time()
+        response = send()
+        content = response.content
+        interaction = {
+            'method': method,
+            'uri': uri,
+            'body': _text(data),
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': dict((name, value) for name, value in response.headers.items()
+                            if name.lower() not in _SKIPPED_HEADERS),
+            'elapsed': round(time.time() - start, 6),
+        }
+        try:
+            interaction['content'] = content.decode('utf-8')
+        except UnicodeDecodeError:
+            interaction['content_base64'] = base64.b64encode(content).decode('ascii')
+
+        line = (self.json_backend.dumps(interaction) + '\n').encode('utf-8')
+        with self._lock:
+            if self._file is None:
+                self._file = self._open('ab' if self._written else 'wb')
+                self._written = True
+            self._file.write(line)
+            self._file.flush()
+            key = (method, uri, interaction['body'])
+            self.interactions.setdefault(key, []).append(interaction)
+
+        if stream:
+            return self._response(interaction, stream)
+        return response
+
+    def _replay(self, method, uri, data, stream):
+        """Will return the next recorded response of the request."""
+        key = (method, uri, _text(data))
+        with self._lock:
+            interactions = self.interactions.get(key)
+            if not interactions:
+                raise CassetteError("No recorded response for %s %s in %s" % (method, uri, self.path))
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            interaction = interactions[min(position, len(interactions) - 1)]
+
+        if self.latency == RECORDED:
+            time.sleep(interaction.get('elapsed') or 0)
+        elif self.latency:
+            time.sleep(self.latency)
+        return self._response(interaction, stream)
+
+    def _response(self, interaction, stream):
+        """Will create the response of a recorded request, like it is received from OpenAM."""
+        if 'content_base64' in interaction:
+            content = base64.b64decode(interaction['content_base64'])
+        else:
+            content = (interaction.get('content') or '').encode('utf-8')
+
+        headers = CaseInsensitiveDict(interaction.get('headers') or {})
+        headers['Content-Length'] = str(len(content))
+
+        response = requests.Response()
+        response.status_code = interaction['status']
+        response.reason = interaction.get('reason')
+        response.headers = headers
+        response.url = interaction['uri']
+        response.encoding = requests.utils.get_encoding_from_headers(headers)
+        response.elapsed = datetime.timedelta(seconds=interaction.get('elapsed') or 0)
+        response.raw = HTTPResponse(body=io.BytesIO(content), headers=dict(headers), status=response.status_code,
+                                    preload_content=False)
+        if not stream:
+            response._content = content
+            response._content_consumed = True
+        return response
+
+    def rewind(self):
+        """Will replay the recorded responses from the start again."""
+        with self._lock:
+            self._positions = {}
+
+    def close(self):
+        """Will close the file of a recording, a next request is appended to it."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
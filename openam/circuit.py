@@ -0,0 +1,105 @@
+"""Circuit breaker for the endpoints of OpenAM."""
+import threading
+import time
+
+import requests
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """The request is not done, because the circuit of the endpoint is open."""
+
+
+class _Circuit(object):
+    """The state of the circuit of one endpoint."""
+
+    def __init__(self):
+        """Will initialize the circuit as closed."""
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+
+
+class CircuitBreaker(object):
+    """Circuit breaker per endpoint.
+
+    After `failure_threshold` failures in a row (connection errors, timeouts or 5xx responses) the circuit of the
+    endpoint opens and requests fail immediately with a :class:`CircuitOpenError`. After `reset_timeout` seconds one
+    request is let through (half open): when it succeeds the circuit closes, otherwise it opens again.
+
+    :Example:
+        >>> import openam
+        >>> from openam.circuit import CircuitBreaker
+        >>> am = openam.Openam(openam_url="http://openam.example.com:8080/openam/",
+        >>>                    circuit_breaker=CircuitBreaker(failure_threshold=5, reset_timeout=30))
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        """Will initialize the circuit breaker.
+
+        :param failure_threshold: The number of failures in a row after which the circuit opens.
+        :type failure_threshold: int
+        :param reset_timeout: The number of seconds the circuit stays open.
+        :type reset_timeout: float
+        """
+        if failure_threshold < 1:
+            raise ValueError("Please provide a failure_threshold of at least 1.")
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def state(self, endpoint):
+        """Will return the state of the circuit of the endpoint: 'closed', 'open' or 'half_open'.
+
+        :param endpoint: The endpoint.
+        :type endpoint: str
+        :rtype: str
+        :return: The state.
+        """
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            return CLOSED if circuit is None else circuit.state
+
+    def before_request(self, endpoint):
+        """Will raise a CircuitOpenError when no request can be done on the endpoint.
+
+        :param endpoint: The endpoint.
+        :type endpoint: str
+        """
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if circuit is None or circuit.state == CLOSED:
+                return
+
+            if circuit.state == OPEN and circuit.opened_at + self.reset_timeout <= time.time():
+                circuit.state = HALF_OPEN
+                return
+
+            raise CircuitOpenError('The circuit of %s is %s.' % (endpoint, circuit.state.replace('_', ' ')))
+
+    def success(self, endpoint):
+        """Will close the circuit of the endpoint.
+
+        :param endpoint: The endpoint.
+        :type endpoint: str
+        """
+        with self._lock:
+            self._circuits.pop(endpoint, None)
+
+    def failure(self, endpoint):
+        """Will count the failure and opens the circuit when the threshold is reached or when it was half open.
+
+        :param endpoint: The endpoint.
+        :type endpoint: str
+        """
+        with self._lock:
+            circuit = self._circuits.setdefault(endpoint, _Circuit())
+            circuit.failures += 1
+            if circuit.state == HALF_OPEN or circuit.failures >= self.failure_threshold:
+                circuit.state = OPEN
+                circuit.opened_at = time.time()
@@ -0,0 +1,194 @@
+"""OpenAM Rest Interface for a site with multiple OpenAM servers."""
+import itertools
+import threading
+import time
+
+import requests
+from urllib3.exceptions import ConnectTimeoutError
+
+from openam import Openam
+
+ROUND_ROBIN = 'round_robin'
+LEAST_OUTSTANDING = 'least_outstanding'
+
+# Methods that don't change anything, so they can be done again after the server received the request.
+_SAFE_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+
+def _not_sent(error):
+    """Will return True when the connection error happened before the request was sent to the server.
+
+    The connection could not be made (refused, unknown host or a connect timeout). Other connection errors, like a
+    connection that is aborted while waiting for the response, can happen after the server received the request.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, ConnectTimeoutError)
+
+
+class _Node(object):
+    """One OpenAM server of the cluster."""
+
+    def __init__(self, openam_url):
+        """Will initialize the node as healthy and without outstanding requests."""
+        self.openam_url = openam_url
+        self.outstanding = 0
+        self.healthy = True
+        self.failed_at = None
+
+
+class OpenamCluster(Openam):
+    """OpenAM Rest Interface for a site with multiple OpenAM servers.
+
+    Requests are distributed over the servers. When a server can't be reached, the request is done on the next server
+    and the failing server is skipped until it is healthy again. Requests that change something are only done on the
+    next server when the connection failed before the request was sent. Sessions are shared via the CTS of the site, so the
+    token of `authenticate` can be used on every server.
+    """
+
+    def __init__(self, openam_urls=None, strategy=ROUND_ROBIN, retry_interval=30, health_check_interval=0, **kwargs):
+        """Will initialize the openam module.
+
+        :param openam_urls: The complete URLs to the OpenAM servers.
+        :type openam_urls: list
+        :param strategy: How requests are distributed: 'round_robin' or 'least_outstanding' (the server with the
+                         lowest number of requests in flight).
+        :type strategy: str
+        :param retry_interval: The number of seconds an unreachable server is skipped.
+        :type retry_interval: int
+        :param health_check_interval: When set, the servers are checked in a background thread every number of seconds.
+        :type health_check_interval: int
+        :param kwargs: All other arguments of :class:`openam.Openam`.
+        """
+        if not openam_urls:
+            raise ValueError('This interface needs a list of OpenAM URLs to work!')
+
+        if strategy not in [ROUND_ROBIN, LEAST_OUTSTANDING]:
+            raise ValueError("Please provide a correct strategy: 'round_robin' or 'least_outstanding'.")
+
+        kwargs.setdefault('pool_connections', len(openam_urls))
+        super(OpenamCluster, self).__init__(openam_url=openam_urls[0], **kwargs)
+        self.nodes = [_Node(openam_url) for openam_url in openam_urls]
+        self.strategy = strategy
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._stop_health_check = threading.Event()
+
+        if health_check_interval:
+            thread = threading.Thread(target=self._health_check_loop, args=(health_check_interval,))
+            thread.daemon = True
+            thread.start()
+
+    def close(self):
+        """Will stop the health checks and close the http session."""
+        self._stop_health_check.set()
+        super(OpenamCluster, self).close()
+
+    def _health_check_loop(self, interval):
+        """Will check the health of all servers every interval seconds, until the instance is closed."""
+        while not self._stop_health_check.wait(interval):
+            self.check_health()
+
+    def check_health(self):
+        """Will request the serverinfo of every server and marks the server healthy or not.
+
+        :rtype: dict
+        :return: The OpenAM url of every server with True when it is healthy.
+        :Example:
+            >>> from openam.cluster import OpenamCluster
+            >>> am = OpenamCluster(openam_urls=["http://openam1.example.com:8080/openam/", "http://openam2.example.com:8080/openam/"])
+            >>> am.check_health()
+            {'http://openam1.example.com:8080/openam/': True, 'http://openam2.example.com:8080/openam/': False}
+        """
+        health = {}
+        for node in self.nodes:
+            openam_path = self._openam_path('json/serverinfo/*', openam_url=node.openam_url)
+            try:
+                healthy = self.session.get(openam_path, timeout=self.timeout, verify=self.verify).status_code == 200
+            except requests.exceptions.RequestException:
+                healthy = False
+
+            with self._lock:
+                node.healthy = healthy
+                node.failed_at = None if healthy else time.time()
+            health[node.openam_url] = healthy
+        return health
+
+    def _candidates(self):
+        """Will return the servers that can be used, the healthy ones or the ones that failed long enough ago.
+
+        When no server is available, all servers are returned so a request is always tried.
+        """
+        now = time.time()
+        nodes = [node for node in self.nodes if node.healthy or node.failed_at + self.retry_interval <= now]
+        return nodes or list(self.nodes)
+
+    def _select_node(self, exclude):
+        """Will select the server for the next request according to the strategy.
+
+        :param exclude: The servers that already failed for this request.
+        :type exclude: list
+        :rtype: _Node
+        :return: The server, or None when all servers are tried.
+        """
+        with self._lock:
+            nodes = [node for node in self._candidates() if node not in exclude]
+            if not nodes:
+                return None
+
+            if self.strategy == LEAST_OUTSTANDING:
+                node = min(nodes, key=lambda node: node.outstanding)
+            else:
+                node = nodes[next(self._counter) % len(nodes)]
+            node.outstanding += 1
+            return node
+
+    def _send(self, method, uri, data=None, headers=None, stream=False):
+        """Will send the request to one of the servers, and on the next server when it can't be reached.
+
+        Only connection errors are retried on another server. A request that changes something (every method except
+        GET, HEAD and OPTIONS) is only retried when it was not sent, so it is never processed twice.
+
+        :param method: The http method.
+        :type method: str
+        :param uri: The uri for the request.
+        :type uri: str
+        :param data: The data that is send to the API.
+        :type data: str
+        :param headers: The http headers that are needed for the request.
+        :type headers: dict
+        :param stream: Don't read the body of the response yet, so it can be read in chunks.
+        :type stream: bool
+        :rtype: requests.Response
+        :return: The response of OpenAM.
+        """
+        tried = []
+        error = None
+        while True:
+            node = self._select_node(exclude=tried)
+            if node is None:
+                raise error
+
+            tried.append(node)
+            openam_path = self._openam_path(uri, openam_url=node.openam_url)
+            try:
+                response = self.session.request(method, openam_path, data=data, headers=headers, timeout=self.timeout,
+                                                verify=self.verify, stream=stream)
+            except requests.exceptions.ConnectionError as e:
+                error = e
+                with self._lock:
+                    node.healthy = False
+                    node.failed_at = time.time()
+                if method not in _SAFE_METHODS and not _not_sent(e):
+                    raise
+                continue
+            finally:
+                with self._lock:
+                    node.outstanding -= 1
+
+            with self._lock:
+                node.healthy = True
+                node.failed_at = None
+            return response
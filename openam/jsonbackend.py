@@ -0,0 +1,73 @@
+"""JSON backends for encoding the request bodies and decoding the responses of OpenAM."""
+import json
+
+from collections import namedtuple
+
+JsonBackend = namedtuple('JsonBackend', ['name', 'dumps', 'loads'])
+"""A JSON backend: `dumps` encodes data to a str, `loads` decodes a str or bytes."""
+
+STDLIB = 'json'
+ORJSON = 'orjson'
+UJSON = 'ujson'
+AUTO = 'auto'
+
+# The order in which 'auto' tries the backends, fastest first.
+_PREFERENCE = [ORJSON, UJSON, STDLIB]
+
+
+def _stdlib_loads(data):
+    """Will decode str or bytes with the json module of the standard library."""
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    return json.loads(data)
+
+
+def _orjson():
+    """Will create the backend for orjson, which encodes to bytes and decodes bytes without a copy."""
+    import orjson
+    return JsonBackend(name=ORJSON, dumps=lambda data: orjson.dumps(data).decode('utf-8'), loads=orjson.loads)
+
+
+def _ujson():
+    """Will create the backend for ujson."""
+    import ujson
+    return JsonBackend(name=UJSON, dumps=ujson.dumps, loads=ujson.loads)
+
+
+def _stdlib():
+    """Will create the backend for the json module of the standard library."""
+    return JsonBackend(name=STDLIB, dumps=json.dumps, loads=_stdlib_loads)
+
+
+_FACTORIES = {STDLIB: _stdlib, ORJSON: _orjson, UJSON: _ujson}
+
+
+def get_backend(backend=None):
+    """Will return the JSON backend.
+
+    :param backend: 'json' (the default), 'orjson', 'ujson', 'auto' for the fastest installed backend, or a
+                    `JsonBackend`.
+    :type backend: str or JsonBackend
+    :rtype: JsonBackend
+    :return: The JSON backend.
+    :Example:
+        >>> from openam.jsonbackend import get_backend
+        >>> get_backend('auto').name
+        'orjson'
+    """
+    if backend is None:
+        backend = STDLIB
+
+    if isinstance(backend, JsonBackend):
+        return backend
+
+    if backend == AUTO:
+        for name in _PREFERENCE:
+            try:
+                return _FACTORIES[name]()
+            except ImportError:
+                continue
+
+    if backend not in _FACTORIES:
+        raise ValueError("Please provide a correct JSON backend: 'json', 'orjson', 'ujson' or 'auto'.")
+    return _FACTORIES[backend]()
@@ -0,0 +1,158 @@
+"""Instrumentation of the requests that python-openam does on OpenAM.
+
+Every observer that is added to an :class:`openam.Openam` instance is called with a :class:`RequestEvent` after each
+request. :class:`PrometheusCollector` is an observer that keeps counters and latency histograms per operation.
+"""
+import threading
+
+from collections import namedtuple
+
+RESOURCES = ['authenticate', 'sessions', 'users', 'groups', 'agents', 'realms', 'resourcetypes', 'serverinfo', 'policies']
+
+
+class RequestEvent(namedtuple('RequestEvent', ['method', 'endpoint', 'status_code', 'bytes_sent', 'bytes_received',
+                                               'duration', 'server_time', 'retries', 'error'])):
+    """A request that is done on OpenAM.
+
+    * method: The http method.
+    * endpoint: The uri as template, like 'json/{realm}/users/{id}'.
+    * status_code: The http status code, or None when no response was received.
+    * bytes_sent: The size of the request body.
+    * bytes_received: The size of the response body.
+    * duration: The total time of the request in seconds.
+    * server_time: The time between sending the request and receiving the response headers in seconds.
+    * retries: The number of retries that were done by the connection pool.
+    * error: The exception when no response was received, otherwise None.
+    """
+
+    __slots__ = ()
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def endpoint_template(uri):
+    """Will replace the realm and the ids in the uri with placeholders, so requests can be grouped per operation.
+
+    :param uri: The uri after the OpenAM url.
+    :type uri: str
+    :rtype: str
+    :return: The uri as template, like 'json/{realm}/users/{id}?_action=create'.
+    :Example:
+        >>> endpoint_template('json/myRealm/users/demo?_fields=mail')
+        'json/{realm}/users/{id}'
+        >>> endpoint_template('json/sessions/AQIC5w?_action=validate')
+        'json/sessions/{id}?_action=validate'
+    """
+    path, _, query = uri.partition('?')
+    parts = [part for part in path.split('/') if part]
+    if not parts:
+        return uri
+
+    index = next((number for number, part in enumerate(parts) if part in RESOURCES), None)
+    if index is None:
+        return parts[0] + '/{path}'
+
+    template = [parts[0]]
+    if index > 1:
+        template.append('{realm}')
+    template.append(parts[index])
+    if index + 1 < len(parts):
+        template.append('{id}')
+    template = '/'.join(template)
+
+    for argument in query.split('&'):
+        if argument.startswith('_action='):
+            template += '?' + argument
+    return template
+
+
+class PrometheusCollector(object):
+    """Observer that counts the requests and keeps a latency histogram per method, endpoint and status code.
+
+    The collected metrics are available in the Prometheus text format via `render()`.
+
+    :Example:
+        >>> import openam
+        >>> from openam.metrics import PrometheusCollector
+        >>> collector = PrometheusCollector()
+        >>> am = openam.Openam(openam_url="http://openam.example.com:8080/openam/", observers=[collector])
+        >>> am.get_serverinfo()
+        >>> print(collector.render())
+        # TYPE openam_requests_total counter
+        openam_requests_total{method="GET",endpoint="json/serverinfo/{id}",status="200"} 1
+        ...
+    """
+
+    def __init__(self, prefix='openam', buckets=DEFAULT_BUCKETS):
+        """Will initialize the collector.
+
+        :param prefix: The prefix of the metric names.
+        :type prefix: str
+        :param buckets: The upper bounds of the latency histogram buckets in seconds.
+        :type buckets: tuple
+        """
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._bytes_sent = {}
+        self._bytes_received = {}
+        self._retries = {}
+        self._histograms = {}
+
+    def __call__(self, event):
+        """Will add the request event to the metrics.
+
+        :param event: The request that is done.
+        :type event: RequestEvent
+        """
+        status = 'error' if event.status_code is None else str(event.status_code)
+        labels = (event.method, event.endpoint, status)
+        operation = (event.method, event.endpoint)
+        with self._lock:
+            self._requests[labels] = self._requests.get(labels, 0) + 1
+            self._bytes_sent[operation] = self._bytes_sent.get(operation, 0) + event.bytes_sent
+            self._bytes_received[operation] = self._bytes_received.get(operation, 0) + event.bytes_received
+            self._retries[operation] = self._retries.get(operation, 0) + event.retries
+
+            histogram = self._histograms.get(operation)
+            if histogram is None:
+                histogram = self._histograms[operation] = [[0] * len(self.buckets), 0, 0.0]
+            for number, bucket in enumerate(self.buckets):
+                if event.duration <= bucket:
+                    histogram[0][number] += 1
+            histogram[1] += 1
+            histogram[2] += event.duration
+
+    def render(self):
+        """Will return all metrics in the Prometheus text format.
+
+        :rtype: str
+        :return: The metrics.
+        """
+        def labels(method, endpoint, **extra):
+            values = [('method', method), ('endpoint', endpoint)] + sorted(extra.items())
+            return '{' + ','.join('%s="%s"' % (key, value) for key, value in values) + '}'
+
+        lines = []
+        with self._lock:
+            lines.append('# TYPE %s_requests_total counter' % self.prefix)
+            for (method, endpoint, status), value in sorted(self._requests.items()):
+                lines.append('%s_requests_total%s %d' % (self.prefix, labels(method, endpoint, status=status), value))
+
+            for name, values in [('bytes_sent_total', self._bytes_sent), ('bytes_received_total', self._bytes_received),
+                                 ('retries_total', self._retries)]:
+                lines.append('# TYPE %s_%s counter' % (self.prefix, name))
+                for (method, endpoint), value in sorted(values.items()):
+                    lines.append('%s_%s%s %d' % (self.prefix, name, labels(method, endpoint), value))
+
+            lines.append('# TYPE %s_request_duration_seconds histogram' % self.prefix)
+            for (method, endpoint), (counts, count, total) in sorted(self._histograms.items()):
+                name = self.prefix + '_request_duration_seconds'
+                for bucket, value in zip(self.buckets, counts):
+                    lines.append('%s_bucket%s %d' % (name, labels(method, endpoint, le=repr(float(bucket))), value))
+                lines.append('%s_bucket%s %d' % (name, labels(method, endpoint, le='+Inf'), count))
+                lines.append('%s_sum%s %r' % (name, labels(method, endpoint), total))
+                lines.append('%s_count%s %d' % (name, labels(method, endpoint), count))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,218 @@
+"""Lightweight response models for identities, realms and resourcetypes of OpenAM."""
+from openam.jsonbackend import get_backend
+
+
+class Model(object):
+    """A response of OpenAM that is kept as compact JSON bytes until it is used.
+
+    A model uses `__slots__`, so it has no instance dict. Until the first attribute access only the JSON bytes are
+    kept, which is a fraction of the memory of the decoded dicts and lists. The first access decodes them once and
+    keeps the decoded data instead, so every following access is a plain lookup. `compact()` turns a model that is no
+    longer used often, like one in a large cache, back into JSON bytes. Attributes are available as python attributes
+    and as items. Use `from_dict()` to create a model from the plain dict of OpenAM.
+    """
+
+    __slots__ = ('_raw', '_data', '_json_backend')
+
+    def __init__(self, raw, json_backend=None):
+        """Will store the JSON of the response, without decoding it.
+
+        :param raw: The JSON of the response.
+        :type raw: bytes
+        :param json_backend: The JSON backend for decoding, the standard library when None.
+        :type json_backend: openam.jsonbackend.JsonBackend
+        """
+        self._raw = raw
+        self._data = None
+        self._json_backend = get_backend(json_backend)
+
+    @classmethod
+    def from_dict(cls, data, json_backend=None):
+        """Will create a model from a dict as returned by OpenAM.
+
+        :param data: The data of the response.
+        :type data: dict
+        :param json_backend: The JSON backend for encoding and decoding, the standard library when None.
+        :type json_backend: openam.jsonbackend.JsonBackend
+        :rtype: Model
+        :return: The model.
+        """
+        json_backend = get_backend(json_backend)
+        return cls(json_backend.dumps(data).encode('utf-8'), json_backend=json_backend)
+
+    def _decoded(self):
+        """Will return the decoded data, the JSON is decoded on the first use and replaced by the result."""
+        data = self._data
+        if data is None:
+            raw = self._raw
+            if raw is None:
+                # Decoded by another thread in the meantime.
+                return self._data
+            data = self._json_backend.loads(raw)
+            self._data = data
+            self._raw = None
+        return data
+
+    def _encoded(self):
+        """Will return the JSON bytes of the data."""
+        raw = self._raw
+        if raw is None:
+            raw = self._json_backend.dumps(self._decoded()).encode('utf-8')
+        return raw
+
+    def compact(self):
+        """Will replace the decoded data by the JSON bytes again, to use less memory.
+
+        The next attribute access decodes the JSON again.
+        """
+        data = self._data
+        if data is not None:
+            self._raw = self._json_backend.dumps(data).encode('utf-8')
+            self._data = None
+
+    def _value(self, value):
+        """Will convert a value of the response to the value of the attribute."""
+        return value
+
+    def to_dict(self):
+        """Will return the data as the plain dict that OpenAM returns.
+
+        :rtype: dict
+        :return: A new dict, so changes on it don't change the model.
+        """
+        return self._json_backend.loads(self._encoded())
+
+    def get(self, key, default=None):
+        """Will return the raw value of the key, like dict.get().
+
+        :param key: The name of the attribute.
+        :type key: str
+        :param default: The value when the attribute doesn't exist.
+        :return: The value as returned by OpenAM.
+        """
+        return self._decoded().get(key, default)
+
+    def keys(self):
+        """Will return the names of all attributes."""
+        return self._decoded().keys()
+
+    def __getitem__(self, key):
+        """Will return the raw value of the key, like a dict."""
+        return self._decoded()[key]
+
+    def __contains__(self, key):
+        """Will return True when the attribute exists."""
+        return key in self._decoded()
+
+    def __getattr__(self, name):
+        """Will return the value of an attribute of the response that has no property of its own."""
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self._value(self._decoded()[name])
+        except KeyError:
+            raise AttributeError(name)
+
+    def __eq__(self, other):
+        """Will compare the data of the models, or of a model with a dict."""
+        if isinstance(other, Model):
+            return self._decoded() == other._decoded()
+        if isinstance(other, dict):
+            return self._decoded() == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        """Will compare the data of the models, or of a model with a dict."""
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __getstate__(self):
+        """Will return the state for pickle, only the JSON bytes."""
+        return self._encoded()
+
+    def __setstate__(self, state):
+        """Will restore the state of pickle."""
+        self._raw = state
+        self._data = None
+        self._json_backend = get_backend()
+
+    def __repr__(self):
+        """Will return the class name and the JSON."""
+        return '%s(%s)' % (self.__class__.__name__, self._encoded().decode('utf-8'))
+
+
+class Identity(Model):
+    """An identity: a user, agent or group.
+
+    OpenAM returns every LDAP attribute as a list, attributes with one value are returned as that value.
+
+    :Example:
+        >>> import openam
+        >>> am = openam.Openam(openam_url="http://openam.example.com:8080/openam/", response_models=True)
+        >>> auth_data = am.authenticate(username="amadmin", password="password_openam")
+        >>> identity = am.get_identity(username="demo")
+        >>> identity.username, identity.mail, identity['mail']
+        (u'demo', u'demo@example.com', [u'demo@example.com'])
+    """
+
+    __slots__ = ()
+
+    def _value(self, value):
+        """Will return the value of a list with one value, otherwise the value itself."""
+        if isinstance(value, list) and len(value) == 1:
+            return value[0]
+        return value
+
+    @property
+    def username(self):
+        """The username/agentname/groupname."""
+        return self._value(self._decoded().get('username'))
+
+    @property
+    def realm(self):
+        """The realm of the identity."""
+        return self._value(self._decoded().get('realm'))
+
+    @property
+    def dn(self):
+        """The distinguished name in the identity store."""
+        return self._value(self._decoded().get('dn'))
+
+
+class Realm(Model):
+    """A realm."""
+
+    __slots__ = ()
+
+    @property
+    def service_names(self):
+        """The names of the services of the realm."""
+        return self._decoded().get('serviceNames', [])
+
+
+class ResourceType(Model):
+    """A resourcetype of the policy engine."""
+
+    __slots__ = ()
+
+    @property
+    def uuid(self):
+        """The unique uuid."""
+        return self._decoded().get('uuid')
+
+    @property
+    def name(self):
+        """The name of the resourcetype."""
+        return self._decoded().get('name')
+
+    @property
+    def patterns(self):
+        """The resource patterns."""
+        return self._decoded().get('patterns', [])
+
+    @property
+    def actions(self):
+        """The actions with their default value."""
+        return self._decoded().get('actions', {})
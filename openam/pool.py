@@ -0,0 +1,162 @@
+"""Pool of authenticated OpenAM sessions for parallel workers."""
+import threading
+
+from contextlib import contextmanager
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from openam import Openam
+
+
+class SessionPool(object):
+    """Pool of Openam instances that are each logged in with their own session.
+
+    OpenAM limits the number of concurrent requests per session, so parallel workers each check out their own session
+    instead of sharing one. All instances share one http connection pool.
+
+    :Example:
+        >>> from openam.pool import SessionPool
+        >>> pool = SessionPool(openam_url="http://openam.example.com:8080/openam/", username="amadmin",
+        >>>                    password="password_openam", size=8)
+        >>> with pool.session() as am:
+        >>>     am.get_identity(username="demo")
+        >>> pool.close()
+    """
+
+    def __init__(self, openam_url='', username=None, password=None, realm=None, login_params=None, size=4,
+                 validate_interval=0, **kwargs):
+        """Will login all sessions of the pool.
+
+        :param openam_url: The complete URL to the OpenAM server.
+        :type openam_url: str
+        :param username: The username which is used to authenticate against OpenAM.
+        :type username: str
+        :param password: The password for the user configured on 'username'
+        :type password: str
+        :param realm: The name of the realm on which the user needs to auhtenticate on.
+        :type realm: str
+        :param login_params: Extra arguments that are appended to the authenticate uri.
+        :type login_params: str
+        :param size: The number of sessions.
+        :type size: int
+        :param validate_interval: When set, the idle sessions are validated in a background thread every number of
+                                  seconds, and logged in again when they are not valid anymore.
+        :type validate_interval: int
+        :param kwargs: All other arguments of :class:`openam.Openam`.
+        """
+        if size < 1:
+            raise ValueError("Please provide a size of at least 1.")
+
+        self._credentials = {'realm': realm, 'username': username, 'password': password, 'login_params': login_params}
+        kwargs.setdefault('pool_maxsize', size)
+        self._shared = Openam(openam_url=openam_url, **kwargs)
+        self._clients = []
+        self._idle = queue.Queue()
+        self._stop = threading.Event()
+
+        try:
+            for _ in range(size):
+                am = Openam(openam_url=openam_url, **kwargs)
+                am.session.close()
+                am.session = self._shared.session
+                self._login(am)
+                self._clients.append(am)
+                self._idle.put(am)
+        except Exception:
+            self.close()
+            raise
+
+        if validate_interval:
+            thread = threading.Thread(target=self._validate_loop, args=(validate_interval,))
+            thread.daemon = True
+            thread.start()
+
+    def __enter__(self):
+        """Will return the pool itself when used as a context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Will logout all sessions when leaving the context manager."""
+        self.close()
+
+    def _login(self, am):
+        """Will login the instance with the credentials of the pool."""
+        if not am.authenticate(**self._credentials):
+            raise ValueError("Could not login with the provided credentials.")
+
+    def checkout(self, timeout=None):
+        """Will return an idle logged in instance, waits for one when all are in use.
+
+        :param timeout: The maximum number of seconds to wait, None waits forever.
+        :type timeout: float
+        :rtype: openam.Openam
+        :return: The instance, which needs to be given back with `checkin()`.
+        """
+        return self._idle.get(timeout=timeout)
+
+    def checkin(self, am):
+        """Will give the instance back to the pool.
+
+        :param am: The instance of `checkout()`.
+        :type am: openam.Openam
+        """
+        self._idle.put(am)
+
+    @contextmanager
+    def session(self, timeout=None):
+        """Will check out an instance for the duration of the with block.
+
+        :param timeout: The maximum number of seconds to wait, None waits forever.
+        :type timeout: float
+        """
+        am = self.checkout(timeout=timeout)
+        try:
+            yield am
+        finally:
+            self.checkin(am)
+
+    def validate(self):
+        """Will validate all idle sessions and logs in again when a session is not valid anymore.
+
+        :rtype: int
+        :return: The number of sessions that are renewed.
+        """
+        renewed = 0
+        for _ in range(self._idle.qsize()):
+            try:
+                am = self._idle.get_nowait()
+            except queue.Empty:
+                break
+
+            try:
+                token = am.headers[am.cookiename]
+                validation = am.token_validation(token=token) if token else False
+                if not validation or not validation.get('valid'):
+                    self._login(am)
+                    renewed += 1
+            finally:
+                self._idle.put(am)
+        return renewed
+
+    def _validate_loop(self, interval):
+        """Will validate the idle sessions every interval seconds, until the pool is closed."""
+        while not self._stop.wait(interval):
+            try:
+                self.validate()
+            except Exception:
+                pass
+
+    def close(self):
+        """Will logout all sessions and close the http connection pool."""
+        self._stop.set()
+        for am in self._clients:
+            if am.headers[am.cookiename]:
+                try:
+                    am.logout()
+                except Exception:
+                    pass
+        self._clients = []
+        self._shared.close()
@@ -0,0 +1,195 @@
+"""Concurrent discovery of the realm hierarchy of OpenAM."""
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from openam._helpers import STOP, realm_argument
+
+_LIST = 'list'
+_GET = 'get'
+_VISIT = 'visit'
+
+
+class RealmNode(object):
+    """One realm of the realm tree, with its sub realms as children."""
+
+    def __init__(self, path, parent=None):
+        """Will initialize the realm without children.
+
+        :param path: The path of the realm, like '/myRealm/sub'.
+        :type path: str
+        :param parent: The parent realm, None for the root realm.
+        :type parent: RealmNode
+        """
+        self.path = path
+        self.parent = parent
+        self.children = []
+        self.data = None
+        self.result = None
+        self.error = None
+
+    @property
+    def name(self):
+        """The name of the realm, the last part of the path."""
+        return self.path.rstrip('/').split('/')[-1] or '/'
+
+    @property
+    def depth(self):
+        """The number of parents of the realm, 0 for the root realm."""
+        return 0 if self.parent is None else self.parent.depth + 1
+
+    def __iter__(self):
+        """Will iterate over the realm and all its sub realms, breadth-first."""
+        level = [self]
+        while level:
+            for node in level:
+                yield node
+            level = [child for node in level for child in node.children]
+
+    def find(self, path):
+        """Will return the realm with the path, or None when it is not in this tree.
+
+        :param path: The path of the realm.
+        :type path: str
+        :rtype: RealmNode
+        :return: The realm.
+        """
+        path = '/' + path.strip('/')
+        for node in self:
+            if node.path == path:
+                return node
+        return None
+
+    def __repr__(self):
+        """Will return the path and the number of children."""
+        return 'RealmNode(%r, children=%d)' % (self.path, len(self.children))
+
+
+def _child_paths(node, result):
+    """Will return the paths of the direct sub realms of the node in the result of list_realms.
+
+    Depending on the version, OpenAM returns the sub realms as absolute or relative paths, and with or without the
+    realm itself and deeper sub realms. Deeper sub realms are found via their own parent.
+    """
+    paths = []
+    prefix = node.path.rstrip('/') + '/'
+    for entry in result.get('result') or []:
+        path = entry if entry.startswith('/') else prefix + entry
+        path = '/' + path.strip('/')
+        name = path[len(prefix):]
+        if path.startswith(prefix) and name and '/' not in name and path not in paths:
+            paths.append(path)
+    return paths
+
+
+def walk_realms(am, realm='/', concurrency=10, visitor=None, details=True):
+    """Will discover the realm tree breadth-first, listing the sub realms of many realms in parallel.
+
+    Every realm is processed as soon as it is discovered, there is no wait for the other realms of the same level.
+    With a visitor, the work per realm runs in the same pool of workers while the rest of the tree is discovered.
+    Failures are kept in the `error` attribute of the realm, the walk continues with the other realms.
+
+    :param am: The authenticated instance that is used for all requests.
+    :type am: openam.Openam
+    :param realm: The path of the realm to start from.
+    :type realm: str
+    :param concurrency: The maximum number of requests (and visitors) in flight.
+    :type concurrency: int
+    :param visitor: A function that is called with every RealmNode, after its data is requested. Its return value is
+                    kept in the `result` attribute of the realm.
+    :type visitor: callable
+    :param details: Request the configuration of every realm with `get_realm`, which is kept in the `data` attribute.
+    :type details: bool
+    :rtype: RealmNode
+    :return: The realm to start from, with all its sub realms as children.
+    :Example:
+        >>> import openam
+        >>> from openam.realmtree import walk_realms
+        >>> am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+        >>> auth_data = am.authenticate(username="amadmin", password="password_openam")
+        >>> tree = walk_realms(am, visitor=lambda node: am.list_identities(realm=node.path.strip('/') or None))
+        >>> for node in tree:
+        >>>     print(node.path, node.result['resultCount'])
+        / 2
+        /myRealm 10
+        >>> am.logout()
+    """
+    if concurrency < 1:
+        raise ValueError("Please provide a concurrency of at least 1.")
+
+    tasks = queue.Queue()
+    results = queue.Queue()
+
+    def run(action, node):
+        if action == _LIST:
+            realms = am.list_realms(realm=realm_argument(node.path))
+            if realms is False:
+                raise ValueError("Could not list the realms of %s." % node.path)
+            return _child_paths(node, realms)
+        if action == _GET:
+            if node.parent is None and not node.path.strip('/'):
+                return {}
+            data = am.get_realm(realm=node.path.strip('/'))
+            if data is False:
+                raise ValueError("Could not get realm %s." % node.path)
+            return data
+        return visitor(node)
+
+    def worker():
+        while True:
+            task = tasks.get()
+            if task is STOP:
+                return
+            action, node = task
+            try:
+                results.put((action, node, run(action, node), None))
+            except Exception as e:
+                results.put((action, node, None, e))
+
+    workers = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in workers:
+        thread.daemon = True
+        thread.start()
+
+    root = RealmNode('/' + realm.strip('/'))
+    outstanding = [0]
+
+    def schedule(action, node):
+        outstanding[0] += 1
+        tasks.put((action, node))
+
+    def discovered(node):
+        schedule(_LIST, node)
+        if details:
+            schedule(_GET, node)
+        elif visitor is not None:
+            schedule(_VISIT, node)
+
+    try:
+        discovered(root)
+        while outstanding[0]:
+            action, node, result, error = results.get()
+            outstanding[0] -= 1
+            if error is not None:
+                if node.error is None:
+                    node.error = error
+                continue
+
+            if action == _LIST:
+                for path in result:
+                    child = RealmNode(path, parent=node)
+                    node.children.append(child)
+                    discovered(child)
+            elif action == _GET:
+                node.data = result
+                if visitor is not None:
+                    schedule(_VISIT, node)
+            else:
+                node.result = result
+    finally:
+        for _ in workers:
+            tasks.put(STOP)
+    return root
@@ -0,0 +1,306 @@
+"""Declarative configuration of realms, identities and resourcetypes of OpenAM."""
+from collections import namedtuple
+
+from openam._helpers import RESOURCETYPE_METADATA, bulk, imap_unordered, plain, realm_argument
+from openam.realmtree import walk_realms
+
+Change = namedtuple('Change', ['action', 'kind', 'realm', 'type', 'name', 'data', 'uuid'])
+"""One change of a plan: the action ('create', 'update' or 'delete') of an object of a kind ('realms', 'identities'
+or 'resourcetypes'). For updates, data only has the attributes that differ."""
+
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+
+REALMS = 'realms'
+IDENTITIES = 'identities'
+RESOURCETYPES = 'resourcetypes'
+
+# Attributes that OpenAM never returns, so they can't be compared and are only sent on create.
+WRITE_ONLY = frozenset(['userpassword'])
+
+# Identities that OpenAM itself needs, they are never deleted by prune.
+BUILTIN_IDENTITIES = frozenset(['amadmin', 'anonymous', 'dsameuser', 'amldapuser', 'amService-URLAccessAgent'])
+
+
+def _diff(desired, current, ignore=frozenset(), lists=False):
+    """Will return the attributes of desired that differ from current.
+
+    :param desired: The desired attributes.
+    :type desired: dict
+    :param current: The current attributes.
+    :type current: dict
+    :param ignore: Attributes that are not compared.
+    :type ignore: frozenset
+    :param lists: A single desired value equals a list with only that value, like OpenAM returns LDAP attributes.
+    :type lists: bool
+    :rtype: dict
+    :return: The desired attributes that differ.
+    """
+    changed = {}
+    for key, value in desired.items():
+        if key in ignore:
+            continue
+        compared = value
+        if lists and not isinstance(value, list) and isinstance(current.get(key), list):
+            compared = [value]
+        if key not in current or current[key] != compared:
+            changed[key] = value
+    return changed
+
+
+class Reconciler(object):
+    """Brings the realms, identities and resourcetypes of OpenAM in the desired state, with as few requests as possible.
+
+    The desired state is a dict with the optional keys 'realms', 'identities' and 'resourcetypes'::
+
+        {
+            'realms': {'/myRealm': {'active': True}},
+            'identities': {'/myRealm': {'users': {'demo': {'mail': 'demo@example.com', 'userpassword': 'secret12'}}}},
+            'resourcetypes': {'/': {'My Resource Type': {'patterns': ['http://example.com/*'],
+                                                         'actions': {'GET': True}}}},
+        }
+
+    Realms are compared on the attributes of their desired state only. Identities are compared per realm and type, on
+    the attributes of the desired state, except passwords. Resourcetypes are compared per realm by name. Only the
+    attributes that differ are sent, except for resourcetypes, which OpenAM only updates as a whole. Objects that
+    are not in the desired state are only deleted with prune, and only for the realms and types in the desired state.
+    Prune never deletes the built-in identities of OpenAM, the user the reconciler is logged in with and the protected
+    identities.
+
+    :Example:
+        >>> import openam
+        >>> from openam.reconcile import Reconciler
+        >>> am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+        >>> auth_data = am.authenticate(username="amadmin", password="password_openam")
+        >>> reconciler = Reconciler(am, concurrency=10)
+        >>> for report in reconciler.reconcile(desired):
+        >>>     print(report['item'].action, report['item'].name, report['status'])
+        update demo applied
+        >>> am.logout()
+    """
+
+    def __init__(self, am, concurrency=10, prune=False, protected=None):
+        """Will initialize the reconciler.
+
+        :param am: The authenticated instance that is used for all requests.
+        :type am: openam.Openam
+        :param concurrency: The maximum number of requests in flight.
+        :type concurrency: int
+        :param prune: Delete the objects that are not in the desired state.
+        :type prune: bool
+        :param protected: Names of identities that are never deleted by prune, in addition to BUILTIN_IDENTITIES.
+        :type protected: list
+        """
+        if concurrency < 1:
+            raise ValueError("Please provide a concurrency of at least 1.")
+
+        self.am = am
+        self.concurrency = concurrency
+        self.prune = prune
+        self.protected = BUILTIN_IDENTITIES | frozenset(protected or [])
+
+    def fetch(self, desired):
+        """Will get the current state of everything in the desired state, with parallel requests.
+
+        The realm tree is discovered first, the realms, identities and resourcetypes are then requested in parallel.
+        Realms that don't exist yet have no identities and resourcetypes.
+
+        :param desired: The desired state.
+        :type desired: dict
+        :rtype: dict
+        :return: The current state, in the same structure as the desired state. Resourcetypes include their uuid.
+        """
+        existing = set()
+        for node in walk_realms(self.am, concurrency=self.concurrency, details=False):
+            if node.error is not None:
+                raise node.error
+            existing.add(node.path)
+
+        def exists(realm):
+            return '/' + realm.strip('/') in existing
+
+        current = {REALMS: {}, IDENTITIES: {}, RESOURCETYPES: {}}
+        tasks = []
+        for realm in desired.get(REALMS) or {}:
+            if exists(realm):
+                tasks.append((REALMS, realm, None))
+        for realm, types in (desired.get(IDENTITIES) or {}).items():
+            for type in types:
+                current[IDENTITIES].setdefault(realm, {})[type] = {}
+                if exists(realm):
+                    tasks.append((IDENTITIES, realm, type))
+        for realm in desired.get(RESOURCETYPES) or {}:
+            current[RESOURCETYPES][realm] = {}
+            if exists(realm):
+                tasks.append((RESOURCETYPES, realm, None))
+
+        for (kind, realm, type), result, error in imap_unordered(self._fetch, tasks, concurrency=self.concurrency):
+            if error is not None:
+                raise error
+            if kind == IDENTITIES:
+                current[IDENTITIES][realm][type] = result
+            else:
+                current[kind][realm] = result
+        return current
+
+    def _fetch(self, task):
+        """Will get the current configuration of a realm, or its objects of one kind and type."""
+        kind, realm, type = task
+        if kind == REALMS:
+            if not realm.strip('/'):
+                # The root realm has no configuration of its own.
+                return {}
+            data = self.am.get_realm(realm=realm.strip('/'))
+            if data is False:
+                raise ValueError("Could not get realm %s." % realm)
+            return plain(data)
+
+        if kind == IDENTITIES:
+            identities = {}
+            for identity in self.am.iter_identities(realm=realm_argument(realm), type=type):
+                identity = plain(identity)
+                if not isinstance(identity, dict):
+                    # OpenAM 12 only returns the names of the identities.
+                    name = identity
+                    identity = plain(self.am.get_identity(realm=realm_argument(realm), type=type, username=name))
+                    if identity is False:
+                        raise ValueError("Could not get identity %s of realm %s." % (name, realm))
+                identities[identity['username']] = identity
+            return identities
+
+        resourcetypes = self.am.list_resourcetypes(realm=realm_argument(realm))
+        if resourcetypes is False:
+            raise ValueError("Could not list the resourcetypes of realm %s." % realm)
+        return dict((item['name'], item) for item in (plain(item) for item in resourcetypes.get('result') or []))
+
+    def plan(self, desired, current=None):
+        """Will compute the changes that bring the current state in the desired state.
+
+        :param desired: The desired state.
+        :type desired: dict
+        :param current: The current state, as returned by `fetch()`. When None, it is fetched.
+        :type current: dict
+        :rtype: list
+        :return: The changes, in the order they need to be applied.
+        """
+        if current is None:
+            current = self.fetch(desired)
+
+        authenticated = self._authenticated_user() if self.prune else None
+        changes = []
+        desired_realms = desired.get(REALMS) or {}
+        for name in sorted(desired_realms, key=lambda name: name.strip('/').count('/')):
+            data = desired_realms[name] or {}
+            if name not in current[REALMS]:
+                changes.append(Change(CREATE, REALMS, name, None, name, dict(data, realm=name.strip('/')), None))
+                continue
+            changed = _diff(data, current[REALMS][name])
+            if changed:
+                changes.append(Change(UPDATE, REALMS, name, None, name, changed, None))
+
+        for realm, types in (desired.get(IDENTITIES) or {}).items():
+            for type, identities in types.items():
+                existing = current[IDENTITIES].get(realm, {}).get(type, {})
+                for username, data in identities.items():
+                    data = data or {}
+                    if username not in existing:
+                        changes.append(Change(CREATE, IDENTITIES, realm, type, username, dict(data, username=username),
+                                              None))
+                        continue
+                    changed = _diff(data, existing[username], ignore=WRITE_ONLY, lists=True)
+                    if changed:
+                        changes.append(Change(UPDATE, IDENTITIES, realm, type, username, changed, None))
+                if self.prune:
+                    for username in sorted(set(existing) - set(identities) - self.protected):
+                        if type == 'users' and ('/' + realm.strip('/'), username) == authenticated:
+                            continue
+                        changes.append(Change(DELETE, IDENTITIES, realm, type, username, None, None))
+
+        for realm, resourcetypes in (desired.get(RESOURCETYPES) or {}).items():
+            existing = current[RESOURCETYPES].get(realm, {})
+            for name, data in resourcetypes.items():
+                data = dict(data or {}, name=name)
+                if name not in existing:
+                    changes.append(Change(CREATE, RESOURCETYPES, realm, None, name, data, None))
+                    continue
+                if _diff(data, existing[name]):
+                    # The uuid is part of the uri of the update.
+                    resourcetype = dict((key, value) for key, value in existing[name].items()
+                                        if key not in RESOURCETYPE_METADATA and key != 'uuid')
+                    resourcetype.update(data)
+                    changes.append(Change(UPDATE, RESOURCETYPES, realm, None, name, resourcetype,
+                                          existing[name].get('uuid')))
+            if self.prune:
+                for name in sorted(set(existing) - set(resourcetypes)):
+                    changes.append(Change(DELETE, RESOURCETYPES, realm, None, name, None, existing[name].get('uuid')))
+        return changes
+
+    def _authenticated_user(self):
+        """Will return the realm path and the username of the session of the reconciler, None without a session."""
+        if not self.am.token:
+            return None
+        session = self.am.token_validation(realm=realm_argument(self.am.realm or '/'), token=self.am.token)
+        if not session or not session.get('uid'):
+            return None
+        return '/' + (session.get('realm') or '/').strip('/'), session['uid']
+
+    def apply(self, changes):
+        """Will apply the changes with parallel requests.
+
+        Realms are created first, parents before their sub realms, because identities and resourcetypes can be
+        created in them. All other changes are done in parallel.
+
+        :param changes: The changes of `plan()`.
+        :type changes: list
+        :rtype: generator
+        :return: A dict per change with the keys 'item' (the change), 'status' ('applied', 'conflict' or 'failed')
+                 and 'result'.
+        """
+        realm_creates = [change for change in changes if change.kind == REALMS and change.action == CREATE]
+        depths = sorted(set(change.name.strip('/').count('/') for change in realm_creates))
+        for depth in depths:
+            level = [change for change in realm_creates if change.name.strip('/').count('/') == depth]
+            for report in bulk(self._apply, level, 'applied', self.concurrency):
+                yield report
+
+        others = [change for change in changes if not (change.kind == REALMS and change.action == CREATE)]
+        for report in bulk(self._apply, others, 'applied', self.concurrency):
+            yield report
+
+    def _apply(self, change):
+        """Will do the request of one change."""
+        realm = realm_argument(change.realm)
+        if change.kind == REALMS:
+            if change.action == CREATE:
+                return self.am.create_realm(realm_data=change.data)
+            return self.am.update_realm(realm=change.name.strip('/'), realm_data=change.data)
+
+        if change.kind == IDENTITIES:
+            if change.action == CREATE:
+                return self.am.create_identity(realm=realm, type=change.type, user_data=change.data)
+            if change.action == UPDATE:
+                return self.am.update_identity(realm=realm, type=change.type, username=change.name,
+                                               user_data=change.data)
+            return self.am.delete_identity(realm=realm, type=change.type, username=change.name)
+
+        if change.action == CREATE:
+            return self.am.create_resourcetype(realm=realm, resource_data=change.data)
+        if change.action == UPDATE:
+            return self.am.update_resourcetype(realm=realm, uuid=change.uuid, resource_data=change.data)
+        return self.am.delete_resourcetype(realm=realm, uuid=change.uuid)
+
+    def reconcile(self, desired, dryrun=False):
+        """Will fetch the current state, plan the changes and apply them.
+
+        :param desired: The desired state.
+        :type desired: dict
+        :param dryrun: Only return the plan, without applying it.
+        :type dryrun: bool
+        :rtype: list or generator
+        :return: The changes with dryrun, otherwise the reports of `apply()`.
+        """
+        changes = self.plan(desired)
+        if dryrun:
+            return changes
+        return self.apply(changes)
@@ -0,0 +1,102 @@
+"""Retry policy for idempotent requests on OpenAM."""
+import random
+import time
+
+from email.utils import mktime_tz, parsedate_tz
+
+
+class RetryPolicy(object):
+    """When and how long to wait before an idempotent request is retried.
+
+    The wait time grows exponentially with every attempt (backoff_base * 2 ** attempt, at most backoff_max). With
+    jitter, a random time between 0 and that wait time is used, so many clients don't retry at the same moment. When
+    OpenAM sends a `Retry-After` header, that time is used instead.
+
+    :Example:
+        >>> import openam
+        >>> from openam.retry import RetryPolicy
+        >>> retry = RetryPolicy(max_attempts=5, backoff_base=0.2, retry_on=[502, 503, 504])
+        >>> am = openam.Openam(openam_url="http://openam.example.com:8080/openam/", retry=retry)
+    """
+
+    def __init__(self, max_attempts=3, backoff_base=0.5, backoff_max=30, jitter=True, retry_on=(429, 502, 503, 504),
+                 respect_retry_after=True):
+        """Will initialize the retry policy.
+
+        :param max_attempts: The maximum number of attempts, including the first one.
+        :type max_attempts: int
+        :param backoff_base: The wait time in seconds before the first retry.
+        :type backoff_base: float
+        :param backoff_max: The maximum wait time in seconds.
+        :type backoff_max: float
+        :param jitter: Use a random wait time between 0 and the exponential wait time.
+        :type jitter: bool
+        :param retry_on: The http status codes on which the request is retried.
+        :type retry_on: list
+        :param respect_retry_after: Use the time of the `Retry-After` header when it is available.
+        :type respect_retry_after: bool
+        """
+        if max_attempts < 1:
+            raise ValueError("Please provide a max_attempts of at least 1.")
+
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_on = frozenset(retry_on)
+        self.respect_retry_after = respect_retry_after
+
+    def should_retry(self, attempt, response=None):
+        """Will return True when the attempt can be retried.
+
+        :param attempt: The number of the attempt that failed, starting at 0.
+        :type attempt: int
+        :param response: The response, or None when the request failed with a connection error or timeout.
+        :type response: requests.Response
+        :rtype: bool
+        :return: True when the request should be done again.
+        """
+        if attempt + 1 >= self.max_attempts:
+            return False
+        return response is None or response.status_code in self.retry_on
+
+    def wait_time(self, attempt, response=None):
+        """Will return the number of seconds to wait before the next attempt.
+
+        :param attempt: The number of the attempt that failed, starting at 0.
+        :type attempt: int
+        :param response: The response, or None when the request failed with a connection error or timeout.
+        :type response: requests.Response
+        :rtype: float
+        :return: The wait time in seconds.
+        """
+        if self.respect_retry_after and response is not None:
+            retry_after = self._retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(self.backoff_max, retry_after)
+
+        wait = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        if self.jitter:
+            wait = random.uniform(0, wait)
+        return wait
+
+    def _retry_after(self, value):
+        """Will parse the value of the Retry-After header, in seconds or as http date.
+
+        :param value: The value of the header.
+        :type value: str
+        :rtype: float
+        :return: The number of seconds, or None when there is no (valid) value.
+        """
+        if not value:
+            return None
+
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+
+        date = parsedate_tz(value)
+        if date is None:
+            return None
+        return max(0.0, mktime_tz(date) - time.time())
@@ -0,0 +1,65 @@
+"""Coalescing of identical requests that are in flight at the same time."""
+import threading
+
+
+class _Call(object):
+    """A call that is in flight, with its result once it is done."""
+
+    def __init__(self):
+        """Will initialize the call as not done."""
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Runs a function only once for all threads that ask for the same key at the same time.
+
+    The first thread runs the function, the other threads wait for it and receive the same result or exception. When
+    the call is done the key is forgotten, so the next call runs the function again: results are never cached.
+
+    :Example:
+        >>> from openam.singleflight import SingleFlight
+        >>> single_flight = SingleFlight()
+        >>> single_flight.do('GET json/users/demo', requests.get, 'http://openam.example.com:8080/openam/json/users/demo')
+    """
+
+    def __init__(self):
+        """Will initialize without calls in flight."""
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function, *args, **kwargs):
+        """Will run the function, or wait for the call with the same key that is already in flight.
+
+        :param key: The key of the call, calls with the same key must have the same result.
+        :type key: hashable
+        :param function: The function that is called with the args and kwargs.
+        :type function: callable
+        :return: The result of the function.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
@@ -0,0 +1,236 @@
+"""Snapshots of the configuration of OpenAM: realms, identities, resourcetypes and XACML policies."""
+import gzip
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+
+import xml.etree.ElementTree as ElementTree
+
+from openam._helpers import RESOURCETYPE_METADATA, bulk, imap_unordered, plain, realm_argument
+from openam.reconcile import IDENTITIES, REALMS, RESOURCETYPES
+from openam.realmtree import walk_realms
+
+POLICIES = 'policies'
+
+KINDS = [REALMS, IDENTITIES, RESOURCETYPES, POLICIES]
+
+# Attributes of identities that are set by OpenAM and can't be given on create.
+_IDENTITY_READ_ONLY = frozenset(['dn', 'universalid', 'realm', 'objectclass', '_id', '_rev'])
+
+
+def _path(directory, kind, compress):
+    """Will return the path of the file of a kind of objects."""
+    return os.path.join(directory, kind + ('.ndjson.gz' if compress else '.ndjson'))
+
+
+class _Writer(object):
+    """Thread-safe writer of newline-delimited JSON."""
+
+    def __init__(self, path, compress, json_backend):
+        """Will open the file for writing."""
+        self._file = gzip.open(path, 'wb') if compress else open(path, 'wb')
+        self._json_backend = json_backend
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def _line(self, record):
+        """Will encode the record as one line."""
+        return (self._json_backend.dumps(record) + '\n').encode('utf-8')
+
+    def write(self, record):
+        """Will write the record as one line."""
+        line = self._line(record)
+        with self._lock:
+            self._file.write(line)
+            self.count += 1
+
+    def write_group(self, records):
+        """Will write the records as consecutive lines, not interleaved with records of other threads.
+
+        The records are spooled to a temporary file first, so they are never all in memory.
+        """
+        with tempfile.TemporaryFile() as spool:
+            count = 0
+            for record in records:
+                spool.write(self._line(record))
+                count += 1
+            spool.seek(0)
+            with self._lock:
+                shutil.copyfileobj(spool, self._file)
+                self.count += count
+
+    def close(self):
+        """Will close the file."""
+        self._file.close()
+
+
+def _read(directory, kind, json_backend):
+    """Will yield the records of a kind of objects from the compressed or uncompressed file, when there is one."""
+    for compress in [True, False]:
+        path = _path(directory, kind, compress)
+        if os.path.exists(path):
+            with (gzip.open(path, 'rb') if compress else open(path, 'rb')) as fileobj:
+                for line in fileobj:
+                    if line.strip():
+                        yield json_backend.loads(line)
+            return
+
+
+def _walk_realms(am, concurrency):
+    """Will discover all realms with the realm tree walker.
+
+    :rtype: list
+    :return: The realm paths, parents before their sub realms.
+    """
+    tree = walk_realms(am, concurrency=concurrency, details=False)
+    for node in tree:
+        if node.error is not None:
+            raise node.error
+    return [node.path for node in tree]
+
+
+def export_snapshot(am, directory, compress=False, concurrency=10, types=('users', 'groups', 'agents')):
+    """Will write all realms, identities, resourcetypes and XACML policies of OpenAM to a directory.
+
+    Every kind of object is written to its own file with one JSON object per line (`realms.ndjson`,
+    `identities.ndjson`, `resourcetypes.ndjson` and `policies.ndjson`), optionally gzip compressed. The realms are
+    discovered with `openam.realmtree.walk_realms` and all realms are exported in parallel. Objects are written
+    while they are received, so they are never all in memory.
+
+    :param am: The authenticated instance that is used for all requests.
+    :type am: openam.Openam
+    :param directory: The directory the files are written to, it is created when it doesn't exist.
+    :type directory: str
+    :param compress: Compress the files with gzip.
+    :type compress: bool
+    :param concurrency: The maximum number of requests in flight.
+    :type concurrency: int
+    :param types: The types of identities that are exported.
+    :type types: list
+    :rtype: dict
+    :return: The number of exported objects per kind.
+    :Example:
+        >>> import openam
+        >>> from openam.snapshot import export_snapshot
+        >>> am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+        >>> auth_data = am.authenticate(username="amadmin", password="password_openam")
+        >>> export_snapshot(am, '/backup/openam', compress=True)
+        {'realms': 3, 'identities': 1204, 'resourcetypes': 4, 'policies': 87}
+        >>> am.logout()
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    writers = dict((kind, _Writer(_path(directory, kind, compress), compress, am.json_backend)) for kind in KINDS)
+    try:
+        realms = _walk_realms(am, concurrency)
+        tasks = [(REALMS, realm, None) for realm in realms]
+        tasks += [(IDENTITIES, realm, type) for realm in realms for type in types]
+        tasks += [(RESOURCETYPES, realm, None) for realm in realms]
+        tasks += [(POLICIES, realm, None) for realm in realms]
+
+        def export(task):
+            kind, realm, type = task
+            writer = writers[kind]
+            if kind == REALMS:
+                data = am.get_realm(realm=realm.strip('/')) if realm != '/' else {}
+                if data is False:
+                    raise ValueError("Could not get realm %s." % realm)
+                writer.write({'realm': realm, 'data': plain(data)})
+            elif kind == IDENTITIES:
+                for identity in am.iter_identities(realm=realm_argument(realm), type=type):
+                    identity = plain(identity)
+                    if not isinstance(identity, dict):
+                        # OpenAM 12 only returns the names of the identities.
+                        name = identity
+                        identity = plain(am.get_identity(realm=realm_argument(realm), type=type, username=name))
+                        if identity is False:
+                            raise ValueError("Could not get identity %s of realm %s." % (name, realm))
+                    writer.write({'realm': realm, 'type': type, 'data': identity})
+            elif kind == RESOURCETYPES:
+                resourcetypes = am.list_resourcetypes(realm=realm_argument(realm))
+                if resourcetypes is False:
+                    raise ValueError("Could not list the resourcetypes of realm %s." % realm)
+                for resourcetype in resourcetypes.get('result') or []:
+                    writer.write({'realm': realm, 'data': plain(resourcetype)})
+            else:
+                # The policies of a realm are kept together, so they are restored with one import per realm.
+                writer.write_group({'realm': realm, 'name': policy.get('PolicyId'),
+                                    'policy': ElementTree.tostring(policy).decode('utf-8')}
+                                   for policy in am.iter_xacml_policies(realm=realm_argument(realm)))
+
+        for task, result, error in imap_unordered(export, tasks, concurrency=concurrency):
+            if error is not None:
+                raise error
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    return dict((kind, writer.count) for kind, writer in writers.items())
+
+
+def restore_snapshot(am, directory, concurrency=10, default_password=None, batch_size=100):
+    """Will create the realms, identities, resourcetypes and XACML policies of a snapshot in OpenAM.
+
+    Realms are created first, parents before their sub realms. Identities and resourcetypes are then created in
+    parallel, followed by the policies with one import per realm, which sends its batches in parallel. OpenAM never
+    exports passwords, so users are created with the default_password when it is given.
+
+    :param am: The authenticated instance that is used for all requests.
+    :type am: openam.Openam
+    :param directory: The directory with the files of `export_snapshot`.
+    :type directory: str
+    :param concurrency: The maximum number of requests in flight.
+    :type concurrency: int
+    :param default_password: The password of restored users.
+    :type default_password: str
+    :param batch_size: The maximum number of policies per import request.
+    :type batch_size: int
+    :rtype: generator
+    :return: A dict per object with the keys 'item' (the record of the snapshot), 'status' ('created', 'conflict'
+             or 'failed') and 'result'.
+    :Example:
+        >>> import openam
+        >>> from openam.snapshot import restore_snapshot
+        >>> am = openam.Openam(openam_url="http://openam-test.example.com:8080/openam/")
+        >>> auth_data = am.authenticate(username="amadmin", password="password_openam")
+        >>> failed = [report for report in restore_snapshot(am, '/backup/openam') if report['status'] == 'failed']
+        >>> am.logout()
+    """
+    def create_realm(record):
+        realm_data = dict(record['data'] or {})
+        realm_data['realm'] = record['realm'].strip('/')
+        return am.create_realm(realm_data=realm_data)
+
+    realms = [record for record in _read(directory, REALMS, am.json_backend) if record['realm'].strip('/')]
+    for depth in sorted(set(record['realm'].strip('/').count('/') for record in realms)):
+        level = [record for record in realms if record['realm'].strip('/').count('/') == depth]
+        for report in bulk(create_realm, level, 'created', concurrency):
+            yield report
+
+    def create(record):
+        if not isinstance(record['data'], dict):
+            raise ValueError("Please provide a snapshot with complete objects, %s is only a name." % record['data'])
+        if 'type' in record:
+            user_data = dict((key, value) for key, value in record['data'].items() if key not in _IDENTITY_READ_ONLY)
+            if record['type'] == 'users' and default_password and 'userpassword' not in user_data:
+                user_data['userpassword'] = default_password
+            return am.create_identity(realm=realm_argument(record['realm']), type=record['type'], user_data=user_data)
+
+        resource_data = dict((key, value) for key, value in record['data'].items() if key not in RESOURCETYPE_METADATA)
+        return am.create_resourcetype(realm=realm_argument(record['realm']), resource_data=resource_data)
+
+    objects = itertools.chain(_read(directory, IDENTITIES, am.json_backend),
+                              _read(directory, RESOURCETYPES, am.json_backend))
+    for report in bulk(create, objects, 'created', concurrency):
+        yield report
+
+    records = _read(directory, POLICIES, am.json_backend)
+    for realm, group in itertools.groupby(records, key=lambda record: record['realm']):
+        reports = am.xacml_import_policies(realm=realm_argument(realm), policies=(record['policy'] for record in group),
+                                           batch_size=batch_size, concurrency=concurrency)
+        for report in reports:
+            status = 'failed' if report['status'] == 'failed' else 'created'
+            yield {'item': {'realm': realm, 'name': report['item']}, 'status': status, 'result': report['result']}
@@ -0,0 +1,181 @@
+"""Client side rate limiting and concurrency limits for the requests on OpenAM."""
+import threading
+import time
+
+from contextlib import contextmanager
+
+READS = 'reads'
+WRITES = 'writes'
+AUTHENTICATION = 'authentication'
+
+_READ_ACTIONS = ['validate', 'getTimeLeft', 'getMaxTime', 'getIdle', 'getProperty']
+
+
+class TokenBucket(object):
+    """Thread-safe token bucket: `rate` requests per second, with bursts of at most `burst` requests."""
+
+    def __init__(self, rate, burst=None):
+        """Will initialize a full bucket.
+
+        :param rate: The number of requests per second.
+        :type rate: float
+        :param burst: The maximum number of requests at once. Default is the rate, with a minimum of 1.
+        :type burst: float
+        """
+        if rate <= 0:
+            raise ValueError("Please provide a rate higher than 0.")
+
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1, rate))
+        self._tokens = self.burst
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Will take one token from the bucket and returns how long to wait before it may be used.
+
+        :rtype: float
+        :return: The number of seconds to wait.
+        """
+        with self._lock:
+            now = time.time()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class Throttle(object):
+    """A rate limit and/or a maximum number of requests in flight."""
+
+    def __init__(self, rate=None, burst=None, max_in_flight=None):
+        """Will initialize the throttle.
+
+        :param rate: The number of requests per second, None for no limit.
+        :type rate: float
+        :param burst: The maximum number of requests at once.
+        :type burst: float
+        :param max_in_flight: The maximum number of requests in flight, None for no limit.
+        :type max_in_flight: int
+        """
+        self.bucket = TokenBucket(rate, burst=burst) if rate else None
+        self.semaphore = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+
+    def try_enter(self):
+        """Will take a request slot when one is free, without waiting.
+
+        :rtype: bool
+        :return: True when the request may be done, it needs to be followed by `release()`.
+        """
+        return self.semaphore is None or self.semaphore.acquire(False)
+
+    def reserve(self):
+        """Will reserve a token and returns the number of seconds to wait before the request may be done.
+
+        :rtype: float
+        :return: The number of seconds to wait.
+        """
+        return self.bucket.reserve() if self.bucket is not None else 0.0
+
+    def acquire(self):
+        """Will wait until a request may be done, it needs to be followed by `release()`."""
+        if self.semaphore is not None:
+            self.semaphore.acquire()
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+    def release(self):
+        """Will free the request slot."""
+        if self.semaphore is not None:
+            self.semaphore.release()
+
+
+class RateLimiter(object):
+    """Rate limits and concurrency limits for all requests and per kind of operation.
+
+    Every request needs to pass the global throttle and the throttle of its kind of operation: reads (GET requests and
+    session validation), writes (everything else) or authentication. One RateLimiter can be shared by multiple
+    :class:`openam.Openam` and :class:`openam.aio.AsyncOpenam` instances.
+
+    :Example:
+        >>> import openam
+        >>> from openam.throttle import RateLimiter, Throttle
+        >>> limiter = RateLimiter(max_in_flight=32, writes=Throttle(rate=50, max_in_flight=8))
+        >>> am = openam.Openam(openam_url="http://openam.example.com:8080/openam/", rate_limiter=limiter)
+    """
+
+    def __init__(self, rate=None, burst=None, max_in_flight=None, reads=None, writes=None, authentication=None):
+        """Will initialize the rate limiter.
+
+        :param rate: The number of requests per second for all requests, None for no limit.
+        :type rate: float
+        :param burst: The maximum number of requests at once for all requests.
+        :type burst: float
+        :param max_in_flight: The maximum number of requests in flight for all requests, None for no limit.
+        :type max_in_flight: int
+        :param reads: The limits of read operations.
+        :type reads: Throttle
+        :param writes: The limits of write operations.
+        :type writes: Throttle
+        :param authentication: The limits of authentication requests.
+        :type authentication: Throttle
+        """
+        self.throttle = Throttle(rate=rate, burst=burst, max_in_flight=max_in_flight)
+        self.operations = {READS: reads, WRITES: writes, AUTHENTICATION: authentication}
+
+    def operation(self, method, uri):
+        """Will return the kind of operation of the request: 'reads', 'writes' or 'authentication'.
+
+        :param method: The http method.
+        :type method: str
+        :param uri: The uri of the request.
+        :type uri: str
+        :rtype: str
+        :return: The kind of operation.
+        """
+        if uri.split('?')[0].rstrip('/').endswith('authenticate'):
+            return AUTHENTICATION
+        if method == 'GET':
+            return READS
+        for action in _READ_ACTIONS:
+            if '_action=' + action in uri:
+                return READS
+        return WRITES
+
+    def throttles(self, method, uri):
+        """Will return the throttles the request needs to pass, in the order they need to be acquired.
+
+        :param method: The http method.
+        :type method: str
+        :param uri: The uri of the request.
+        :type uri: str
+        :rtype: list
+        :return: The throttles.
+        """
+        throttles = [self.throttle]
+        operation = self.operations[self.operation(method, uri)]
+        if operation is not None:
+            throttles.append(operation)
+        return throttles
+
+    @contextmanager
+    def limit(self, method, uri):
+        """Will wait until the request may be done, and frees the request slots after the with block.
+
+        :param method: The http method.
+        :type method: str
+        :param uri: The uri of the request.
+        :type uri: str
+        """
+        acquired = []
+        try:
+            for throttle in self.throttles(method, uri):
+                throttle.acquire()
+                acquired.append(throttle)
+            yield
+        finally:
+            for throttle in reversed(acquired):
+                throttle.release()
@@ -116,6 +116,8 @@ setup(name='python-openam',
       test_suite='openam.tests.test_openam',
       extras_require={
         'testing': ['pytest'],
+        'async': ['aiohttp'],
+        'orjson': ['orjson'],
       },
       zip_safe=False,
       classifiers=[
@@ -0,0 +1,100 @@
+"""Test script for the asyncio interface of python-openam"""
+
+import sys
+import os
+import pytest
+
+if sys.version_info < (3, 5):
+    pytest.skip("AsyncOpenam needs Python 3.5 or newer", allow_module_level=True)
+
+pytest.importorskip("aiohttp")
+
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+import asyncio
+import socket
+import openam.aio
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test___init__openam_url():
+    """Test __init__ function if openam_url is provided.
+    :return:
+    """
+    with pytest.raises(ValueError) as excinfo:
+        openam.aio.AsyncOpenam()
+    assert str(excinfo.value) == 'This interface needs an OpenAM URL to work!'
+
+
+def test_close_without_session():
+    """Test the close function when no request is done yet.
+    :return:
+    """
+    am = openam.aio.AsyncOpenam(openam_url="http://openam.example.com:8080/openam/")
+    run(am.close())
+    assert am.session is None
+
+
+def test__post_wrong_port():
+    """Test the _post function on wrong port.
+    :return:
+    """
+    async def post():
+        async with openam.aio.AsyncOpenam(openam_url="http://openam.example.com:880/opeam") as am:
+            return await am._post(uri='wrong_uri', data='{}', headers={})
+    data = run(post())
+    assert 'error' in data
+
+
+def test__post_timeout():
+    """Test the _post function returns the error when OpenAM doesn't answer in time.
+    :return:
+    """
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+
+    async def post():
+        url = "http://127.0.0.1:%d/openam" % listener.getsockname()[1]
+        async with openam.aio.AsyncOpenam(openam_url=url, timeout=1) as am:
+            return await am._post(uri='json/serverinfo/*', data='{}', headers={})
+    try:
+        data = run(post())
+    finally:
+        listener.close()
+    assert isinstance(data['error'], asyncio.TimeoutError)
+
+
+def test_authenticate():
+    """Test the authentication function.
+    :return:
+    """
+    async def authenticate():
+        async with openam.aio.AsyncOpenam(openam_url="http://openam.example.com:8080/openam/") as am:
+            auth_data = await am.authenticate(username="amadmin", password="password_openam")
+            await am.logout()
+            return auth_data
+    auth_data = run(authenticate())
+    assert auth_data['successUrl'] == '/openam/console'
+
+
+def test_token_validation():
+    """Test the token_validation function with concurrent validations.
+    :return:
+    """
+    async def validate():
+        async with openam.aio.AsyncOpenam(openam_url="http://openam.example.com:8080/openam/") as am:
+            auth_data = await am.authenticate(username="amadmin", password="password_openam")
+            results = await asyncio.gather(*[am.token_validation(token=auth_data['tokenId']) for _ in range(10)])
+            await am.logout()
+            return results
+    for data in run(validate()):
+        assert data['valid']
@@ -0,0 +1,192 @@
+"""Test script for the caches of python-openam"""
+
+import sys
+import os
+import time
+import pytest
+
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+import openam
+from openam.cache import CacheBackend, LRUCache, ServerInfoCache, shared_serverinfo_cache
+
+
+def test___init__max_entries():
+    """Test __init__ function with a wrong max_entries.
+    :return:
+    """
+    with pytest.raises(ValueError) as excinfo:
+        LRUCache(max_entries=0)
+    assert str(excinfo.value) == 'Please provide a max_entries of at least 1.'
+
+
+def test_get():
+    """Test the get function with an unknown and a known key.
+    :return:
+    """
+    cache = LRUCache()
+    assert cache.get('token') is None
+    assert cache.get('token', default=False) is False
+    cache.set('token', {'valid': True})
+    assert cache.get('token') == {'valid': True}
+
+
+def test_get_expired():
+    """Test the get function removes an expired entry.
+    :return:
+    """
+    cache = LRUCache(ttl=60)
+    cache.set('token', {'valid': True}, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get('token') is None
+    assert len(cache) == 0
+
+
+def test_set_evicts_least_recently_used():
+    """Test the set function removes the least recently used entry when the cache is full.
+    :return:
+    """
+    cache = LRUCache(max_entries=2)
+    cache.set('one', 1)
+    cache.set('two', 2)
+    cache.get('one')
+    cache.set('three', 3)
+    assert cache.get('two') is None
+    assert cache.get('one') == 1
+    assert cache.get('three') == 3
+
+
+def test_delete_and_clear():
+    """Test the delete and clear functions.
+    :return:
+    """
+    cache = LRUCache()
+    cache.set('one', 1)
+    cache.set('two', 2)
+    cache.delete('one')
+    cache.delete('unknown')
+    assert cache.get('one') is None
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_serverinfo_cache():
+    """Test the content is fetched once and revalidated with the ETag when it is expired.
+    :return:
+    """
+    fetched = []
+
+    def fetch(etag):
+        fetched.append(etag)
+        if etag == '"1"':
+            return 304, b'', '"1"'
+        return 200, b'{"cookieName": "iplanetDirectoryPro"}', '"1"'
+
+    cache = ServerInfoCache(ttl=60)
+    assert cache.get(('http://openam.example.com:8080/openam/', '*'), fetch) == b'{"cookieName": "iplanetDirectoryPro"}'
+    assert cache.get(('http://openam.example.com:8080/openam/', '*'), fetch) == b'{"cookieName": "iplanetDirectoryPro"}'
+    assert fetched == [None]
+
+    cache.ttl = 0
+    cache.delete(('http://openam.example.com:8080/openam/', '*'))
+    cache.get(('http://openam.example.com:8080/openam/', '*'), fetch)
+    assert cache.get(('http://openam.example.com:8080/openam/', '*'), fetch) == b'{"cookieName": "iplanetDirectoryPro"}'
+    assert fetched == [None, None, '"1"']
+
+
+def test_serverinfo_cache_error():
+    """Test a failed fetch is not cached.
+    :return:
+    """
+    cache = ServerInfoCache(ttl=60)
+    assert cache.get('key', lambda etag: (404, b'{}', None)) is None
+    assert cache.get('key', lambda etag: (200, b'{}', None)) == b'{}'
+
+
+def test_get_serverinfo_shared():
+    """Test instances with the same OpenAM URL share the serverinfo.
+    :return:
+    """
+    class Response(object):
+        status_code = 200
+        content = b'{"domains": [".example.com"]}'
+        headers = {'ETag': '"1"'}
+
+    requests = []
+
+    def get(uri, headers=None):
+        requests.append(uri)
+        return Response()
+
+    cache = ServerInfoCache(ttl=60)
+    for _ in range(2):
+        am = openam.Openam(openam_url="http://openam.example.com:8080/openam/", serverinfo_cache=cache)
+        am._get = get
+        assert am.get_serverinfo(property="cookieDomains") == {'domains': ['.example.com']}
+    assert requests == ['json/serverinfo/cookieDomains']
+    assert shared_serverinfo_cache(ttl=300) is openam.Openam(openam_url="http://openam.example.com:8080/openam/",
+                                                             serverinfo_ttl=300).serverinfo_cache
+
+
+def test_identity_cache():
+    """Test get_identity reads through the identity cache and writes invalidate it.
+    :return:
+    """
+    class Response(object):
+        status_code = 200
+        content = b'{"username": "demo", "mail": ["demo@example.com"], "cn": ["demo"]}'
+
+    requests = []
+
+    def request(uri, data=None, headers=None):
+        requests.append(uri)
+        return Response()
+
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/", identity_cache_size=10)
+    am._get = am._put = am._delete = am._post = request
+    assert am.get_identity(username="demo", fields="mail") == {'username': 'demo', 'mail': ['demo@example.com'],
+                                                               'cn': ['demo']}
+    assert len(am.identity_cache) == 0
+    assert am.get_identity(username="demo")['mail'] == ['demo@example.com']
+    assert am.get_identity(username="demo")['mail'] == ['demo@example.com']
+    assert am.get_identity(username="demo", fields="mail,sn") == {'mail': ['demo@example.com']}
+    assert requests == ['json/users/demo?_fields=mail', 'json/users/demo']
+
+    am.update_identity(username="demo", user_data={'mail': 'other@example.com'})
+    assert len(am.identity_cache) == 0
+    am.get_identity(username="demo")
+    am.change_password(username="demo", user_data={'userpassword': 'secret13'})
+    assert len(am.identity_cache) == 0
+    am.get_identity(username="demo")
+    am.delete_identity(username="demo")
+    assert len(am.identity_cache) == 0
+
+
+def test_identity_cache_invalidated_in_flight():
+    """Test a get_identity that was in flight during an invalidation doesn't cache the old identity.
+    :return:
+    """
+    class Response(object):
+        status_code = 200
+        content = b'{"username": "demo", "mail": ["old@example.com"]}'
+
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/", identity_cache_size=10)
+
+    def get(uri, data=None, headers=None):
+        am.invalidate_identity(username="demo")
+        return Response()
+
+    am._get = get
+    assert am.get_identity(username="demo")['mail'] == ['old@example.com']
+    assert len(am.identity_cache) == 0
+    assert am._identity_fetches == {}
+
+
+def test_cache_backend():
+    """Test the interface of a cache backend.
+    :return:
+    """
+    with pytest.raises(NotImplementedError):
+        CacheBackend().get('key')
+    assert isinstance(LRUCache(), CacheBackend)
@@ -0,0 +1,130 @@
+"""Test script for the record and replay of python-openam"""
+
+import sys
+import os
+import time
+
+import pytest
+import requests
+
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+import openam
+from openam.cassette import Cassette, CassetteError, RECORD, REPLAY, RECORDED
+
+
+def response(status_code, content, headers=None):
+    """Will return a response of OpenAM with the content.
+    :return:
+    """
+    result = requests.Response()
+    result.status_code = status_code
+    result.reason = 'OK' if status_code == 200 else 'Not Found'
+    result.headers = requests.structures.CaseInsensitiveDict(headers or {'Content-Type': 'application/json'})
+    result._content = content
+    result._content_consumed = True
+    return result
+
+
+def record(monkeypatch, path):
+    """Will record a session with an authentication and identities in a cassette.
+    :return:
+    """
+    responses = {
+        ('POST', 'json/authenticate'): response(200, b'{"tokenId": "AQIC5", "successUrl": "/openam/console"}'),
+        ('GET', 'json/users/demo'): response(200, b'{"username": "demo", "mail": ["demo@example.com"]}'),
+        ('GET', 'json/users/nobody'): response(404, b'{"code": 404}'),
+    }
+    sent = []
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/", cassette=Cassette(path, mode=RECORD))
+
+    def send(method, uri, data=None, headers=None, stream=False):
+        sent.append((method, uri))
+        return responses[(method, uri)]
+
+    monkeypatch.setattr(am, '_send', send)
+    am.authenticate(username="amadmin", password="password_openam")
+    am.get_identity(username="demo")
+    am.get_identity(username="nobody")
+    am.close()
+    return sent
+
+
+def test_record_replay(monkeypatch, tmpdir):
+    """Test the recorded responses are replayed without sending anything.
+    :return:
+    """
+    path = str(tmpdir.join('session.ndjson.gz'))
+    assert len(record(monkeypatch, path)) == 3
+
+    cassette = Cassette(path)
+    assert len(cassette) == 3
+    am = openam.Openam(openam_url="http://openam-test.example.com:8080/openam/", cassette=cassette)
+    monkeypatch.setattr(am, '_send', lambda *args, **kwargs: pytest.fail('request is sent'))
+    assert am.authenticate(username="amadmin", password="password_openam")['tokenId'] == 'AQIC5'
+    assert am.get_identity(username="demo")['mail'] == ['demo@example.com']
+    assert am.get_identity(username="demo")['mail'] == ['demo@example.com']
+    assert am.get_identity(username="nobody") is False
+
+
+def test_record_no_passwords(monkeypatch, tmpdir):
+    """Test the request headers, with the password, are not recorded.
+    :return:
+    """
+    path = str(tmpdir.join('session.ndjson'))
+    record(monkeypatch, path)
+    with open(path) as fileobj:
+        content = fileobj.read()
+    assert 'password_openam' not in content
+    assert 'AQIC5' in content
+
+
+def test_replay_unknown_request(monkeypatch, tmpdir):
+    """Test a request that is not recorded fails like a request that can't be sent.
+    :return:
+    """
+    path = str(tmpdir.join('session.ndjson'))
+    record(monkeypatch, path)
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/", cassette=Cassette(path))
+    with pytest.raises(CassetteError):
+        am.get_identity(username="other")
+
+
+def test_replay_latency(monkeypatch, tmpdir):
+    """Test the simulated latency of replayed requests.
+    :return:
+    """
+    path = str(tmpdir.join('session.ndjson'))
+    record(monkeypatch, path)
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/", cassette=Cassette(path, latency=0.05))
+    start = time.time()
+    am.get_identity(username="demo")
+    assert time.time() - start >= 0.05
+    assert Cassette(path, latency=RECORDED).latency == RECORDED
+
+
+def test_replay_stream(tmpdir):
+    """Test a replayed response can be read in chunks.
+    :return:
+    """
+    path = str(tmpdir.join('export.ndjson'))
+    cassette = Cassette(path, mode=RECORD)
+    cassette.play('GET', 'xacml/policies', send=lambda: response(200, b'<PolicySet/>', {'Content-Type': 'text/xml'}))
+    cassette.close()
+
+    replayed = Cassette(path, mode=REPLAY).play('GET', 'xacml/policies', stream=True)
+    assert b''.join(replayed.iter_content(chunk_size=4)) == b'<PolicySet/>'
+    assert replayed.headers['Content-Length'] == '12'
+
+
+def test_cassette_arguments(tmpdir):
+    """Test the arguments of the cassette.
+    :return:
+    """
+    with pytest.raises(ValueError):
+        Cassette(str(tmpdir.join('missing.ndjson')))
+    with pytest.raises(ValueError):
+        Cassette(str(tmpdir.join('session.ndjson')), mode='rewind')
+    with pytest.raises(ValueError):
+        Cassette(str(tmpdir.join('session.ndjson')), mode=RECORD, latency=-1)
@@ -0,0 +1,88 @@
+"""Test script for the circuit breaker of python-openam"""
+
+import sys
+import os
+import requests
+import pytest
+
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+import openam
+from openam.circuit import CircuitBreaker, CircuitOpenError
+
+
+def test___init__failure_threshold():
+    """Test __init__ function with a wrong failure_threshold.
+    :return:
+    """
+    with pytest.raises(ValueError) as excinfo:
+        CircuitBreaker(failure_threshold=0)
+    assert str(excinfo.value) == 'Please provide a failure_threshold of at least 1.'
+
+
+def test_failure():
+    """Test the circuit opens after the failure threshold and only for that endpoint.
+    :return:
+    """
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.failure('GET json/users/{id}')
+    breaker.before_request('GET json/users/{id}')
+    breaker.failure('GET json/users/{id}')
+    assert breaker.state('GET json/users/{id}') == 'open'
+    assert breaker.state('GET json/realms') == 'closed'
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request('GET json/users/{id}')
+
+
+def test_half_open():
+    """Test the circuit lets one request through after the reset timeout.
+    :return:
+    """
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.failure('GET json/users/{id}')
+    breaker.before_request('GET json/users/{id}')
+    assert breaker.state('GET json/users/{id}') == 'half_open'
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request('GET json/users/{id}')
+    breaker.failure('GET json/users/{id}')
+    assert breaker.state('GET json/users/{id}') == 'open'
+    breaker.before_request('GET json/users/{id}')
+    breaker.success('GET json/users/{id}')
+    assert breaker.state('GET json/users/{id}') == 'closed'
+
+
+def test_fail_fast():
+    """Test the requests fail fast when the circuit is open.
+    :return:
+    """
+    events = []
+    am = openam.Openam(openam_url="http://127.0.0.1:1/openam", observers=[events.append],
+                       circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    for _ in range(2):
+        assert 'error' in am._post(uri='json/users/demo', data='{}')
+    data = am._post(uri='json/users/demo', data='{}')
+    assert isinstance(data['error'], CircuitOpenError)
+    assert len(events) == 2
+    data = am._post(uri='json/users/bjensen', data='{}')
+    assert isinstance(data['error'], CircuitOpenError)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        am._get(uri='json/users/demo')
+    assert len(events) == 3
+
+
+def test_half_open_other_error(monkeypatch):
+    """Test a probe that fails with another error opens the circuit again, instead of keeping it half open.
+    :return:
+    """
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/", circuit_breaker=breaker)
+    errors = [requests.exceptions.ConnectionError(), requests.exceptions.ChunkedEncodingError()]
+
+    def send(*args, **kwargs):
+        raise errors.pop(0)
+
+    monkeypatch.setattr(am, '_limited_send', send)
+    assert isinstance(am._post(uri='json/users/demo', data='{}')['error'], requests.exceptions.ConnectionError)
+    assert isinstance(am._post(uri='json/users/demo', data='{}')['error'], requests.exceptions.ChunkedEncodingError)
+    assert breaker.state('POST json/users/{id}') == 'open'
@@ -0,0 +1,106 @@
+"""Test script for the cluster interface of python-openam"""
+
+import sys
+import os
+import requests
+import pytest
+
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+from urllib3.exceptions import ProtocolError
+
+from openam.cluster import OpenamCluster
+
+
+def test___init__openam_urls():
+    """Test __init__ function if openam_urls is provided.
+    :return:
+    """
+    with pytest.raises(ValueError) as excinfo:
+        OpenamCluster()
+    assert str(excinfo.value) == 'This interface needs a list of OpenAM URLs to work!'
+
+
+def test___init__wrong_strategy():
+    """Test __init__ function with a wrong strategy.
+    :return:
+    """
+    with pytest.raises(ValueError) as excinfo:
+        OpenamCluster(openam_urls=["http://openam.example.com:8080/openam"], strategy="random")
+    assert str(excinfo.value) == "Please provide a correct strategy: 'round_robin' or 'least_outstanding'."
+
+
+def test__select_node_round_robin():
+    """Test the _select_node function distributes over all servers.
+    :return:
+    """
+    am = OpenamCluster(openam_urls=["http://openam1.example.com:8080/openam", "http://openam2.example.com:8080/openam"])
+    data = [am._select_node(exclude=[]).openam_url for _ in range(4)]
+    assert data == ["http://openam1.example.com:8080/openam", "http://openam2.example.com:8080/openam"] * 2
+
+
+def test__select_node_least_outstanding():
+    """Test the _select_node function selects the server with the least requests in flight.
+    :return:
+    """
+    am = OpenamCluster(openam_urls=["http://openam1.example.com:8080/openam", "http://openam2.example.com:8080/openam"],
+                       strategy="least_outstanding")
+    first = am._select_node(exclude=[])
+    second = am._select_node(exclude=[])
+    assert first is not second
+    second.outstanding -= 1
+    assert am._select_node(exclude=[]) is second
+
+
+def test__request_failover():
+    """Test the _request function marks unreachable servers as unhealthy and raises when all servers failed.
+    :return:
+    """
+    am = OpenamCluster(openam_urls=["http://127.0.0.1:1/openam", "http://127.0.0.1:2/openam"], retry_interval=60)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        am._get(uri='json/serverinfo/*')
+    assert [node.healthy for node in am.nodes] == [False, False]
+    assert [node.outstanding for node in am.nodes] == [0, 0]
+    data = am._post(uri='json/serverinfo/*', data='{}')
+    assert 'error' in data
+
+
+def test_authenticate():
+    """Test the authentication function when the first server is unreachable.
+    :return:
+    """
+    am = OpenamCluster(openam_urls=["http://127.0.0.1:1/openam/", "http://openam.example.com:8080/openam/"])
+    auth_data = am.authenticate(username="amadmin", password="password_openam")
+    am.logout()
+    am.close()
+    assert auth_data['successUrl'] == '/openam/console'
+    assert not am.nodes[0].healthy
+
+
+def test__request_failover_sent(monkeypatch):
+    """Test a request that changes something is not done on the next server when it may have been received.
+    :return:
+    """
+    am = OpenamCluster(openam_urls=["http://openam1.example.com/openam", "http://openam2.example.com/openam"])
+    paths = []
+
+    def request(method, path, **kwargs):
+        paths.append(path)
+        raise requests.exceptions.ConnectionError(ProtocolError('Connection aborted.'))
+
+    monkeypatch.setattr(am.session, 'request', request)
+    assert 'error' in am._post(uri='json/users/?_action=create', data='{}')
+    assert len(paths) == 1
+    with pytest.raises(requests.exceptions.ConnectionError):
+        am._get(uri='json/serverinfo/*')
+    assert len(paths) == 3
+
+
+def test__request_failover_not_sent():
+    """Test a request that changes something is done on the next server when the connection was refused.
+    :return:
+    """
+    am = OpenamCluster(openam_urls=["http://127.0.0.1:1/openam", "http://127.0.0.1:2/openam"], retry_interval=60)
+    am._post(uri='json/users/?_action=create', data='{}')
+    assert [node.healthy for node in am.nodes] == [False, False]
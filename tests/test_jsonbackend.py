@@ -0,0 +1,66 @@
+"""Test script for the JSON backends of python-openam"""
+
+import sys
+import os
+import pytest
+
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+import openam
+from openam.jsonbackend import JsonBackend, get_backend
+
+
+def test_get_backend_default():
+    """Test the json module of the standard library is the default backend.
+    :return:
+    """
+    backend = get_backend()
+    assert backend.name == 'json'
+    assert backend.loads(b'{"username": "demo"}') == {'username': 'demo'}
+    assert backend.loads('{"username": "demo"}') == {'username': 'demo'}
+
+
+def test_get_backend_wrong():
+    """Test get_backend with a wrong backend.
+    :return:
+    """
+    with pytest.raises(ValueError) as excinfo:
+        get_backend('simplejson')
+    assert str(excinfo.value) == "Please provide a correct JSON backend: 'json', 'orjson', 'ujson' or 'auto'."
+
+
+def test_get_backend_auto():
+    """Test 'auto' returns a working backend.
+    :return:
+    """
+    backend = get_backend('auto')
+    assert backend.name in ['orjson', 'ujson', 'json']
+    assert backend.loads(backend.dumps({'realm': '/'}).encode('utf-8')) == {'realm': '/'}
+
+
+def test_get_backend_orjson():
+    """Test the orjson backend encodes to str.
+    :return:
+    """
+    pytest.importorskip('orjson')
+    backend = get_backend('orjson')
+    assert backend.dumps({'username': 'demo'}) == '{"username":"demo"}'
+    assert backend.loads(b'{"username": "demo"}') == {'username': 'demo'}
+
+
+def test_json_backend():
+    """Test an Openam instance uses its backend for request bodies and responses.
+    :return:
+    """
+    calls = []
+    backend = JsonBackend(name='custom', dumps=lambda data: calls.append('dumps') or 'encoded',
+                          loads=lambda data: calls.append(data) or {'decoded': True})
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/", json_backend=backend)
+    assert am._to_string(data={'username': 'demo'}) == 'encoded'
+
+    class Response(object):
+        content = b'{}'
+
+    assert am._json(Response()) == {'decoded': True}
+    assert calls == ['dumps', b'{}']
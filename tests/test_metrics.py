@@ -0,0 +1,67 @@
+"""Test script for the instrumentation of python-openam"""
+
+import sys
+import os
+import requests
+
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+import openam
+from openam.metrics import PrometheusCollector, RequestEvent, endpoint_template
+
+
+def test_endpoint_template():
+    """Test the endpoint_template function with and without realm, id and action.
+    :return:
+    """
+    assert endpoint_template('json/users/demo') == 'json/users/{id}'
+    assert endpoint_template('json/myRealm/sub/users/demo?_fields=mail') == 'json/{realm}/users/{id}'
+    assert endpoint_template('json/users/?_action=create') == 'json/users?_action=create'
+    assert endpoint_template('json/sessions/AQIC5w?_action=validate') == 'json/sessions/{id}?_action=validate'
+    assert endpoint_template('xacml/policies?dryrun=true') == 'xacml/policies'
+    assert endpoint_template('wrong_uri') == 'wrong_uri/{path}'
+
+
+def test_prometheus_collector():
+    """Test the PrometheusCollector with two events.
+    :return:
+    """
+    collector = PrometheusCollector(buckets=(0.1, 1.0))
+    collector(RequestEvent('GET', 'json/users/{id}', 200, 0, 120, 0.05, 0.04, 0, None))
+    collector(RequestEvent('GET', 'json/users/{id}', None, 0, 0, 0.5, None, 1, Exception()))
+    data = collector.render()
+    assert 'openam_requests_total{method="GET",endpoint="json/users/{id}",status="200"} 1' in data
+    assert 'openam_requests_total{method="GET",endpoint="json/users/{id}",status="error"} 1' in data
+    assert 'openam_request_duration_seconds_bucket{method="GET",endpoint="json/users/{id}",le="0.1"} 1' in data
+    assert 'openam_request_duration_seconds_bucket{method="GET",endpoint="json/users/{id}",le="+Inf"} 2' in data
+    assert 'openam_bytes_received_total{method="GET",endpoint="json/users/{id}"} 120' in data
+    assert 'openam_retries_total{method="GET",endpoint="json/users/{id}"} 1' in data
+
+
+def test_observer_error():
+    """Test an observer is called when OpenAM can't be reached.
+    :return:
+    """
+    events = []
+    am = openam.Openam(openam_url="http://127.0.0.1:1/openam", observers=[events.append])
+    data = am._post(uri='json/users/demo', data='{}')
+    assert 'error' in data
+    assert events[0].method == 'POST'
+    assert events[0].endpoint == 'json/users/{id}'
+    assert events[0].status_code is None
+    assert events[0].bytes_sent == 2
+    assert isinstance(events[0].error, requests.exceptions.ConnectionError)
+
+
+def test_observer():
+    """Test an observer is called after a request.
+    :return:
+    """
+    events = []
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+    am.add_observer(events.append)
+    am.get_serverinfo()
+    assert events[0].endpoint == 'json/serverinfo/{id}'
+    assert events[0].status_code == 200
+    assert events[0].bytes_received > 0
@@ -0,0 +1,111 @@
+"""Test script for the response models of python-openam"""
+
+import sys
+import os
+import json
+import pickle
+import pytest
+
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+import openam
+from openam.jsonbackend import JsonBackend
+from openam.models import Identity, Realm, ResourceType
+
+IDENTITY = {'username': 'demo', 'realm': '/', 'dn': ['uid=demo,ou=people,dc=openam,dc=forgerock,dc=org'],
+            'mail': ['demo@example.com'], 'objectclass': ['top', 'person']}
+
+
+def test_identity():
+    """Test the attributes of an identity are decoded on use.
+    :return:
+    """
+    identity = Identity(b'{"username": "demo", "mail": ["demo@example.com"], "objectclass": ["top", "person"]}')
+    assert identity.username == 'demo'
+    assert identity.mail == 'demo@example.com'
+    assert identity['mail'] == ['demo@example.com']
+    assert identity.objectclass == ['top', 'person']
+    assert identity.realm is None
+    assert 'mail' in identity
+    with pytest.raises(AttributeError):
+        identity.telephoneNumber
+
+
+def test_identity_decoded_once():
+    """Test the JSON is decoded once, and compact() keeps only the JSON again.
+    :return:
+    """
+    decoded = []
+
+    def loads(data):
+        decoded.append(data)
+        return json.loads(data)
+
+    backend = JsonBackend(name='counting', dumps=json.dumps, loads=loads)
+    identity = Identity.from_dict(IDENTITY, json_backend=backend)
+    assert repr(identity).startswith('Identity({')
+    assert identity.username == 'demo'
+    assert identity.mail == 'demo@example.com'
+    assert identity['objectclass'] == ['top', 'person']
+    assert len(decoded) == 1
+    identity.compact()
+    assert identity == IDENTITY
+    assert len(decoded) == 2
+    assert pickle.loads(pickle.dumps(identity)) == identity
+
+
+def test_identity_slots():
+    """Test a model has no instance dict.
+    :return:
+    """
+    identity = Identity.from_dict(IDENTITY)
+    assert not hasattr(identity, '__dict__')
+    with pytest.raises(AttributeError):
+        identity.mail = 'other@example.com'
+
+
+def test_round_trip():
+    """Test a model can be converted from and to a dict.
+    :return:
+    """
+    identity = Identity.from_dict(IDENTITY)
+    assert identity.to_dict() == IDENTITY
+    assert identity == IDENTITY
+    assert identity == Identity.from_dict(IDENTITY)
+    assert identity != Identity.from_dict({'username': 'bjensen'})
+    assert pickle.loads(pickle.dumps(identity)) == identity
+
+
+def test_realm_resourcetype():
+    """Test the properties of a realm and a resourcetype.
+    :return:
+    """
+    assert Realm(b'{"serviceNames": ["sunAMDelegationService"]}').service_names == ['sunAMDelegationService']
+    resourcetype = ResourceType.from_dict({'uuid': '20a13582', 'name': 'URL', 'patterns': ['*://*:*/*'],
+                                           'actions': {'GET': True}})
+    assert resourcetype.uuid == '20a13582'
+    assert resourcetype.patterns == ['*://*:*/*']
+    assert resourcetype.actions == {'GET': True}
+
+
+def test_response_models():
+    """Test an Openam instance returns models when response models are enabled.
+    :return:
+    """
+    class Response(object):
+        status_code = 200
+        content = b'{"username": "demo", "mail": ["demo@example.com"]}'
+
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/", response_models=True)
+    am._get = lambda uri, headers=None: Response()
+    identity = am.get_identity(username="demo")
+    assert isinstance(identity, Identity)
+    assert identity.mail == 'demo@example.com'
+
+    Response.content = b'{"result": [{"username": "demo"}, {"username": "bjensen"}], "resultCount": 2}'
+    identities = am.list_identities()
+    assert [identity.username for identity in identities['result']] == ['demo', 'bjensen']
+
+    am.response_models = False
+    assert am.list_identities()['result'] == [{'username': 'demo'}, {'username': 'bjensen'}]
@@ -2,6 +2,9 @@
 
 import sys
 import os
+import io
+import json
+import xml.etree.ElementTree as ElementTree
 import requests
 import pytest
 
@@ -9,6 +12,7 @@ my_path = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, my_path + '/../')
 
 import openam
+import openam._helpers
 
 
 @pytest.fixture
@@ -27,6 +31,25 @@ def test___init__openam_url():
     assert excinfo.value.message == 'This interface needs an OpenAM URL to work!'
 
 
+def test___init__session():
+    """Test __init__ function creates one session with the pooled adapter.
+    :return:
+    """
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam", pool_maxsize=20)
+    adapter = am.session.get_adapter('http://openam.example.com:8080/openam')
+    assert adapter is am.session.get_adapter('https://openam.example.com/openam')
+    assert adapter._pool_maxsize == 20
+    am.close()
+
+
+def test___enter__():
+    """Test the Openam class as a context manager.
+    :return:
+    """
+    with openam.Openam(openam_url="http://openam.example.com:8080/openam") as am:
+        assert isinstance(am.session, requests.Session)
+
+
 def test__get():
     """Test the _get function with wrong_uri.
     :return:
@@ -182,6 +205,46 @@ def test_authenticate():
     assert auth_data['successUrl'] == '/openam/console'
 
 
+def test_authenticate_headers():
+    """Test the authentication function doesn't leak the credentials into the headers of other requests.
+    :return:
+    """
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+    auth_data = am.authenticate(username="amadmin", password="password_openam")
+    headers = am.headers
+    headers['X-Test'] = 'test'
+    assert 'X-OpenAM-Password' not in am.headers
+    assert 'X-Test' not in am.headers
+    assert am.headers[am.cookiename] == auth_data['tokenId']
+    am.logout()
+    assert am.headers[am.cookiename] is None
+
+
+def test_headers():
+    """Test the headers property without a session.
+    :return:
+    """
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+    assert am.headers == {'Content-Type': 'application/json', 'iplanetDirectoryPro': None}
+    assert am.realm is None
+
+
+def test_authenticate_reauthenticate():
+    """Test the session is renewed when it is expired.
+    :return:
+    """
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/", reauthenticate=True)
+    auth_data = am.authenticate(username="amadmin", password="password_openam")
+    assert am._context.expires > 0
+    admin = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+    admin._context = am._context
+    admin.logout()
+    data = am.get_identity(username="demo")
+    assert data['username'] == 'demo'
+    assert am.headers[am.cookiename] != auth_data['tokenId']
+    am.logout()
+
+
 def test_authenticate_wrong_realm():
     """Test the authentication function with a wrong realm.
     :return:
@@ -297,6 +360,47 @@ def test_token_validation_wrong_realm():
     assert not data
 
 
+def test_token_validation_cache():
+    """Test the token_validation function with the token cache enabled.
+    :return:
+    """
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/", token_cache_size=10)
+    auth_data = am.authenticate(username="amadmin", password="password_openam")
+    data = am.token_validation(token=auth_data['tokenId'])
+    assert am.token_cache.get((None, auth_data['tokenId'])) == data
+    assert am.token_validation(token=auth_data['tokenId']) == data
+    assert am.token_validation(realm='wrongrealm', token=auth_data['tokenId']) is False
+    am.logout()
+    assert am.token_cache.get((None, auth_data['tokenId'])) is None
+
+
+def test_token_validation_cache_realm(monkeypatch):
+    """Test the token cache keeps the validation per realm, and invalidate_token removes it for all realms.
+    :return:
+    """
+    uris = []
+
+    def _post(uri, data=None, headers=None, idempotent=False):
+        uris.append(uri)
+        response = requests.Response()
+        response.status_code = 200
+        valid = not uri.startswith('json/wrongrealm/')
+        response._content = json.dumps({'valid': valid, 'realm': '/'} if valid else {'valid': False}).encode('utf-8')
+        return response
+
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/", token_cache_size=10)
+    monkeypatch.setattr(am, '_post', _post)
+    monkeypatch.setattr(am, 'session_information', lambda action=None, token=None: {'timeleft': 60})
+    assert am.token_validation(token='AQIC5')['valid'] is True
+    assert am.token_validation(realm='myRealm', token='AQIC5')['valid'] is True
+    assert am.token_validation(realm='wrongrealm', token='AQIC5')['valid'] is False
+    assert am.token_validation(token='AQIC5')['valid'] is True
+    assert len(uris) == 3
+    am.invalidate_token(token='AQIC5')
+    assert am.token_cache.get((None, 'AQIC5')) is None
+    assert am.token_cache.get(('myRealm', 'AQIC5')) is None
+
+
 def test_session_information():
     """Validate if a token is Active.
     :return:
@@ -435,6 +539,90 @@ def test_list_identities_user_demo_wrong_type():
     assert username == "demo"
 
 
+def test_iter_identities():
+    """Test the iter_identities function with a small page size.
+    :return:
+    """
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+    am.authenticate(username="amadmin", password="password_openam")
+    data = []
+    for identity in am.iter_identities(page_size=1):
+        # OpenAM 13 returns the identities, OpenAM 12 only their names.
+        data.append(identity['username'] if isinstance(identity, dict) else identity)
+    am.logout()
+    assert 'amadmin' in data
+    assert 'demo' in data
+    assert len(data) == len(set(data))
+
+
+def test_iter_identities_cookie(monkeypatch):
+    """Test the iter_identities function follows the pagedResultsCookie.
+    :return:
+    """
+    pages = {
+        '_pagedResultsOffset=0': {'result': [{'username': 'one'}, {'username': 'two'}], 'pagedResultsCookie': 'c=1'},
+        '_pagedResultsCookie=c%3D1': {'result': [{'username': 'three'}], 'pagedResultsCookie': None},
+    }
+    uris = []
+
+    def _get(uri, headers=None):
+        uris.append(uri)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(pages[uri.split('&')[-1]]).encode('utf-8')
+        return response
+
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+    monkeypatch.setattr(am, '_get', _get)
+    data = [identity['username'] for identity in am.iter_identities(page_size=2)]
+    assert data == ['one', 'two', 'three']
+    assert uris[0] == 'json/users/?_queryID=*&_pageSize=2&_pagedResultsOffset=0'
+
+
+def test_iter_identities_paging_ignored(monkeypatch):
+    """Test the iter_identities function stops when OpenAM ignores the paging and returns the same page again.
+    :return:
+    """
+    uris = []
+
+    def _get(uri, headers=None):
+        uris.append(uri)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({'result': ['one', 'two'], 'pagedResultsCookie': None}).encode('utf-8')
+        return response
+
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/", response_models=True)
+    monkeypatch.setattr(am, '_get', _get)
+    data = list(am.iter_identities(page_size=2))
+    assert data == ['one', 'two']
+    assert len(uris) == 2
+
+
+def test_iter_identities_remaining(monkeypatch):
+    """Test the iter_identities function stops when OpenAM reports there are no remaining results.
+    :return:
+    """
+    pages = {
+        '_pagedResultsOffset=0': {'result': [{'username': 'one'}], 'remainingPagedResults': 1},
+        '_pagedResultsOffset=1': {'result': [{'username': 'two'}], 'remainingPagedResults': 0},
+    }
+    uris = []
+
+    def _get(uri, headers=None):
+        uris.append(uri)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(pages[uri.split('&')[-1]]).encode('utf-8')
+        return response
+
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+    monkeypatch.setattr(am, '_get', _get)
+    data = [identity['username'] for identity in am.iter_identities(page_size=1)]
+    assert data == ['one', 'two']
+    assert len(uris) == 2
+
+
 def test_get_identity_no_username():
     """ Will get an identity if no username is provided.
     :return:
@@ -530,6 +718,76 @@ def test_update_identity_no_user_data():
     assert excinfo.value.message == 'Please provide correct user information.'
 
 
+def test_imap_unordered():
+    """Test the imap_unordered function never has more items in flight than the concurrency.
+    :return:
+    """
+    consumed = []
+
+    def items():
+        for number in range(20):
+            consumed.append(number)
+            yield number
+
+    generator = openam._helpers.imap_unordered(lambda number: number * 2, items(), concurrency=4)
+    item, result, error = next(generator)
+    assert len(consumed) <= 4
+    assert result == item * 2
+    assert error is None
+    assert sorted([result for _, result, _ in generator] + [result]) == [number * 2 for number in range(20)]
+
+
+def test_imap_unordered_error():
+    """Test the imap_unordered function with a function that raises.
+    :return:
+    """
+    def fail(item):
+        raise ValueError(item)
+
+    data = list(openam._helpers.imap_unordered(fail, ['user'], concurrency=2))
+    assert data[0][0] == 'user'
+    assert isinstance(data[0][2], ValueError)
+
+
+def test_bulk_create_identities():
+    """Test the bulk_create_identities function.
+    :return:
+    """
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+    am.authenticate(username="amadmin", password="password_openam")
+    users = ({"username": "bulk%d" % number, "userpassword": "secret12"} for number in range(5))
+    data = list(am.bulk_create_identities(identities=users, concurrency=3))
+    conflicts = list(am.bulk_create_identities(identities=[{"username": "bulk0", "userpassword": "secret12"}]))
+    deleted = list(am.bulk_delete_identities(usernames=["bulk%d" % number for number in range(5)]))
+    am.logout()
+    assert sorted([report['status'] for report in data]) == ['created'] * 5
+    assert conflicts[0]['status'] == 'conflict'
+    assert [report['status'] for report in deleted] == ['deleted'] * 5
+
+
+def test_bulk_create_identities_connection_error():
+    """Test the bulk_create_identities function reports the error when OpenAM can't be reached.
+    :return:
+    """
+    am = openam.Openam(openam_url="http://127.0.0.1:1/openam/")
+    created = list(am.bulk_create_identities(identities=[{"username": "bulk0", "userpassword": "secret12"}]))
+    deleted = list(am.bulk_delete_identities(usernames=["bulk0"]))
+    assert created[0]['status'] == 'failed'
+    assert isinstance(created[0]['result'], requests.exceptions.ConnectionError)
+    assert deleted[0]['status'] == 'failed'
+    assert isinstance(deleted[0]['result'], requests.exceptions.ConnectionError)
+
+
+def test_bulk_create_identities_no_identities():
+    """Test the bulk_create_identities function without identities.
+    :return:
+    """
+    with pytest.raises(ValueError) as excinfo:
+        am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+        am.bulk_create_identities()
+    assert str(excinfo.value) == 'Please provide the identities.'
+
+
 def test_change_password():
     """Will change a password.
     :return:
@@ -926,6 +1184,66 @@ def test_delete_resourcetypes_no_uuid():
     assert excinfo.value.message == 'Please provide a uuid for a resourcetype.'
 
 
+POLICY_SET = (b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+              b'<PolicySet xmlns="urn:oasis:names:tc:xacml:3.0:core:schema:wd-17" PolicySetId="export">'
+              b'<Policy PolicyId="one"><Target/></Policy><Policy PolicyId="two"><Target/></Policy></PolicySet>')
+
+
+def _streamed_get(uri, headers=None, stream=False):
+    """Will return a response with the PolicySet as body that is not read yet.
+    :return:
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(POLICY_SET)
+    return response
+
+
+def test_export_xacml_policies_fileobj(monkeypatch):
+    """Test the xacml_export_policies function writes the PolicySet to a file in chunks.
+    :return:
+    """
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+    monkeypatch.setattr(am, '_get', _streamed_get)
+    fileobj = io.BytesIO()
+    assert am.xacml_export_policies(fileobj=fileobj, chunk_size=16) == len(POLICY_SET)
+    assert fileobj.getvalue() == POLICY_SET
+
+
+def test_iter_xacml_policies(monkeypatch):
+    """Test the iter_xacml_policies function yields every policy.
+    :return:
+    """
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+    monkeypatch.setattr(am, '_get', _streamed_get)
+    assert [policy.get('PolicyId') for policy in am.iter_xacml_policies()] == ['one', 'two']
+
+
+def test_import_xacml_policies(monkeypatch):
+    """Test the xacml_import_policies function imports the policies in batches and reports per policy.
+    :return:
+    """
+    uris = []
+
+    def _post(uri, data=None, headers=None, idempotent=False):
+        uris.append(uri)
+        names = [policy.get('PolicyId') for policy in ElementTree.fromstring(data)]
+        if 'three' in names:
+            return {'error': requests.exceptions.ConnectionError('failed')}
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps([{'status': 'CREATE', 'name': name} for name in names]).encode('utf-8')
+        return response
+
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+    monkeypatch.setattr(am, '_post', _post)
+    policies = POLICY_SET.replace(b'</PolicySet>', b'<Policy PolicyId="three"><Target/></Policy></PolicySet>')
+    reports = list(am.xacml_import_policies(policies=io.BytesIO(policies), batch_size=2, dryrun=True))
+    assert sorted((report['item'], report['status']) for report in reports) == [
+        ('one', 'create'), ('three', 'failed'), ('two', 'create')]
+    assert uris == ['xacml/policies?dryrun=true'] * 2
+
+
 def test_export_xacml_policies(openam_version):
     """Will export all available xacml policies.
     :return:
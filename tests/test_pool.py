@@ -0,0 +1,53 @@
+"""Test script for the session pool of python-openam"""
+
+import sys
+import os
+import pytest
+
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+from openam.pool import SessionPool
+
+
+def test___init__size():
+    """Test __init__ function with a wrong size.
+    :return:
+    """
+    with pytest.raises(ValueError) as excinfo:
+        SessionPool(openam_url="http://openam.example.com:8080/openam/", size=0)
+    assert str(excinfo.value) == 'Please provide a size of at least 1.'
+
+
+def test___init__wrong_password():
+    """Test __init__ function with a wrong password.
+    :return:
+    """
+    with pytest.raises(ValueError) as excinfo:
+        SessionPool(openam_url="http://openam.example.com:8080/openam/", username="amadmin", password="wrong_password")
+    assert str(excinfo.value) == 'Could not login with the provided credentials.'
+
+
+def test_session():
+    """Test every checked out instance has its own session.
+    :return:
+    """
+    with SessionPool(openam_url="http://openam.example.com:8080/openam/", username="amadmin",
+                     password="password_openam", size=2) as pool:
+        first = pool.checkout()
+        with pool.session() as second:
+            assert first.headers[first.cookiename] != second.headers[second.cookiename]
+            assert second.get_identity(username="demo")['username'] == 'demo'
+        pool.checkin(first)
+
+
+def test_validate():
+    """Test the validate function renews a session that is logged out.
+    :return:
+    """
+    with SessionPool(openam_url="http://openam.example.com:8080/openam/", username="amadmin",
+                     password="password_openam", size=2) as pool:
+        with pool.session() as am:
+            am.logout()
+        assert pool.validate() == 1
+        assert pool.validate() == 0
@@ -0,0 +1,99 @@
+"""Test script for the realm tree walker of python-openam"""
+
+import sys
+import os
+import threading
+import time
+
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+import openam
+from openam.realmtree import RealmNode, walk_realms
+
+REALMS = {
+    None: ['/', '/a', '/b'],
+    'a': ['/a', '/a/one', '/a/two'],
+    'b': ['/b'],
+    'a/one': ['/a/one'],
+    'a/two': ['/a/two'],
+}
+
+
+def openam_realms(monkeypatch, realms=REALMS):
+    """Will return an Openam instance with a realm tree.
+    :return:
+    """
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+    monkeypatch.setattr(am, 'list_realms', lambda realm=None: {'result': realms[realm]})
+    monkeypatch.setattr(am, 'get_realm', lambda realm=None: {'name': realm} if realm in realms else False)
+    return am
+
+
+def test_walk_realms(monkeypatch):
+    """Test the realm tree is discovered breadth-first, with the data of every realm.
+    :return:
+    """
+    tree = walk_realms(openam_realms(monkeypatch), concurrency=4)
+    assert [node.path for node in tree][:3] == ['/', '/a', '/b']
+    assert sorted(node.path for node in tree) == ['/', '/a', '/a/one', '/a/two', '/b']
+    node = tree.find('a/two')
+    assert node.name == 'two'
+    assert node.depth == 2
+    assert node.parent.path == '/a'
+    assert node.data == {'name': 'a/two'}
+    assert tree.data == {}
+    assert tree.find('/c') is None
+
+
+def test_walk_realms_relative(monkeypatch):
+    """Test sub realms that are returned relative to their parent, and deeper sub realms, are found once.
+    :return:
+    """
+    realms = {None: ['/', 'a', 'a/deep'], 'a': ['deep'], 'a/deep': []}
+    tree = walk_realms(openam_realms(monkeypatch, realms), details=False)
+    assert [node.path for node in tree] == ['/', '/a', '/a/deep']
+    assert tree.find('/a/deep').data is None
+
+
+def test_walk_realms_visitor(monkeypatch):
+    """Test the visitor runs in parallel with the discovery and its result is kept.
+    :return:
+    """
+    am = openam_realms(monkeypatch)
+    seen = []
+    lock = threading.Lock()
+
+    def visitor(node):
+        with lock:
+            seen.append(node.path)
+        time.sleep(0.01)
+        return node.data['name']
+
+    tree = walk_realms(am, concurrency=5, visitor=visitor)
+    assert sorted(seen) == ['/', '/a', '/a/one', '/a/two', '/b']
+    assert tree.find('/a/one').result == 'a/one'
+
+
+def test_walk_realms_errors(monkeypatch):
+    """Test a failure is kept in the realm and the walk continues.
+    :return:
+    """
+    realms = dict(REALMS)
+    del realms['a/one']
+    tree = walk_realms(openam_realms(monkeypatch, realms))
+    assert isinstance(tree.find('/a/one').error, Exception)
+    assert tree.find('/a/two').error is None
+    assert tree.find('/a/two').data == {'name': 'a/two'}
+
+
+def test_realm_node():
+    """Test the realm node.
+    :return:
+    """
+    root = RealmNode('/')
+    child = RealmNode('/a', parent=root)
+    root.children.append(child)
+    assert root.name == '/'
+    assert list(root) == [root, child]
+    assert repr(root) == "RealmNode('/', children=1)"
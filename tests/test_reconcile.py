@@ -0,0 +1,107 @@
+"""Test script for the reconciler of python-openam"""
+
+import sys
+import os
+import pytest
+
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+import openam
+from openam.reconcile import Change, Reconciler
+
+DESIRED = {
+    'realms': {'/myRealm': {'active': True}, '/myRealm/sub': {}},
+    'identities': {'/': {'users': {'demo': {'mail': 'demo@example.com', 'userpassword': 'secret12'},
+                                   'bjensen': {'mail': 'bjensen@example.com'}}}},
+    'resourcetypes': {'/': {'My Type': {'patterns': ['http://example.com/*'], 'actions': {'GET': True}}}},
+}
+
+CURRENT = {
+    'realms': {'/myRealm': {'active': True, 'serviceNames': ['iPlanetAMAuthService']}},
+    'identities': {'/': {'users': {'demo': {'username': 'demo', 'mail': ['demo@example.com']},
+                                   'amadmin': {'username': 'amadmin'}}}},
+    'resourcetypes': {'/': {'My Type': {'uuid': '20a13582', 'name': 'My Type', 'patterns': ['http://example.com/*'],
+                                        'actions': {'GET': False}, 'creationDate': 1472947547951}}},
+}
+
+
+def test___init__concurrency():
+    """Test __init__ function with a wrong concurrency.
+    :return:
+    """
+    with pytest.raises(ValueError) as excinfo:
+        Reconciler(openam.Openam(openam_url="http://openam.example.com:8080/openam/"), concurrency=0)
+    assert str(excinfo.value) == 'Please provide a concurrency of at least 1.'
+
+
+def test_plan():
+    """Test only the differences are planned.
+    :return:
+    """
+    reconciler = Reconciler(openam.Openam(openam_url="http://openam.example.com:8080/openam/"))
+    changes = reconciler.plan(DESIRED, current=CURRENT)
+    assert changes == [
+        Change('create', 'realms', '/myRealm/sub', None, '/myRealm/sub', {'realm': 'myRealm/sub'}, None),
+        Change('create', 'identities', '/', 'users', 'bjensen', {'username': 'bjensen', 'mail': 'bjensen@example.com'},
+               None),
+        Change('update', 'resourcetypes', '/', None, 'My Type', {'name': 'My Type', 'patterns': ['http://example.com/*'],
+                                                                 'actions': {'GET': True}}, '20a13582'),
+    ]
+
+
+def test_plan_prune(monkeypatch):
+    """Test objects that are not in the desired state are deleted with prune, except the built-in identities, the
+    authenticated user and the protected identities.
+    :return:
+    """
+    current = {
+        'realms': CURRENT['realms'],
+        'identities': {'/': {'users': dict(CURRENT['identities']['/']['users'], olduser={'username': 'olduser'},
+                                           operator={'username': 'operator'}, backup={'username': 'backup'})}},
+        'resourcetypes': CURRENT['resourcetypes'],
+    }
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+    am._context = am._context._replace(token='AQIC5')
+    monkeypatch.setattr(am, 'token_validation',
+                        lambda realm=None, token=None: {'valid': True, 'uid': 'operator', 'realm': '/'})
+    reconciler = Reconciler(am, prune=True, protected=['backup'])
+    deleted = [change.name for change in reconciler.plan(DESIRED, current=current) if change.action == 'delete']
+    assert deleted == ['olduser']
+
+
+def test_apply(monkeypatch):
+    """Test the changes are applied, parent realms first.
+    :return:
+    """
+    calls = []
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+    monkeypatch.setattr(am, 'create_realm', lambda realm_data: calls.append(realm_data['realm']) or {})
+    monkeypatch.setattr(am, 'update_identity', lambda **kwargs: calls.append(kwargs['username']) or {'code': 500})
+    changes = [
+        Change('update', 'identities', '/', 'users', 'demo', {'mail': 'demo@example.com'}, None),
+        Change('create', 'realms', '/a/b', None, '/a/b', {'realm': 'a/b'}, None),
+        Change('create', 'realms', '/a', None, '/a', {'realm': 'a'}, None),
+    ]
+    reports = list(Reconciler(am).apply(changes))
+    assert calls == ['a', 'a/b', 'demo']
+    assert [report['status'] for report in reports] == ['applied', 'applied', 'failed']
+
+
+def test_fetch(monkeypatch):
+    """Test the current state is fetched for nested realms, the root realm and identities of OpenAM 12.
+    :return:
+    """
+    realms = {None: ['/myRealm'], 'myRealm': ['sub'], 'myRealm/sub': []}
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+    monkeypatch.setattr(am, 'list_realms', lambda realm=None: {'result': realms[realm]})
+    monkeypatch.setattr(am, 'get_realm', lambda realm=None: {'active': realm == 'myRealm/sub'})
+    monkeypatch.setattr(am, 'iter_identities', lambda realm=None, type=None: iter(['demo']))
+    monkeypatch.setattr(am, 'get_identity',
+                        lambda realm=None, type=None, username=None: {'username': username, 'mail': ['demo@example.com']})
+    current = Reconciler(am).fetch({'realms': {'/': {}, '/myRealm/sub': {'active': True}},
+                                    'identities': {'/myRealm/sub': {'users': {'demo': {}}}}})
+    assert current['realms'] == {'/': {}, '/myRealm/sub': {'active': True}}
+    assert current['identities'] == {'/myRealm/sub': {'users': {'demo': {'username': 'demo',
+                                                                         'mail': ['demo@example.com']}}}}
+    assert Reconciler(am).plan({'realms': {'/myRealm/sub': {'active': True}}}) == []
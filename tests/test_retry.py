@@ -0,0 +1,80 @@
+"""Test script for the retry policy of python-openam"""
+
+import sys
+import os
+import requests
+import pytest
+
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+import openam
+from openam.retry import RetryPolicy
+
+
+def response(status_code, retry_after=None):
+    data = requests.Response()
+    data.status_code = status_code
+    if retry_after is not None:
+        data.headers['Retry-After'] = retry_after
+    return data
+
+
+def test___init__max_attempts():
+    """Test __init__ function with a wrong max_attempts.
+    :return:
+    """
+    with pytest.raises(ValueError) as excinfo:
+        RetryPolicy(max_attempts=0)
+    assert str(excinfo.value) == 'Please provide a max_attempts of at least 1.'
+
+
+def test_should_retry():
+    """Test the should_retry function on errors, status codes and the last attempt.
+    :return:
+    """
+    retry = RetryPolicy(max_attempts=3)
+    assert retry.should_retry(0)
+    assert retry.should_retry(1, response(503))
+    assert not retry.should_retry(1, response(404))
+    assert not retry.should_retry(2, response(503))
+
+
+def test_wait_time():
+    """Test the wait_time function with and without jitter.
+    :return:
+    """
+    retry = RetryPolicy(backoff_base=0.5, backoff_max=3, jitter=False)
+    assert [retry.wait_time(attempt) for attempt in range(4)] == [0.5, 1.0, 2.0, 3]
+    retry = RetryPolicy(backoff_base=0.5, jitter=True)
+    assert 0 <= retry.wait_time(2) <= 2.0
+
+
+def test_wait_time_retry_after():
+    """Test the wait_time function uses the Retry-After header.
+    :return:
+    """
+    retry = RetryPolicy(backoff_max=10)
+    assert retry.wait_time(0, response(503, retry_after='4')) == 4.0
+    assert retry.wait_time(0, response(503, retry_after='120')) == 10
+    assert retry.wait_time(0, response(503, retry_after='Wed, 21 Oct 2015 07:28:00 GMT')) == 0.0
+    assert RetryPolicy(respect_retry_after=False, jitter=False).wait_time(0, response(503, retry_after='4')) == 0.5
+
+
+def test_retry_idempotent_request(monkeypatch):
+    """Test only idempotent requests are retried on connection errors.
+    :return:
+    """
+    waits = []
+    events = []
+    monkeypatch.setattr(openam.time, 'sleep', waits.append)
+    am = openam.Openam(openam_url="http://127.0.0.1:1/openam", observers=[events.append],
+                       retry=RetryPolicy(max_attempts=3, jitter=False))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        am.get_serverinfo()
+    assert waits == [0.5, 1.0]
+    assert [event.retries for event in events] == [0, 1, 2]
+
+    data = am._post(uri='json/users/?_action=create', data='{}')
+    assert 'error' in data
+    assert len(events) == 4
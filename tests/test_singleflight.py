@@ -0,0 +1,92 @@
+"""Test script for the coalescing of requests of python-openam"""
+
+import sys
+import os
+import threading
+import time
+import pytest
+
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+import openam
+from openam.singleflight import SingleFlight
+
+
+class Response(object):
+    status_code = 200
+    content = b'{"username": "demo"}'
+
+
+def run_threads(target, number=5):
+    """Will run the target in a number of threads and returns the results.
+    :return:
+    """
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(number)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_do():
+    """Test the function is called once for calls at the same time with the same key.
+    :return:
+    """
+    calls = []
+    single_flight = SingleFlight()
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'result'
+
+    assert run_threads(lambda: single_flight.do('key', slow)) == ['result'] * 5
+    assert len(calls) == 1
+    assert single_flight.coalesced == 4
+    assert single_flight.do('key', slow) == 'result'
+    assert len(calls) == 2
+
+
+def test_do_error():
+    """Test all waiting threads receive the exception.
+    :return:
+    """
+    single_flight = SingleFlight()
+    errors = []
+
+    def fail():
+        time.sleep(0.2)
+        raise ValueError('failed')
+
+    def call():
+        try:
+            single_flight.do('key', fail)
+        except ValueError as e:
+            errors.append(e)
+
+    run_threads(call)
+    assert len(errors) == 5
+    with pytest.raises(ValueError):
+        single_flight.do('key', fail)
+
+
+def test_coalesce():
+    """Test identical reads of an Openam instance are sent once, writes are always sent.
+    :return:
+    """
+    sent = []
+
+    def send(method, uri, data=None, headers=None, stream=False):
+        sent.append(method)
+        time.sleep(0.2)
+        return Response()
+
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/", coalesce=True)
+    am._send = send
+    assert run_threads(lambda: am.get_identity(username='demo')) == [{'username': 'demo'}] * 5
+    assert sent == ['GET']
+    run_threads(lambda: am._put(uri='json/users/demo', data='{}', headers=am.headers), number=2)
+    assert sent == ['GET', 'PUT', 'PUT']
@@ -0,0 +1,126 @@
+"""Test script for the snapshots of python-openam"""
+
+import sys
+import os
+import json
+import time
+import xml.etree.ElementTree as ElementTree
+
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+import openam
+from openam.snapshot import export_snapshot, restore_snapshot
+
+
+def source(monkeypatch):
+    """Will return an Openam instance with a realm, an identity, a resourcetype and a policy.
+    :return:
+    """
+    am = openam.Openam(openam_url="http://openam.example.com:8080/openam/")
+    realms = {None: ['/', '/myRealm'], 'myRealm': ['/myRealm']}
+    monkeypatch.setattr(am, 'list_realms', lambda realm=None: {'result': realms[realm]})
+    monkeypatch.setattr(am, 'get_realm', lambda realm=None: {'active': True})
+    identities = {(None, 'users'): [{'username': 'demo', 'dn': ['uid=demo'], 'mail': ['demo@example.com']}]}
+    monkeypatch.setattr(am, 'iter_identities', lambda realm=None, type=None: iter(identities.get((realm, type), [])))
+    resourcetypes = {None: [{'uuid': '20a13582', 'name': 'URL', 'creationDate': 1472947547951}]}
+    monkeypatch.setattr(am, 'list_resourcetypes', lambda realm=None: {'result': resourcetypes.get(realm, [])})
+    policies = {'myRealm': [ElementTree.fromstring('<Policy PolicyId="one"><Target/></Policy>')]}
+    monkeypatch.setattr(am, 'iter_xacml_policies', lambda realm=None: iter(policies.get(realm, [])))
+    return am
+
+
+def test_export_snapshot(monkeypatch, tmpdir):
+    """Test every kind of object is written to its own file.
+    :return:
+    """
+    counts = export_snapshot(source(monkeypatch), str(tmpdir), compress=True)
+    assert counts == {'realms': 2, 'identities': 1, 'resourcetypes': 1, 'policies': 1}
+    assert sorted(os.listdir(str(tmpdir))) == ['identities.ndjson.gz', 'policies.ndjson.gz', 'realms.ndjson.gz',
+                                               'resourcetypes.ndjson.gz']
+
+
+def test_restore_snapshot(monkeypatch, tmpdir):
+    """Test a snapshot is created in another instance.
+    :return:
+    """
+    export_snapshot(source(monkeypatch), str(tmpdir))
+    created = []
+    am = openam.Openam(openam_url="http://openam-test.example.com:8080/openam/")
+    monkeypatch.setattr(am, 'create_realm', lambda realm_data=None: created.append(realm_data) or {})
+    monkeypatch.setattr(am, 'create_identity',
+                        lambda realm=None, type=None, user_data=None: created.append(user_data) or {})
+    monkeypatch.setattr(am, 'create_resourcetype', lambda realm=None, resource_data=None: created.append(resource_data) or {})
+
+    def xacml_import_policies(realm=None, policies=None, batch_size=100, concurrency=4):
+        for policy in policies:
+            created.append(realm)
+            yield {'item': ElementTree.fromstring(policy).get('PolicyId'), 'status': 'create', 'result': {}}
+
+    monkeypatch.setattr(am, 'xacml_import_policies', xacml_import_policies)
+    reports = list(restore_snapshot(am, str(tmpdir), concurrency=1, default_password='secret12'))
+    assert [report['status'] for report in reports] == ['created'] * 4
+    assert created == [{'active': True, 'realm': 'myRealm'},
+                       {'username': 'demo', 'mail': ['demo@example.com'], 'userpassword': 'secret12'},
+                       {'uuid': '20a13582', 'name': 'URL'},
+                       'myRealm']
+    assert reports[-1]['item'] == {'realm': '/myRealm', 'name': 'one'}
+
+
+def test_export_snapshot_policies_per_realm(monkeypatch, tmpdir):
+    """Test the policies of a realm are written together, so they are restored with one import per realm.
+    :return:
+    """
+    am = source(monkeypatch)
+
+    def iter_xacml_policies(realm=None):
+        for number in range(3):
+            time.sleep(0.01)
+            yield ElementTree.fromstring('<Policy PolicyId="%s%d"><Target/></Policy>' % (realm or 'root', number))
+
+    monkeypatch.setattr(am, 'iter_xacml_policies', iter_xacml_policies)
+    export_snapshot(am, str(tmpdir))
+    with open(str(tmpdir.join('policies.ndjson'))) as fileobj:
+        realms = [json.loads(line)['realm'] for line in fileobj]
+    assert len(realms) == 6
+    assert realms in [['/'] * 3 + ['/myRealm'] * 3, ['/myRealm'] * 3 + ['/'] * 3]
+
+    imports = []
+    target = openam.Openam(openam_url="http://openam-test.example.com:8080/openam/")
+    monkeypatch.setattr(target, 'create_realm', lambda realm_data=None: {})
+    monkeypatch.setattr(target, 'create_identity', lambda realm=None, type=None, user_data=None: {})
+    monkeypatch.setattr(target, 'create_resourcetype', lambda realm=None, resource_data=None: {})
+
+    def xacml_import_policies(realm=None, policies=None, batch_size=100, concurrency=4):
+        imports.append(realm)
+        for policy in policies:
+            yield {'item': ElementTree.fromstring(policy).get('PolicyId'), 'status': 'create', 'result': {}}
+
+    monkeypatch.setattr(target, 'xacml_import_policies', xacml_import_policies)
+    list(restore_snapshot(target, str(tmpdir)))
+    assert sorted(imports, key=str) == [None, 'myRealm']
+
+
+def test_export_snapshot_openam_12(monkeypatch, tmpdir):
+    """Test the complete identities are exported when OpenAM only returns their names, and a snapshot with only the
+    names is not restored.
+    :return:
+    """
+    am = source(monkeypatch)
+    monkeypatch.setattr(am, 'iter_identities', lambda realm=None, type=None: iter(['demo'] if (realm, type) == (None, 'users') else []))
+    monkeypatch.setattr(am, 'get_identity',
+                        lambda realm=None, type=None, username=None: {'username': username, 'mail': ['demo@example.com']})
+    export_snapshot(am, str(tmpdir))
+    with open(os.path.join(str(tmpdir), 'identities.ndjson')) as fileobj:
+        records = [json.loads(line) for line in fileobj]
+    assert [record['data'] for record in records] == [{'username': 'demo', 'mail': ['demo@example.com']}]
+
+    with open(os.path.join(str(tmpdir), 'identities.ndjson'), 'w') as fileobj:
+        fileobj.write(json.dumps({'realm': '/', 'type': 'users', 'data': 'demo'}) + '\n')
+    target = openam.Openam(openam_url="http://openam-test.example.com:8080/openam/")
+    monkeypatch.setattr(target, 'create_realm', lambda realm_data=None: {})
+    monkeypatch.setattr(target, 'create_resourcetype', lambda realm=None, resource_data=None: {})
+    monkeypatch.setattr(target, 'xacml_import_policies', lambda **kwargs: iter([]))
+    reports = [report for report in restore_snapshot(target, str(tmpdir)) if report['item'].get('type') == 'users']
+    assert reports[0]['status'] == 'failed'
+    assert isinstance(reports[0]['result'], ValueError)
@@ -0,0 +1,86 @@
+"""Test script for the rate limiter of python-openam"""
+
+import sys
+import os
+import threading
+import time
+import pytest
+
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+import openam
+from openam.throttle import RateLimiter, Throttle, TokenBucket
+
+
+def test_token_bucket_rate():
+    """Test TokenBucket with a wrong rate.
+    :return:
+    """
+    with pytest.raises(ValueError) as excinfo:
+        TokenBucket(rate=0)
+    assert str(excinfo.value) == 'Please provide a rate higher than 0.'
+
+
+def test_token_bucket_reserve():
+    """Test the burst is free and the next tokens need to be waited for.
+    :return:
+    """
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert 0.05 < bucket.reserve() <= 0.1
+    assert 0.15 < bucket.reserve() <= 0.2
+
+
+def test_operation():
+    """Test the kind of operation of requests.
+    :return:
+    """
+    limiter = RateLimiter()
+    assert limiter.operation('POST', 'json/authenticate') == 'authentication'
+    assert limiter.operation('POST', 'json/realms/test/authenticate?authIndexType=module') == 'authentication'
+    assert limiter.operation('GET', 'json/users/demo') == 'reads'
+    assert limiter.operation('POST', 'json/sessions/?_action=validate') == 'reads'
+    assert limiter.operation('POST', 'json/users/?_action=create') == 'writes'
+    assert limiter.operation('DELETE', 'json/users/demo') == 'writes'
+
+
+def test_max_in_flight():
+    """Test no more requests than max_in_flight are done at once, over all threads.
+    :return:
+    """
+    limiter = RateLimiter(max_in_flight=4, writes=Throttle(max_in_flight=2))
+    lock = threading.Lock()
+    in_flight = {'reads': 0, 'writes': 0}
+    highest = {'reads': 0, 'writes': 0}
+
+    def request(method):
+        operation = limiter.operation(method, 'json/users/demo')
+        with limiter.limit(method, 'json/users/demo'):
+            with lock:
+                in_flight[operation] += 1
+                highest[operation] = max(highest[operation], in_flight[operation])
+                assert in_flight['reads'] + in_flight['writes'] <= 4
+            time.sleep(0.01)
+            with lock:
+                in_flight[operation] -= 1
+
+    threads = [threading.Thread(target=request, args=(method,)) for method in ['GET', 'PUT'] * 8]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert highest['writes'] == 2
+    assert highest['reads'] <= 4
+
+
+def test_rate_limiter():
+    """Test the requests of an Openam instance are limited.
+    :return:
+    """
+    am = openam.Openam(openam_url="http://127.0.0.1:1/openam", rate_limiter=RateLimiter(rate=20, burst=1))
+    start = time.time()
+    for _ in range(3):
+        assert 'error' in am._post(uri='json/users/demo', data='{}')
+    assert time.time() - start >= 0.09